@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+"""
+Measures index, inspect and button rendering for the test project's admins.
+
+    python benchmarks/admin.py [--rows 1000] [--repeat 5] [--superuser]
+                               [--output results.json] [--compare old.json]
+
+`--rows` authors, books and event pages are created in a test database.
+Then, for `AuthorModelAdmin` and `BookModelAdmin` (which use
+`PermissionHelper`) and `EventPageAdmin` (which uses
+`PagePermissionHelper`), the following are reported:
+
+* Index view: fastest response time, number of queries, number of
+  permission checks and peak memory use (Python 3 only)
+* Inspect view (for the first object): fastest response time, and number
+  of queries
+* Buttons: the fastest time taken to create the buttons for each row of the
+  first page, and the number of permission checks for each row
+
+Requests are made by an editor with permission to add, change and delete
+authors, books and event pages, unless `--superuser` is used (which skips
+most permission checks). Results can be written to a JSON file with
+`--output`, and compared with results from a previous run with `--compare`.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from utils import (
+    PROJECT_ROOT, best_of, print_table, setup_django, test_database)
+
+MODELADMIN_CLASS_NAMES = (
+    'AuthorModelAdmin', 'BookModelAdmin', 'EventPageAdmin')
+
+# Lower is better for all of these
+COMPARED_KEYS = (
+    'index_ms', 'index_queries', 'index_permission_checks',
+    'index_peak_bytes', 'inspect_ms', 'inspect_queries', 'buttons_us_per_row',
+    'button_permission_checks_per_row',
+)
+
+
+@contextmanager
+def count_permission_checks(helper_class):
+    """
+    Count calls to the `user_can()`, `user_can_*()` and
+    `do_generic_permission_check()` methods of `helper_class` made while the
+    block is executed. Calls made by one of these methods to another aren't
+    counted separately.
+    """
+    counter = {'count': 0, 'depth': 0}
+
+    def wrap(method):
+        def wrapper(*args, **kwargs):
+            if not counter['depth']:
+                counter['count'] += 1
+            counter['depth'] += 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                counter['depth'] -= 1
+        return wrapper
+
+    names = [
+        name for name in dir(helper_class)
+        if name.startswith('user_can') or
+        name == 'do_generic_permission_check'
+    ]
+    originals = dict(
+        (name, helper_class.__dict__[name]) for name in names
+        if name in helper_class.__dict__
+    )
+    for name in names:
+        setattr(helper_class, name, wrap(getattr(helper_class, name)))
+    try:
+        yield counter
+    finally:
+        for name in names:
+            if name in originals:
+                setattr(helper_class, name, originals[name])
+            else:
+                delattr(helper_class, name)
+
+
+def create_books(rows, batch_size=5000):
+    from waddleadmin.tests.models import Author, Book
+
+    Author.objects.bulk_create([
+        Author(name='Author %s' % i, date_of_birth=datetime.date(
+            1900 + i % 100, 1 + i % 12, 1 + i % 28))
+        for i in range(rows)
+    ], batch_size=batch_size)
+    author_ids = list(Author.objects.values_list('pk', flat=True))
+    Book.objects.bulk_create([
+        Book(author_id=author_ids[i % len(author_ids)],
+             title='Book %s' % i)
+        for i in range(rows)
+    ], batch_size=batch_size)
+
+
+def create_event_pages(rows):
+    from wagtail.tests.testapp.models import EventPage
+    from wagtail.wagtailcore.models import Page
+
+    # Pages can't be bulk created, as they use multi-table inheritance
+    parent = Page.objects.get(depth=2)
+    for i in range(rows):
+        parent.add_child(instance=EventPage(
+            title='Event %s' % i,
+            date_from=datetime.date(2017, 1 + i % 12, 1 + i % 28),
+            audience='public' if i % 2 else 'private',
+            location='Venue %s' % (i % 10),
+            cost='Free',
+            live=bool(i % 3),
+        ))
+    return parent
+
+
+def create_user(page, superuser=False):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import Group, Permission
+    from wagtail.wagtailcore.models import GroupPagePermission
+
+    user = get_user_model().objects.create_user(
+        'benchmark', 'benchmark@example.com', 'password', is_staff=True,
+        is_superuser=superuser)
+    if superuser:
+        return user
+
+    group = Group.objects.create(name='Benchmark editors')
+    group.permissions.add(*Permission.objects.filter(
+        content_type__app_label='waddleadmin_test',
+        content_type__model__in=('author', 'book'),
+    ))
+    group.permissions.add(Permission.objects.get(
+        content_type__app_label='wagtailadmin', codename='access_admin'))
+    for permission_type in ('add', 'edit', 'publish'):
+        GroupPagePermission.objects.create(
+            group=group, page=page, permission_type=permission_type)
+    user.groups.add(group)
+    return user
+
+
+def get_model_admin(class_name):
+    from waddleadmin.utils.registry import get_registered_modeladmins
+
+    for model_admin in get_registered_modeladmins():
+        if type(model_admin).__name__ == class_name:
+            return model_admin
+    raise LookupError('%s is not registered' % class_name)
+
+
+def benchmark_model_admin(model_admin, client, user, repeat):
+    from django.contrib.admin.utils import quote
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+    from waddleadmin.utils.profiling import measure_peak_memory
+
+    permission_helper_class = type(model_admin.permission_helper)
+    result = OrderedDict([
+        ('model_admin', type(model_admin).__name__),
+        ('model', model_admin.opts.label),
+        ('permission_helper', permission_helper_class.__name__),
+    ])
+
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        return response
+
+    # Index view
+    index_url = model_admin.url_helper.index_url
+    get(index_url)  # Populate any caches first
+    result['index_ms'] = round(best_of(lambda: get(index_url), repeat), 3)
+    with CaptureQueriesContext(connection) as queries:
+        with count_permission_checks(permission_helper_class) as checks:
+            get(index_url)
+    result['index_queries'] = len(queries)
+    result['index_permission_checks'] = checks['count']
+    result['index_peak_bytes'] = measure_peak_memory(
+        lambda: get(index_url))[1]
+
+    # Inspect view
+    request = RequestFactory().get(index_url)
+    request.user = user
+    objects = list(
+        model_admin.get_queryset(request)[:model_admin.list_per_page])
+    inspect_url = model_admin.url_helper.get_action_url(
+        'inspect', quote(objects[0].pk))
+    get(inspect_url)
+    result['inspect_ms'] = round(best_of(lambda: get(inspect_url), repeat), 3)
+    with CaptureQueriesContext(connection) as queries:
+        get(inspect_url)
+    result['inspect_queries'] = len(queries)
+
+    # Buttons for each row of the first page
+    button_helper = model_admin.get_button_helper_class()(
+        request, model_admin)
+    button_names = model_admin.get_index_view_button_names(request)
+
+    def create_buttons():
+        for obj in objects:
+            list(button_helper.get_button_set(obj, button_names))
+
+    create_buttons()
+    result['buttons_us_per_row'] = round(
+        best_of(create_buttons, repeat) * 1000 / len(objects), 3)
+    with count_permission_checks(permission_helper_class) as checks:
+        create_buttons()
+    result['button_permission_checks_per_row'] = round(
+        checks['count'] / float(len(objects)), 3)
+    return result
+
+
+def get_environment():
+    import django
+    import wagtail
+    import waddleadmin
+
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+            stderr=subprocess.STDOUT).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return OrderedDict([
+        ('python', platform.python_version()),
+        ('django', django.get_version()),
+        ('wagtail', wagtail.__version__),
+        ('waddleadmin', waddleadmin.__version__),
+        ('commit', commit),
+    ])
+
+
+def format_bytes(value):
+    if value is None:
+        return 'n/a'
+    return '%.1fKiB' % (value / 1024.0)
+
+
+def print_results(results):
+    print_table([
+        [
+            result['model_admin'],
+            result['permission_helper'],
+            '%.1fms' % result['index_ms'],
+            result['index_queries'],
+            result['index_permission_checks'],
+            format_bytes(result['index_peak_bytes']),
+            '%.1fms' % result['inspect_ms'],
+            result['inspect_queries'],
+            '%.1fus' % result['buttons_us_per_row'],
+            result['button_permission_checks_per_row'],
+        ]
+        for result in results
+    ], (
+        'ModelAdmin', 'Permission helper', 'Index', 'Queries', 'Checks',
+        'Peak memory', 'Inspect', 'Queries', 'Buttons/row', 'Checks/row',
+    ))
+
+
+def print_comparison(results, previous):
+    previous_results = dict(
+        (result['model_admin'], result) for result in previous['results'])
+    rows = []
+    for result in results:
+        old = previous_results.get(result['model_admin'])
+        if old is None:
+            continue
+        for key in COMPARED_KEYS:
+            if old.get(key) is None or result[key] is None:
+                continue
+            if old[key]:
+                change = '%+.1f%%' % (
+                    (result[key] - old[key]) * 100.0 / old[key])
+            else:
+                change = 'n/a'
+            rows.append(
+                [result['model_admin'], key, old[key], result[key], change])
+    print('\nCompared with %s (commit %s):\n' % (
+        previous['environment'].get('waddleadmin'),
+        previous['environment'].get('commit')))
+    print_table(rows, ('ModelAdmin', 'Measurement', 'Before', 'After',
+                       'Change'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--superuser', action='store_true')
+    parser.add_argument('--output', help='A file to write JSON results to')
+    parser.add_argument(
+        '--compare', help='A JSON file from a previous run to compare with')
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    setup_django()
+    from django.test import Client
+
+    with test_database():
+        print('Creating %s authors, books and event pages...' % args.rows)
+        create_books(args.rows)
+        parent_page = create_event_pages(args.rows)
+        user = create_user(parent_page, args.superuser)
+        client = Client()
+        client.force_login(user)
+
+        results = [
+            benchmark_model_admin(
+                get_model_admin(class_name), client, user, args.repeat)
+            for class_name in MODELADMIN_CLASS_NAMES
+        ]
+
+    print()
+    print_results(results)
+    if previous is not None:
+        print_comparison(results, previous)
+
+    if args.output:
+        report = OrderedDict([
+            ('environment', get_environment()),
+            ('rows', args.rows),
+            ('repeat', args.repeat),
+            ('superuser', args.superuser),
+            ('results', results),
+        ])
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print('\nResults written to %s' % args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Measures the cost of importing parts of waddleadmin after Django is set up.
+
+    python benchmarks/imports.py [--repeat 5] [--top 10]
+
+Each scenario is run in a fresh interpreter with `python -X importtime`
+(Python 3.7+), after `django.setup()`, reporting the fastest total import
+time from `--repeat` attempts, the number of modules imported, and the
+slowest modules to import (by cumulative time) for the final scenario.
+Management commands that never touch the admin only pay for the first one.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import os
+import subprocess
+import sys
+
+from utils import PROJECT_ROOT, print_table
+
+MARKER = 'waddleadmin-benchmark-setup-complete'
+
+SCRIPT = """
+import sys
+import django
+django.setup()
+sys.stderr.write('%s\\n')
+%%s
+""" % MARKER
+
+SCENARIOS = (
+    ('import waddleadmin.helpers', 'import waddleadmin.helpers'),
+    ('one helper', 'from waddleadmin.helpers import PermissionHelper'),
+    ('all helpers', 'from waddleadmin.helpers import *'),
+    ('import waddleadmin.options', 'import waddleadmin.options'),
+)
+
+
+def run_scenario(statement, settings_module):
+    """
+    Return a list of (module, self_us, cumulative_us) tuples for modules
+    imported by `statement`, in the order reported by `-X importtime`
+    """
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    env['PYTHONPATH'] = os.pathsep.join(
+        path for path in [PROJECT_ROOT] + sys.path if path)
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', SCRIPT % statement],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    lines = stderr.decode('utf-8').splitlines()
+    if process.returncode:
+        raise RuntimeError('\n'.join(lines))
+    imports = []
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+        self_us, cumulative_us, module = line[12:].split('|')
+        imports.append(
+            (module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument(
+        '--settings', default='waddleadmin.tests.settings')
+    args = parser.parse_args()
+    if sys.version_info < (3, 7):
+        parser.error('-X importtime requires Python 3.7 or later')
+
+    results = []
+    for label, statement in SCENARIOS:
+        attempts = [
+            run_scenario(statement, args.settings)
+            for i in range(args.repeat)
+        ]
+        best = min(
+            sum(item[1] for item in imports) for imports in attempts)
+        imports = attempts[-1]
+        results.append([
+            label,
+            '%.1fms' % (best / 1000.0),
+            len(imports),
+            len([item for item in imports if item[0].startswith(
+                'waddleadmin')]),
+        ])
+
+    print_table(results, (
+        'Scenario', 'Import time', 'Modules', 'waddleadmin modules'))
+
+    print('\nSlowest imports for %r:\n' % SCENARIOS[-1][1])
+    slowest = sorted(imports, key=lambda item: item[2], reverse=True)
+    print_table([
+        [module, '%.1fms' % (self_us / 1000.0),
+         '%.1fms' % (cumulative_us / 1000.0)]
+        for module, self_us, cumulative_us in slowest[:args.top]
+    ], ('Module', 'Self', 'Cumulative'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Compares search strategies for `IndexView` on a large table of books.
+
+    python benchmarks/search.py [--rows 300000] [--repeat 5]
+
+For each search term, the time taken to count the results and fetch the
+first page (which is what `IndexView` does) is reported for
+`ORMSearchHelper` and `WagtailSearchHelper`, using whichever search backend
+is configured as 'default' (Wagtail's database backend, unless
+`WAGTAILSEARCH_BACKENDS` is set).
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import itertools
+
+from utils import best_of, print_table, setup_django, test_database
+
+WORDS = (
+    'lord', 'rings', 'hobbit', 'chocolate', 'factory', 'chronicles',
+    'narnia', 'giant', 'peach', 'witch', 'wardrobe', 'silmarillion',
+    'fantastic', 'mister', 'fox', 'matilda', 'return', 'king', 'tower',
+)
+
+TERMS = ('hobbit', 'giant peach', 'the', 'nothing matches this')
+
+
+class BenchmarkView(object):
+
+    def __init__(self, model_admin):
+        self.model_admin = model_admin
+        self.search_fields = model_admin.search_fields
+
+
+def create_books(rows, batch_size=5000):
+    from waddleadmin.tests.models import Author, Book
+
+    author = Author.objects.create(name='Benchmark Author',
+                                   date_of_birth='1900-01-01')
+    titles = itertools.cycle(
+        ' '.join(words).title()
+        for words in itertools.permutations(WORDS, 3)
+    )
+    for start in range(0, rows, batch_size):
+        Book.objects.bulk_create([
+            Book(author=author, title='The %s %s' % (next(titles), i))
+            for i in range(start, min(start + batch_size, rows))
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=300000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from waddleadmin.helpers import ORMSearchHelper, WagtailSearchHelper
+    from waddleadmin.tests.models import Book
+    from waddleadmin.tests.wagtail_hooks import BookModelAdmin
+
+    with test_database():
+        print('Creating %s books...' % args.rows)
+        create_books(args.rows)
+
+        model_admin = BookModelAdmin()
+        view = BenchmarkView(model_admin)
+        base_queryset = Book.objects.order_by('title', '-pk')
+        per_page = model_admin.list_per_page
+
+        results = []
+        for term in TERMS:
+            row = [term]
+            for helper_class in (ORMSearchHelper, WagtailSearchHelper):
+
+                def search():
+                    # A new helper each time, so that nothing is reused
+                    helper = helper_class(view, None)
+                    qs, use_distinct = helper.get_search_results(
+                        base_queryset, term)
+                    qs.count()
+                    list(qs[:per_page])
+
+                row.append('%.1fms' % best_of(search, args.repeat))
+            results.append(row)
+
+        print_table(results, ('Term', 'ORM', 'Wagtail search backend'))
+
+
+if __name__ == '__main__':
+    main()
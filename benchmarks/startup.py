@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Measures the start-up cost of each `ModelAdmin` registered by the test project.
+
+    python benchmarks/startup.py [--repeat 5]
+
+Wagtail hooks are loaded (which creates and registers each `ModelAdmin`),
+then each registered class is instantiated again, and its URLs registered,
+reporting the fastest time taken for each step from `--repeat` attempts,
+and the memory allocated (Python 3 only). Items of a `ModelAdminGroup` are
+created with the same parent as when registered.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+
+from utils import print_table, setup_django
+
+
+def format_bytes(value):
+    if value is None:
+        return 'n/a'
+    return '%.1fKiB' % (value / 1024.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from waddleadmin.utils.profiling import (
+        measure_time, profile_modeladmin_class)
+    from waddleadmin.utils.registry import get_registered_modeladmins
+
+    model_admins, hooks_ms = measure_time(get_registered_modeladmins)
+    print('Loaded hooks and registered %s ModelAdmins in %.1fms\n' % (
+        len(model_admins), hooks_ms))
+
+    results = []
+    totals = [0, 0, 0, 0]
+    for model_admin in model_admins:
+        profiles = [
+            profile_modeladmin_class(type(model_admin), model_admin.parent)
+            for i in range(args.repeat)
+        ]
+        init_ms = min(profile['init_ms'] for profile in profiles)
+        urls_ms = min(profile['urls_ms'] for profile in profiles)
+        profile = profiles[-1]
+        results.append([
+            profile['name'].rsplit('.', 1)[-1],
+            profile['model'],
+            '%.3fms' % init_ms,
+            format_bytes(profile['init_bytes']),
+            '%.3fms' % urls_ms,
+            format_bytes(profile['urls_bytes']),
+            profile['url_count'],
+        ])
+        totals[0] += init_ms
+        totals[1] += profile['init_bytes'] or 0
+        totals[2] += urls_ms
+        totals[3] += profile['urls_bytes'] or 0
+
+    print_table(results, (
+        'ModelAdmin', 'Model', 'Init', 'Init memory', 'URLs', 'URLs memory',
+        'URL count'))
+    print('\nTotal: init %.3fms (%s), URLs %.3fms (%s)' % (
+        totals[0], format_bytes(totals[1]), totals[2],
+        format_bytes(totals[3])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Shared set up for benchmark scripts. Benchmarks use the test settings and
+create a fresh test database, which is destroyed again afterwards.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import os
+import sys
+import timeit
+from contextlib import contextmanager
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def setup_django(settings_module='waddleadmin.tests.settings'):
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0):
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment)
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def best_of(func, repeat=5):
+    """
+    Return the fastest time (in milliseconds) taken to call `func`, from
+    `repeat` attempts
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def print_table(rows, headings):
+    widths = [
+        max(len(str(row[i])) for row in [headings] + rows)
+        for i in range(len(headings))
+    ]
+    line = '  '.join('%%-%ds' % width for width in widths)
+    print(line % tuple(headings))
+    print(line % tuple('-' * width for width in widths))
+    for row in rows:
+        print(line % tuple(row))
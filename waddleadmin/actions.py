@@ -7,6 +7,8 @@ from django.core.exceptions import ImproperlyConfigured
 from django.utils.text import capfirst
 from django.utils.translation import ugettext_lazy as _
 
+from .utils.instrumentation import instrument
+
 
 class ModelAction(object):
 
@@ -27,6 +29,7 @@ class ModelAction(object):
         view_url_name='',
         permission_required=None,
         template_name='',
+        query_budget=None,
         **kwargs
     ):
 
@@ -49,15 +52,20 @@ class ModelAction(object):
         self.view_url_pattern = view_url_pattern
         self.view_url_name = view_url_name
         self.template_name = template_name
+        self.query_budget = query_budget
 
         self.init_kwargs = kwargs
 
     def get_url_pattern(self):
-        return self.url_pattern or self.url_helper.get_action_url_pattern(
-            self.codename)
+        if self.view_url_pattern:
+            return self.view_url_pattern
+        if self.instance_specific:
+            return self.url_helper._get_object_specific_action_url_pattern(
+                self.codename)
+        return self.url_helper._get_action_url_pattern(self.codename)
 
     def get_url_name(self):
-        return self.url_name or self.url_helper.get_action_url_name(
+        return self.view_url_name or self.url_helper.get_action_url_name(
             self.codename)
 
     def get_url(self, obj):
@@ -109,9 +117,13 @@ class ModelAction(object):
             return list(self.button_extra_classes)
         return []
 
+    @instrument('action.render_view')
     def render_view(self, request, *args, **kwargs):
-        if self.get_modeladmin_view_method():
-            return self.get_modeladmin_view_method(request, *args, **kwargs)
+        # Allows `QueryBudgetMiddleware` to identify the action
+        request.waddleadmin_action = self
+        view_method = self.get_modeladmin_view_method()
+        if view_method:
+            return view_method(request, *args, **kwargs)
 
         view_class = self.get_view_class()
         if view_class is None:
@@ -126,13 +138,18 @@ class ModelAction(object):
                     self.codename,
                 )
             )
-        view = self.view_class.as_view(self.model_admin)
+        view = view_class.as_view(model_admin=self.model_admin)
         return view(request, *args, **kwargs)
 
+    # Copied to any decorated versions of the view (e.g. by Wagtail's
+    # `require_admin_access`), so that middleware can identify them
+    render_view.is_model_action_view = True
+
     @property
     def url(self):
         return url(
-            self.get_url_pattern(), self.render_view, self.get_url_name()
+            self.get_url_pattern(), self.render_view,
+            name=self.get_url_name()
         )
 
 CREATE_ACTION = {
@@ -192,8 +209,20 @@ DELETE_ACTION = {
     'permission_required': 'delete',
 }
 
+JSON_INDEX_ACTION = {
+    'instance_specific': False,
+    # Translators: A human-friendly version of the 'json_index' action codename
+    'verbose_name': _('list as JSON'),
+    # Translators: Descriptive 'title' text for 'json_index' call-to-action links
+    'description': _('view a list of existing {model_name_plural} as JSON'),
+    # Translators: The visual text for 'json_index' call-to-action links
+    'button_label': _('JSON'),
+    'permission_required': 'list',
+}
+
 DEFAULT_MODEL_ACTIONS = {
     'index': INDEX_ACTION,
+    'json_index': JSON_INDEX_ACTION,
     'create': CREATE_ACTION,
     'inspect': INSPECT_ACTION,
     'edit': EDIT_ACTION,
@@ -265,7 +294,8 @@ VIEW_LIVE_ACTION = {
     'description': _("view live version of '{obj}'"),
     # Translators: Visual link text for 'view_live' call-to-action links
     'button_label': _('view live'),
-    'view_url_registration_required': True,
+    # The button links to the page itself (see `ButtonHelper`)
+    'view_url_registration_required': False,
 }
 
 VIEW_DRAFT_ACTION = {
@@ -313,11 +343,22 @@ VIEW_REVISIONS_ACTION = {
     # Translators: Visual link text for 'view_revisions' call-to-action links
     'button_label': _('view revisions'),
     'permission_required': 'edit',
-    'view_url_registration_required': False,
+}
+
+REVISIONS_COMPARE_ACTION = {
+    'instance_specific': True,
+    # Translators: A human-friendly version of the 'revisions_compare' action codename
+    'verbose_name': _('compare revisions'),
+    # Translators: Descriptive 'title' text for 'revisions_compare' call-to-action links
+    'description': _("compare revisions of '{obj}'"),
+    # Translators: Visual link text for 'revisions_compare' call-to-action links
+    'button_label': _('compare'),
+    'permission_required': 'edit',
 }
 
 DEFAULT_PAGE_MODEL_ACTIONS = {
     'index': INDEX_ACTION,
+    'json_index': JSON_INDEX_ACTION,
     'create': CREATE_ACTION,
     'inspect': INSPECT_ACTION,
     'edit': EDIT_ACTION,
@@ -332,4 +373,5 @@ DEFAULT_PAGE_MODEL_ACTIONS = {
     'publish': PUBLISH_ACTION,
     'unpublish': UNPUBLISH_ACTION,
     'revisions_index': VIEW_REVISIONS_ACTION,
+    'revisions_compare': REVISIONS_COMPARE_ACTION,
 }
@@ -0,0 +1,48 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.contrib.admin.utils import pretty_name
+
+
+class AnnotatedColumn(object):
+    """
+    A `list_display` item with a value that is calculated by the database for
+    the whole page of results in one go, by annotating the `IndexView`
+    queryset with `expression` (e.g. `Count('book', distinct=True)`).
+    Because the value is available to the database, results can also be
+    ordered by it.
+
+    Assign an instance to an attribute on your `ModelAdmin` class, and add
+    the attribute name to `list_display`:
+
+        class AuthorModelAdmin(ModelAdmin):
+            list_display = ('name', 'book_count')
+            book_count = AnnotatedColumn(
+                Count('book', distinct=True), _('books'))
+
+    The attribute name is used as the annotation alias, so must not clash
+    with the name of a field on the model.
+    """
+
+    def __init__(self, expression, short_description=None, sortable=True,
+                 boolean=False, empty_value_display=None):
+        self.expression = expression
+        self.name = None
+        self.sortable = sortable
+        self.boolean = boolean
+        self._short_description = short_description
+        if empty_value_display is not None:
+            self.empty_value_display = empty_value_display
+
+    def __call__(self, obj):
+        return getattr(obj, self.name, None)
+
+    @property
+    def short_description(self):
+        if self._short_description is not None:
+            return self._short_description
+        return pretty_name(self.name or '')
+
+    @property
+    def admin_order_field(self):
+        if self.sortable:
+            return self.name
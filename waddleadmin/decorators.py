@@ -0,0 +1,45 @@
+from __future__ import absolute_import, unicode_literals
+
+
+def select_related(*fields):
+    """
+    Use to decorate `list_display` methods (on the model or a `ModelAdmin`
+    class) or row hooks (e.g. `get_extra_attrs_for_row`) that access objects
+    via foreign keys. The named relationships will be followed using
+    `select_related()` when building the queryset for `IndexView`, so that no
+    additional queries are needed to render each row.
+    """
+    def decorator(func):
+        func.select_related = fields
+        return func
+    return decorator
+
+
+def prefetch_related(*lookups):
+    """
+    Use to decorate `list_display` methods (on the model or a `ModelAdmin`
+    class) or row hooks that access many-to-many or reverse relationships
+    (e.g. `book_set`). Values can be strings or `Prefetch` objects, and will
+    be passed to `prefetch_related()` when building the queryset for
+    `IndexView`. Methods should use `.all()` on related managers in order to
+    benefit from the prefetched results.
+    """
+    def decorator(func):
+        func.prefetch_related = lookups
+        return func
+    return decorator
+
+
+def requires_fields(*fields):
+    """
+    Use to decorate `list_display` methods (on the model or a `ModelAdmin`
+    class), row hooks or a model's `__str__` method, to declare which
+    fields of the model they access. Only the columns needed to render each
+    row are loaded for `IndexView`. When any method doesn't declare its
+    needs (using this or the other decorators in this module), all fields
+    except large text and binary ones are loaded.
+    """
+    def decorator(func):
+        func.requires_fields = fields
+        return func
+    return decorator
@@ -1,3 +1,71 @@
-from .url import * # noqa
-from .permission import * # noqa
-from .button import * # noqa
+"""
+Helper classes used by `ModelAdmin` and its views, all of which can be
+imported from this package.
+
+Each submodule is only imported when one of its names is first accessed,
+so that importing one helper doesn't import the dependencies of all the
+others (search backends, admin widgets, etc.). PEP 562's module-level
+`__getattr__()` needs Python 3.7+, so this module is replaced in
+`sys.modules` with an instance of a `ModuleType` subclass instead.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import sys
+import types
+from importlib import import_module
+
+# The submodule that defines each name available from this package
+_MODULE_FOR_NAME = {
+    'GenericButtonHelper': 'button',
+    'VERSION_CACHE_ALIAS': 'cache',
+    'VERSION_KEY_PREFIX': 'cache',
+    'STATS_KEY_PREFIX': 'cache',
+    'get_version_key': 'cache',
+    'bump_version': 'cache',
+    'connect_signal_handlers': 'cache',
+    'IndexCacheHelper': 'cache',
+    'ResultCount': 'count',
+    'WindowCount': 'count',
+    'ExactCountHelper': 'count',
+    'WindowCountHelper': 'count',
+    'CachedCountHelper': 'count',
+    'EstimatedCountHelper': 'count',
+    'FacetedListFilter': 'facet',
+    'FacetHelper': 'facet',
+    'BasePermissionHelper': 'permission',
+    'PermissionHelper': 'permission',
+    'PagePermissionHelper': 'permission',
+    'ORMSearchHelper': 'search',
+    'WagtailSearchHelper': 'search',
+    'DatabaseSearchHelper': 'search',
+    'wagtailadmin_page_actions': 'url',
+    'AdminURLHelper': 'url',
+    'PageAdminURLHelper': 'url',
+}
+
+__all__ = sorted(_MODULE_FOR_NAME)
+
+
+class _LazyModule(types.ModuleType):
+
+    def __getattr__(self, name):
+        # Only called for names that haven't been loaded yet
+        if name not in _MODULE_FOR_NAME:
+            raise AttributeError(
+                "module %r has no attribute %r" % (self.__name__, name))
+        module = import_module('.' + _MODULE_FOR_NAME[name], self.__name__)
+        value = getattr(module, name)
+        # Found normally from now on
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(__all__))
+
+
+_module = _LazyModule(__name__, __doc__)
+_module.__dict__.update(globals())
+# Python 2 clears a module's globals when it is garbage collected, and the
+# methods above still need them
+_module._original_module = sys.modules[__name__]
+sys.modules[__name__] = _module
@@ -3,6 +3,8 @@ from __future__ import absolute_import, unicode_literals
 from django.utils.translation import ugettext_lazy as _
 from wagtail.wagtailadmin.widgets import Button
 from ..utils.inspection import accepts_kwarg
+from ..utils.instrumentation import instrument
+from ..utils.pages import get_relative_url
 from ..widgets import ActionButton, DropdownMenuButton
 
 
@@ -20,7 +22,8 @@ class GenericButtonHelper(object):
     def __init__(self, request, model_admin):
         self.request = request
         self.model_admin = model_admin
-        self.permission_helper = model_admin.permission_helper
+        self.permission_helper = model_admin.permission_helper.for_request(
+            request)
 
     def get_button_kwargs_for_action(self, codename, obj=None,
                                      build_kwargs_if_no_method_found=True):
@@ -107,6 +110,7 @@ class GenericButtonHelper(object):
         self.modify_button_css_classes(button, classes_add, classes_remove)
         return button
 
+    @instrument('button.get_button')
     def get_button(self, codename, obj=None, classes_add=(),
                    classes_remove=()):
         """If appropriate, return an individual button instance for action
@@ -131,6 +135,7 @@ class GenericButtonHelper(object):
                 if definition:
                     yield definition
 
+    @instrument('button.get_button_set')
     def get_button_set(self, obj, codename_list, classes_add=(),
                        classes_remove=()):
         for definition in self.get_button_set_definitions(obj, codename_list):
@@ -182,7 +187,7 @@ class GenericButtonHelper(object):
         # the dict here instead of using `build_button_kwargs_for_action`
         ma = self.model_admin
         return {
-            'url': obj.relative_url(request.site),
+            'url': get_relative_url(obj, request),
             'label': ma.get_button_label_for_action('view_live', obj),
             'title': ma.get_button_title_for_action('view_live', obj),
             'classes': ma.get_button_css_classes_for_action('view_live', obj),
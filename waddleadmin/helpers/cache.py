@@ -0,0 +1,257 @@
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.fields import FieldDoesNotExist
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import six, translation
+from django.utils.encoding import force_bytes
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+from wagtail.wagtailcore.models import GroupPagePermission
+
+# Versions are always stored in the default cache, because signal handlers
+# are shared by all `ModelAdmin` classes for a model
+VERSION_CACHE_ALIAS = 'default'
+VERSION_KEY_PREFIX = 'waddleadmin:index_version'
+STATS_KEY_PREFIX = 'waddleadmin:index_stats'
+
+_connected_models = set()
+
+
+def get_version_key(model):
+    return '%s:%s' % (VERSION_KEY_PREFIX, model._meta.label_lower)
+
+
+def bump_version(model):
+    """
+    Invalidate cached index content that depends on `model`, by
+    incrementing its version number
+    """
+    cache = caches[VERSION_CACHE_ALIAS]
+    key = get_version_key(model)
+    if not cache.add(key, 2, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The key expired since `add()` was called
+            cache.set(key, 2, None)
+
+
+def _bump_version_for_instance(sender, instance, **kwargs):
+    # Content for multi-table inheritance parents includes subclass rows
+    model = type(instance)._meta.concrete_model
+    bump_version(model)
+    for parent in model._meta.get_parent_list():
+        bump_version(parent)
+
+
+def _bump_version_for_m2m(sender, instance, model, **kwargs):
+    bump_version(type(instance)._meta.concrete_model)
+    bump_version(model._meta.concrete_model)
+
+
+def connect_signal_handlers(model):
+    """
+    Bump the version for `model` when instances of it (or any of its
+    subclasses) are saved or deleted, or when any of its many-to-many
+    relationships change. Safe to call more than once for the same model.
+    """
+    for subclass in apps.get_models():
+        if subclass is not model and issubclass(subclass, model):
+            _connect_signal_handlers(subclass)
+    _connect_signal_handlers(model)
+
+
+def _connect_signal_handlers(model):
+    if model in _connected_models:
+        return
+    _connected_models.add(model)
+    uid = 'waddleadmin_index_cache_%s' % model._meta.label_lower
+    post_save.connect(
+        _bump_version_for_instance, sender=model, weak=False,
+        dispatch_uid=uid)
+    post_delete.connect(
+        _bump_version_for_instance, sender=model, weak=False,
+        dispatch_uid=uid)
+    for field in model._meta.get_fields(include_hidden=True):
+        if field.many_to_many:
+            through = getattr(field, 'through', None) or getattr(
+                field.remote_field, 'through', None)
+            if through is None or isinstance(through, six.string_types):
+                continue
+            m2m_changed.connect(
+                _bump_version_for_m2m, sender=through, weak=False,
+                dispatch_uid='%s_%s' % (uid, through._meta.label_lower))
+
+
+def _get_expression_lookups(expression):
+    """
+    Return a list of the field lookups referenced by `expression` (e.g.
+    `['book']` for `Count('book')`)
+    """
+    if isinstance(expression, F):
+        return [expression.name]
+    if isinstance(expression, Q):
+        children = expression.children
+    else:
+        children = getattr(expression, 'get_source_expressions', list)()
+    lookups = []
+    for child in children:
+        if isinstance(child, tuple):
+            # A (lookup, value) pair from a `Q` object
+            lookups.append(child[0])
+        elif child is not None:
+            lookups.extend(_get_expression_lookups(child))
+    return lookups
+
+
+class IndexCacheHelper(object):
+    """
+    Caches the main content of `IndexView` (the filters, results and
+    pagination) when `ModelAdmin.index_view_cache_timeout` is set, so that
+    no database queries are needed to render it again for:
+
+    - the same querystring (normalised, so parameter order doesn't matter)
+    - a user with the same permissions (including group memberships, which
+      determine page permissions)
+    - the same active language
+    - the same scheme and host (which can affect 'view live' URLs)
+
+    Content is invalidated when instances of the model (or its subclasses),
+    or any model it references in `list_select_related` or
+    `list_prefetch_related` lookups or `AnnotatedColumn` expressions, are
+    saved or deleted, by including version numbers for each of those models
+    in the key. For page models, changes to group page permissions also
+    invalidate content. Hits and misses are counted for each `ModelAdmin`
+    class, and can be retrieved with `get_stats()`.
+    """
+    key_prefix = 'waddleadmin:index_content'
+
+    def __init__(self, view, request):
+        self.view = view
+        self.request = request
+        self.model_admin = view.model_admin
+        self.timeout = self.model_admin.index_view_cache_timeout
+        self.cache_alias = self.model_admin.index_view_cache_alias
+        self.cache = caches[self.cache_alias]
+        self.dependencies = self.get_dependencies(self.model_admin)
+        # In case caching was enabled after the `ModelAdmin` was created
+        for model in self.dependencies:
+            connect_signal_handlers(model)
+
+    @classmethod
+    def get_dependencies(cls, model_admin):
+        """
+        Return a list of models that content for `model_admin` depends on
+        """
+        models = [model_admin.model._meta.concrete_model]
+        select_related, prefetch_related = (
+            model_admin.get_related_lookups_for_list_display(
+                model_admin.list_display))
+        lookups = list(select_related)
+        for lookup in tuple(prefetch_related) + tuple(
+            model_admin.list_prefetch_related
+        ):
+            lookups.append(getattr(lookup, 'prefetch_through', lookup))
+        for column in model_admin.get_annotated_columns(
+            model_admin.list_display
+        ).values():
+            lookups.extend(_get_expression_lookups(column.expression))
+        for lookup in lookups:
+            model = model_admin.model
+            for part in lookup.split(LOOKUP_SEP):
+                try:
+                    field = model._meta.get_field(part)
+                except FieldDoesNotExist:
+                    break
+                if not field.is_relation or field.related_model is None:
+                    break
+                model = field.related_model._meta.concrete_model
+                if model not in models:
+                    models.append(model)
+        if model_admin.is_pagemodel:
+            # Determines which buttons are shown for each page
+            models.append(GroupPagePermission)
+        return models
+
+    @classmethod
+    def get_stats_keys(cls, model_admin):
+        prefix = '%s:%s.%s' % (
+            STATS_KEY_PREFIX, model_admin.__class__.__module__,
+            model_admin.__class__.__name__)
+        return prefix + ':hits', prefix + ':misses'
+
+    @classmethod
+    def get_stats(cls, model_admin):
+        """
+        Return a dictionary containing the number of hits and misses for
+        `model_admin`, and the resulting hit rate (between 0 and 1)
+        """
+        cache = caches[model_admin.index_view_cache_alias]
+        hits_key, misses_key = cls.get_stats_keys(model_admin)
+        values = cache.get_many([hits_key, misses_key])
+        hits = values.get(hits_key, 0)
+        misses = values.get(misses_key, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': float(hits) / total if total else 0.0,
+        }
+
+    def increment_stat(self, key):
+        if not self.cache.add(key, 1, None):
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, 1, None)
+
+    def get_permission_fingerprint(self):
+        user = self.request.user
+        parts = [
+            'superuser' if user.is_superuser else '',
+            ','.join(str(pk) for pk in sorted(
+                user.groups.values_list('pk', flat=True))),
+            ','.join(sorted(user.get_all_permissions())),
+        ]
+        return '|'.join(parts)
+
+    def get_querystring(self):
+        return urlencode(sorted(self.request.GET.lists()), doseq=True)
+
+    def get_cache_key(self):
+        version_keys = [
+            get_version_key(model) for model in self.dependencies]
+        versions = caches[VERSION_CACHE_ALIAS].get_many(version_keys)
+        key_parts = [
+            self.model_admin.__class__.__module__,
+            self.model_admin.__class__.__name__,
+            self.request.scheme,
+            self.request.get_host(),
+            self.get_querystring(),
+            self.get_permission_fingerprint(),
+            translation.get_language() or '',
+        ] + [str(versions.get(key, 1)) for key in version_keys]
+        digest = hashlib.md5(force_bytes('\n'.join(key_parts))).hexdigest()
+        return '%s:%s' % (self.key_prefix, digest)
+
+    def get_content(self):
+        """
+        Return cached content for the current request, or `None`
+        """
+        self.key = self.get_cache_key()
+        content = self.cache.get(self.key)
+        hits_key, misses_key = self.get_stats_keys(self.model_admin)
+        if content is None:
+            self.increment_stat(misses_key)
+            return None
+        self.increment_stat(hits_key)
+        return mark_safe(content)
+
+    def set_content(self, content):
+        self.cache.set(self.key, content, self.timeout)
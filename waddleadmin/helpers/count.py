@@ -0,0 +1,211 @@
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import json
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.paginator import InvalidPage, Page
+from django.db import connections
+from django.db.models import IntegerField
+from django.db.models.expressions import RawSQL
+from django.utils import six
+from django.utils.encoding import force_bytes
+
+
+class ResultCount(int):
+    """
+    An `int` that knows whether it is an approximation. Can be used anywhere
+    an exact count would be.
+    """
+
+    def __new__(cls, value, approximate=False):
+        obj = super(ResultCount, cls).__new__(cls, value)
+        obj.approximate = approximate
+        return obj
+
+
+class WindowCount(RawSQL):
+    """
+    Annotates each row with the total number of rows matched by the query.
+    Requires database support for window functions (PostgreSQL, MySQL 8+,
+    or SQLite 3.25+).
+    """
+
+    def __init__(self):
+        super(WindowCount, self).__init__(
+            'COUNT(*) OVER ()', (), output_field=IntegerField())
+
+    def get_group_by_cols(self, *args, **kwargs):
+        # Must never be added to GROUP BY when the queryset is aggregated
+        return []
+
+
+class ExactCountHelper(object):
+    """
+    Counts results for `IndexView` using a regular `COUNT(*)` query, which
+    is what modeladmin does by default
+    """
+
+    def __init__(self, view, request):
+        self.view = view
+        self.request = request
+        self.model_admin = view.model_admin
+        self.approximate_count_threshold = (
+            self.model_admin.approximate_count_threshold)
+
+    def make_count(self, value, approximate=False):
+        # Small numbers are never labelled as approximate, because they're
+        # likely to be accurate, or cheap to count exactly
+        return ResultCount(
+            value,
+            approximate and value >= self.approximate_count_threshold
+        )
+
+    def get_exact_count(self, queryset):
+        return self.make_count(queryset.count())
+
+    def get_count(self, queryset):
+        """
+        Return a `ResultCount` for `queryset`
+        """
+        return self.get_exact_count(queryset)
+
+    def paginate(self, paginator, page_number):
+        """
+        Return a tuple containing the requested page from `paginator` (a
+        Django `Paginator`), and a `ResultCount` for the full result set.
+        Invalid page numbers result in the first page being returned.
+        """
+        result_count = self.get_count(paginator.object_list)
+        # Prevent the paginator from running its own COUNT(*)
+        paginator.count = int(result_count)
+        try:
+            page_obj = paginator.page(page_number)
+        except InvalidPage:
+            page_obj = paginator.page(1)
+        return page_obj, result_count
+
+
+class WindowCountHelper(ExactCountHelper):
+    """
+    Folds the count into the query that fetches the current page, using a
+    `COUNT(*) OVER ()` window function, so that only a single query is needed.
+    Falls back to an exact count for `DISTINCT` querysets (where the window
+    would be evaluated before duplicates are removed), and for counts needed
+    separately from a page of results (e.g. for keyset pagination).
+    """
+    count_attname = '_waddleadmin_result_count'
+
+    def paginate(self, paginator, page_number):
+        queryset = paginator.object_list
+        if queryset.query.distinct:
+            return super(WindowCountHelper, self).paginate(
+                paginator, page_number)
+
+        queryset = queryset.annotate(**{self.count_attname: WindowCount()})
+        bottom = (page_number - 1) * paginator.per_page
+        if bottom < 0:
+            page_number, bottom = 1, 0
+        object_list = list(queryset[bottom:bottom + paginator.per_page])
+
+        if object_list:
+            value = getattr(object_list[0], self.count_attname)
+        elif page_number == 1:
+            value = 0
+        else:
+            # Page out of range, so the count is unknown
+            return super(WindowCountHelper, self).paginate(paginator, 1)
+
+        paginator.count = value
+        return Page(object_list, page_number, paginator), self.make_count(value)
+
+
+class CachedCountHelper(ExactCountHelper):
+    """
+    Caches counts for `cache_timeout` seconds. For a further
+    `stale_timeout` seconds, the expired value continues to be used while a
+    fresh count is calculated in a background thread, so that no request has
+    to wait for a slow count unless nothing is cached at all. Counts from the
+    cache are labelled as approximate (where above the threshold).
+    """
+    cache_alias = 'default'
+    cache_timeout = 60
+    stale_timeout = 600
+    lock_timeout = 60
+    key_prefix = 'waddleadmin:count'
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_cache_key(self, queryset):
+        sql, params = queryset.order_by().query.sql_with_params()
+        digest = hashlib.md5(force_bytes(repr((sql, params)))).hexdigest()
+        return '%s:%s' % (self.key_prefix, digest)
+
+    def get_count(self, queryset):
+        key = self.get_cache_key(queryset)
+        cached = self.cache.get(key)
+        if cached is None:
+            return self.refresh(queryset, key)
+        value, timestamp = cached
+        if time.time() - timestamp >= self.cache_timeout:
+            self.refresh_in_background(queryset, key)
+        return self.make_count(value, approximate=True)
+
+    def refresh(self, queryset, key):
+        value = queryset.count()
+        self.cache.set(
+            key, (value, time.time()), self.cache_timeout + self.stale_timeout)
+        return self.make_count(value)
+
+    def refresh_in_background(self, queryset, key):
+        # Only one refresh should be in progress for each key
+        lock_key = key + ':lock'
+        if not self.cache.add(lock_key, 1, self.lock_timeout):
+            return
+        thread = threading.Thread(
+            target=self._refresh_and_unlock, args=(queryset, key, lock_key))
+        thread.daemon = True
+        thread.start()
+
+    def _refresh_and_unlock(self, queryset, key, lock_key):
+        try:
+            self.refresh(queryset, key)
+        finally:
+            self.cache.delete(lock_key)
+            # Threads get their own connection, which must be closed
+            connections[queryset.db].close()
+
+
+class EstimatedCountHelper(ExactCountHelper):
+    """
+    Uses the query planner's row estimate instead of counting. Estimates
+    below the threshold are replaced with an exact count, so small result
+    sets are always counted accurately. Only PostgreSQL is supported; on
+    other databases, exact counts are used.
+    """
+
+    def get_count(self, queryset):
+        estimate = self.get_estimate(queryset)
+        if estimate is None or estimate < self.approximate_count_threshold:
+            return self.get_exact_count(queryset)
+        return self.make_count(estimate, approximate=True)
+
+    def get_estimate(self, queryset):
+        """
+        Return the number of rows the database expects `queryset` to return,
+        or `None` if no estimate is available
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, six.string_types):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,138 @@
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+
+from django.contrib.admin.filters import DateFieldListFilter, FieldListFilter
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+from django.http import QueryDict
+from django.utils.encoding import force_bytes, force_text
+from django.utils.html import format_html
+
+
+class FacetedListFilter(object):
+    """
+    Wraps a list filter 'spec', adding the number of matching results to the
+    display value of each choice
+    """
+
+    def __init__(self, spec, facet_helper):
+        self.spec = spec
+        self.facet_helper = facet_helper
+
+    def __getattr__(self, name):
+        return getattr(self.spec, name)
+
+    def choices(self, view):
+        counts = self.facet_helper.get_counts(self.spec)
+        for choice in self.spec.choices(view):
+            if counts is not None:
+                count = self.facet_helper.get_count_for_choice(
+                    self.spec, choice, counts)
+                if count is not None:
+                    choice = dict(choice, display=format_html(
+                        '{} ({})', choice['display'], count))
+            yield choice
+
+
+class FacetHelper(object):
+    """
+    Calculates counts for `list_filter` choices in `IndexView`, using a
+    single grouped query for each filter. Counts for each filter reflect all
+    other active filters and the search term, and are cached briefly, keyed
+    by the query. Facets with more than `list_filter_facets_limit` distinct
+    values are not counted, and date filters are never counted.
+    """
+    cache_alias = 'default'
+    key_prefix = 'waddleadmin:facets'
+    count_attname = 'facet_count'
+
+    def __init__(self, view, request):
+        self.view = view
+        self.request = request
+        self.model_admin = view.model_admin
+        self.limit = self.model_admin.list_filter_facets_limit
+        self.cache_timeout = self.model_admin.list_filter_facets_cache_timeout
+        self._counts = {}
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def supports_filter(self, spec):
+        return (
+            isinstance(spec, FieldListFilter) and
+            not isinstance(spec, DateFieldListFilter) and
+            bool(spec.field_path)
+        )
+
+    def wrap_filter_specs(self, filter_specs):
+        return [
+            FacetedListFilter(spec, self) if self.supports_filter(spec)
+            else spec for spec in filter_specs
+        ]
+
+    def get_facet_queryset(self, spec):
+        field_path = spec.field_path
+        qs = self.view.get_facet_queryset(spec).order_by()
+        return qs.values(field_path).annotate(**{
+            self.count_attname: Count('pk', distinct=True)
+        }).values_list(field_path, self.count_attname)
+
+    def get_cache_key(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.md5(force_bytes(repr((sql, params)))).hexdigest()
+        return '%s:%s' % (self.key_prefix, digest)
+
+    def get_counts(self, spec):
+        """
+        Return a dictionary of counts for `spec`, keyed by (normalized)
+        value, or `None` if there are too many values to count
+        """
+        if spec in self._counts:
+            return self._counts[spec]
+        queryset = self.get_facet_queryset(spec)
+        key = self.get_cache_key(queryset)
+        # The cached value is wrapped in a tuple, so that `None` (indicating
+        # that the limit was exceeded) can be cached too
+        cached = self.cache.get(key)
+        if cached is not None:
+            counts = cached[0]
+        else:
+            rows = list(queryset[:self.limit + 1])
+            counts = None
+            if len(rows) <= self.limit:
+                counts = dict(
+                    (self.normalize_value(spec, value), count)
+                    for value, count in rows
+                )
+            self.cache.set(key, (counts, ), self.cache_timeout)
+        self._counts[spec] = counts
+        return counts
+
+    def normalize_value(self, spec, value):
+        # Values from the database and values from querystrings must be
+        # converted to the same type (and then to text) to be compared
+        if value is None:
+            return None
+        field = getattr(spec.field, 'target_field', spec.field)
+        try:
+            value = field.to_python(value)
+        except ValidationError:
+            pass
+        return force_text(value)
+
+    def get_count_for_choice(self, spec, choice, counts):
+        """
+        Return the number of results that `choice` (a dictionary yielded by
+        `spec.choices()`) will match, or `None` if it can't be determined
+        """
+        params = QueryDict(choice['query_string'].lstrip('?'))
+        for param in spec.expected_parameters():
+            if param not in params:
+                continue
+            if param.endswith('__isnull'):
+                return counts.get(None, 0)
+            return counts.get(self.normalize_value(spec, params[param]), 0)
+        return None
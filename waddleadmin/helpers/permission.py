@@ -1,5 +1,6 @@
 from __future__ import absolute_import, unicode_literals
 
+import copy
 import warnings
 
 from django.contrib.auth import get_permission_codename
@@ -9,6 +10,9 @@ from django.utils.functional import cached_property
 
 from wagtail.wagtailcore.models import Page, UserPagePermissionsProxy
 
+from ..utils.instrumentation import instrument
+from ..utils.pages import get_parent_page
+
 
 class BasePermissionHelper(object):
 
@@ -17,6 +21,16 @@ class BasePermissionHelper(object):
         self.opts = model._meta
         self.inspect_view_enabled = inspect_view_enabled
 
+    def for_request(self, request):
+        """
+        Return a version of this helper to use while handling `request`.
+        Helpers that cache values which are only valid for one request
+        (e.g. the user's page permissions) return a copy of themselves that
+        can store them on `request`.
+        """
+        return self
+
+    @instrument('permission.user_can')
     def user_can(self, user, codename, obj=None):
         """Looks for a method to check whether `user` has sufficient
         permissions to perform the action `codename` (e.g. 'create', 'edit',
@@ -138,11 +152,17 @@ class PermissionHelper(BasePermissionHelper):
             term = codename
         return get_permission_codename(term, self.opts)
 
+    @cached_property
+    def model_permission_codenames(self):
+        # Fetched once, rather than for every object checked when listing
+        return list(
+            self.get_all_model_permissions().values_list('codename', flat=True)
+        )
+
     @cached_property
     def inspect_permission_exists(self):
-        return self.get_all_model_permissions().filter(
-            codename__exact=self.get_perm_codename('inspect')
-        ).exists()
+        codename = self.get_perm_codename('inspect')
+        return codename in self.model_permission_codenames
 
     def user_has_specific_permission(self, user, perm_codename):
         """
@@ -171,8 +191,8 @@ class PermissionHelper(BasePermissionHelper):
         Return a boolean to indicate whether `user` has any model-wide
         permissions
         """
-        for perm in self.get_all_model_permissions().values('codename'):
-            if self.user_has_specific_permission(user, perm['codename']):
+        for perm_codename in self.model_permission_codenames:
+            if self.user_has_specific_permission(user, perm_codename):
                 return True
         return False
 
@@ -208,6 +228,8 @@ class PagePermissionHelper(BasePermissionHelper):
     relevant. We generally need to determine permissions on an
     object-specific basis.
     """
+    # Set on copies returned by `for_request()`
+    request = None
 
     def do_generic_permission_check(self, user, codename, obj=None):
         """If `obj` isn't supplied, return `False`, because model-wide
@@ -221,7 +243,7 @@ class PagePermissionHelper(BasePermissionHelper):
             # supported
             return False
 
-        perms = obj.permissions_for_user(user)
+        perms = self.get_permission_tester(user, obj)
         # Attempt to find a `PagePermissionTester` method / attribute with
         # a relevant name to test with
         attr_name = 'can_%s' % codename
@@ -246,6 +268,29 @@ class PagePermissionHelper(BasePermissionHelper):
             )
         return False
 
+    def for_request(self, request):
+        helper = copy.copy(self)
+        helper.request = request
+        return helper
+
+    def get_user_permissions_proxy(self, user):
+        """
+        Return a `UserPagePermissionsProxy` for `user`. For helpers returned
+        by `for_request()`, the same one is returned for each call while
+        handling the request, so that the user's page permissions are only
+        fetched once, instead of once for every page checked.
+        """
+        if self.request is None:
+            return UserPagePermissionsProxy(user)
+        proxies = self.request.__dict__.setdefault(
+            '_waddleadmin_page_permissions', {})
+        if user.pk not in proxies:
+            proxies[user.pk] = UserPagePermissionsProxy(user)
+        return proxies[user.pk]
+
+    def get_permission_tester(self, user, page):
+        return self.get_user_permissions_proxy(user).for_page(page)
+
     def get_valid_parent_pages(self, user):
         """
         Identifies possible parent pages for the current user by first looking
@@ -268,7 +313,7 @@ class PagePermissionHelper(BasePermissionHelper):
             pages_where_user_can_add = Page.objects.all()
         else:
             pages_where_user_can_add = Page.objects.none()
-            user_perms = UserPagePermissionsProxy(user)
+            user_perms = self.get_user_permissions_proxy(user)
 
             for perm in user_perms.permissions.filter(permission_type='add'):
                 # user has add permission on any subpage of perm.page
@@ -298,5 +343,6 @@ class PagePermissionHelper(BasePermissionHelper):
         return self.get_valid_parent_pages(user).exists()
 
     def user_can_copy_obj(self, user, obj):
-        parent_page = obj.get_parent()
-        return parent_page.permissions_for_user(user).can_publish_subpage()
+        parent_page = get_parent_page(obj)
+        return self.get_permission_tester(
+            user, parent_page).can_publish_subpage()
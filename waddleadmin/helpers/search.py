@@ -0,0 +1,318 @@
+from __future__ import absolute_import, unicode_literals
+
+import operator
+from functools import reduce
+
+from django.contrib.admin.utils import lookup_needs_distinct
+from django.db import connections
+from django.db.backends.utils import truncate_name
+from django.db.models import CharField, Q, TextField
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.fields import FieldDoesNotExist
+from django.utils import six
+from wagtail.wagtailsearch.backends import get_search_backend
+
+
+class ORMSearchHelper(object):
+    """
+    Searches `IndexView` results using `icontains` lookups for each field in
+    `ModelAdmin.search_fields`, which is what modeladmin does by default
+    """
+
+    # Set to `True` if only some of the matching results can be shown
+    results_truncated = False
+
+    def __init__(self, view, request):
+        self.view = view
+        self.request = request
+        self.model_admin = view.model_admin
+        self.model = self.model_admin.model
+        self.opts = self.model._meta
+
+    def get_search_fields(self):
+        return self.view.search_fields
+
+    def get_search_results(self, queryset, search_term):
+        """
+        Returns a tuple containing a queryset to implement the search,
+        and a boolean indicating if the results may contain duplicates.
+        """
+        search_fields = self.get_search_fields()
+        if not (search_fields and search_term):
+            return queryset, False
+
+        orm_lookups = ['%s__icontains' % str(search_field)
+                       for search_field in search_fields]
+        for bit in search_term.split():
+            or_queries = [Q(**{orm_lookup: bit})
+                          for orm_lookup in orm_lookups]
+            queryset = queryset.filter(reduce(operator.or_, or_queries))
+        use_distinct = any(
+            lookup_needs_distinct(self.opts, search_spec)
+            for search_spec in orm_lookups
+        )
+        return queryset, use_distinct
+
+
+class WagtailSearchHelper(ORMSearchHelper):
+    """
+    Searches `IndexView` results using Wagtail's search backend, for models
+    that are `index.Indexed` (when `ModelAdmin.search_mode` is 'wagtail').
+    The backend is asked for the primary keys of the most relevant matches
+    (up to `ModelAdmin.search_results_limit`, or all of them if that is
+    `None`), which are then used to filter the queryset, so that filters and
+    ordering are applied by the database as normal, and the page of results
+    is fetched in a single query. If there were more matches than the limit,
+    `results_truncated` is set, so that the view can say so.
+    """
+    search_backend = 'default'
+
+    def __init__(self, view, request):
+        super(WagtailSearchHelper, self).__init__(view, request)
+        self.limit = self.model_admin.search_results_limit
+        self._pks = {}
+
+    def get_search_queryset(self):
+        # Only the primary key is needed from the results
+        return self.model._default_manager.only('pk')
+
+    def get_matching_pks(self, search_term):
+        # Results are reused for querysets built for other purposes
+        # (e.g. facet counts) during the same request
+        if search_term not in self._pks:
+            backend = get_search_backend(self.search_backend)
+            results = backend.search(search_term, self.get_search_queryset())
+            if self.limit is not None:
+                # One extra result shows whether any were left out
+                results = results[:self.limit + 1]
+            pks = [obj.pk for obj in results]
+            if self.limit is not None and len(pks) > self.limit:
+                self.results_truncated = True
+                pks = pks[:self.limit]
+            self._pks[search_term] = pks
+        return self._pks[search_term]
+
+    def filter_by_pks(self, queryset, pks):
+        """
+        Return a copy of `queryset` filtered to objects with primary keys in
+        `pks`. Integer keys are written into the SQL directly, as there can
+        be more of them than the database allows query parameters (999 on
+        SQLite)
+        """
+        if pks and all(isinstance(pk, six.integer_types) for pk in pks):
+            qn = connections[queryset.db].ops.quote_name
+            where = '%s.%s IN (%s)' % (
+                qn(self.opts.db_table), qn(self.opts.pk.column),
+                ', '.join('%d' % pk for pk in pks)
+            )
+            return queryset.extra(where=[where])
+        return queryset.filter(pk__in=pks)
+
+    def get_search_results(self, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        pks = self.get_matching_pks(search_term)
+        return self.filter_by_pks(queryset, pks), False
+
+
+class DatabaseSearchHelper(ORMSearchHelper):
+    """
+    Searches `IndexView` results using the database's own full-text search
+    features, for models that aren't `index.Indexed`:
+
+    - On PostgreSQL, search fields are combined into a `SearchVector`, and
+      matched against the search terms (as prefixes). If
+      `trigram_similarity` is set, values with a trigram similarity above
+      that threshold will also match, to allow for typos.
+    - On SQLite, an FTS5 virtual table is used, which is kept up-to-date by
+      triggers.
+
+    The `create_search_indexes` management command must be run to create
+    the necessary extension and indexes (PostgreSQL) or virtual tables and
+    triggers (SQLite). Only text fields on the model itself are supported;
+    if any search fields span relationships, or if the database isn't
+    supported, `icontains` lookups are used as normal.
+    """
+    search_config = 'english'
+    trigram_similarity = 0.3
+
+    @classmethod
+    def get_indexed_fields(cls, model, search_fields):
+        """
+        Return a list of fields from `model` for the field names in
+        `search_fields`, or `None` if full-text search can't be used for
+        them
+        """
+        fields = []
+        for name in search_fields:
+            if LOOKUP_SEP in name:
+                return None
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not isinstance(field, (CharField, TextField)):
+                return None
+            fields.append(field)
+        return fields or None
+
+    @classmethod
+    def get_fts_table_name(cls, model):
+        return 'waddleadmin_fts_%s' % model._meta.db_table
+
+    @classmethod
+    def get_index_sql(cls, model_admin, connection):
+        """
+        Return a list of SQL statements that create the indexes or tables
+        needed to search `model_admin.model` on `connection`
+        """
+        model = model_admin.model
+        fields = cls.get_indexed_fields(model, model_admin.search_fields)
+        if not fields:
+            return []
+        if connection.vendor == 'postgresql':
+            return cls.get_postgres_index_sql(model, fields, connection)
+        if connection.vendor == 'sqlite':
+            return cls.get_sqlite_index_sql(model, fields, connection)
+        return []
+
+    @classmethod
+    def get_postgres_index_sql(cls, model, fields, connection):
+        qn = connection.ops.quote_name
+        table = model._meta.db_table
+        max_length = connection.ops.max_name_length()
+        # Must match the SQL `SearchVector` generates, to be used
+        vector_sql = "to_tsvector('%s'::regconfig, %s)" % (
+            cls.search_config, " || ' ' || ".join(
+                "COALESCE(%s, '')" % qn(field.column) for field in fields
+            )
+        )
+        statements = [
+            'CREATE INDEX IF NOT EXISTS %s ON %s USING gin (%s)' % (
+                qn(truncate_name('%s_fts' % table, max_length)), qn(table),
+                vector_sql
+            ),
+        ]
+        if cls.trigram_similarity:
+            statements.insert(0, 'CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for field in fields:
+                statements.append(
+                    'CREATE INDEX IF NOT EXISTS %s ON %s USING gin '
+                    '(%s gin_trgm_ops)' % (
+                        qn(truncate_name(
+                            '%s_%s_trgm' % (table, field.column), max_length)),
+                        qn(table), qn(field.column)
+                    )
+                )
+        return statements
+
+    @classmethod
+    def get_sqlite_index_sql(cls, model, fields, connection):
+        # The virtual table is always rebuilt, in case `search_fields` has
+        # changed since it was created
+        qn = connection.ops.quote_name
+        table = model._meta.db_table
+        fts_table = cls.get_fts_table_name(model)
+        pk_column = model._meta.pk.column
+        columns = ', '.join(qn(field.column) for field in fields)
+
+        def values(prefix):
+            return ', '.join(
+                '%s.%s' % (prefix, qn(field.column)) for field in fields)
+
+        statements = [
+            'DROP TABLE IF EXISTS %s' % qn(fts_table),
+            'CREATE VIRTUAL TABLE %s USING fts5(pk UNINDEXED, %s)' % (
+                qn(fts_table), columns),
+            'INSERT INTO %s (pk, %s) SELECT %s, %s FROM %s' % (
+                qn(fts_table), columns, qn(pk_column), columns, qn(table)),
+        ]
+        insert_sql = 'INSERT INTO %s (pk, %s) VALUES (new.%s, %s);' % (
+            qn(fts_table), columns, qn(pk_column), values('new'))
+        delete_sql = 'DELETE FROM %s WHERE pk = old.%s;' % (
+            qn(fts_table), qn(pk_column))
+        triggers = (
+            ('ai', 'INSERT', insert_sql),
+            ('ad', 'DELETE', delete_sql),
+            ('au', 'UPDATE', delete_sql + ' ' + insert_sql),
+        )
+        for suffix, event, body in triggers:
+            trigger = qn('%s_%s' % (fts_table, suffix))
+            statements.append('DROP TRIGGER IF EXISTS %s' % trigger)
+            statements.append(
+                'CREATE TRIGGER %s AFTER %s ON %s BEGIN %s END' % (
+                    trigger, event, qn(table), body)
+            )
+        return statements
+
+    def get_search_results(self, queryset, search_term):
+        fields = self.get_indexed_fields(
+            self.model, self.get_search_fields() or ())
+        bits = search_term.split()
+        if fields and bits:
+            connection = connections[queryset.db]
+            if connection.vendor == 'postgresql':
+                matching = self.get_postgres_matches(fields, bits)
+                return queryset.filter(pk__in=matching), False
+            if connection.vendor == 'sqlite':
+                filtered = self.filter_sqlite_matches(
+                    queryset, bits, connection)
+                if filtered is not None:
+                    return filtered, False
+        return super(DatabaseSearchHelper, self).get_search_results(
+            queryset, search_term)
+
+    def get_postgres_matches(self, fields, bits):
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchVector, TrigramSimilarity)
+        from django.db.models.functions import Greatest
+
+        class PrefixSearchQuery(SearchQuery):
+            # `SearchQuery` only supports `plainto_tsquery()`, which doesn't
+            # allow prefix matching
+            def as_sql(self, compiler, connection):
+                sql, params = super(PrefixSearchQuery, self).as_sql(
+                    compiler, connection)
+                return sql.replace('plainto_tsquery', 'to_tsquery'), params
+
+        tsquery = ' & '.join(
+            "'%s':*" % bit.replace('\\', '\\\\').replace("'", "''")
+            for bit in bits
+        )
+        names = [field.name for field in fields]
+        qs = self.model._default_manager.annotate(
+            waddleadmin_search=SearchVector(*names, config=self.search_config)
+        )
+        condition = Q(waddleadmin_search=PrefixSearchQuery(
+            tsquery, config=self.search_config))
+        if self.trigram_similarity:
+            term = ' '.join(bits)
+            similarities = [TrigramSimilarity(name, term) for name in names]
+            if len(similarities) > 1:
+                similarity = Greatest(*similarities)
+            else:
+                similarity = similarities[0]
+            qs = qs.annotate(waddleadmin_similarity=similarity)
+            condition |= Q(waddleadmin_similarity__gt=self.trigram_similarity)
+        return qs.filter(condition).values('pk')
+
+    def filter_sqlite_matches(self, queryset, bits, connection):
+        """
+        Return a copy of `queryset` filtered to rows matching `bits` in the
+        FTS5 table, or `None` if the table doesn't exist. The match is done
+        in a subquery added with `extra()`, because SQLite treats the
+        parenthesised subquery Django generates for `pk__in=RawSQL(...)` as
+        a scalar one (matching only the first row).
+        """
+        qn = connection.ops.quote_name
+        fts_table = self.get_fts_table_name(self.model)
+        with connection.cursor() as cursor:
+            if fts_table not in connection.introspection.table_names(cursor):
+                # `create_search_indexes` hasn't been run
+                return None
+        match = ' '.join('"%s"*' % bit.replace('"', '""') for bit in bits)
+        where = '%s.%s IN (SELECT pk FROM %s WHERE %s MATCH %%s)' % (
+            qn(self.opts.db_table), qn(self.opts.pk.column),
+            qn(fts_table), qn(fts_table)
+        )
+        return queryset.extra(where=[where], params=[match])
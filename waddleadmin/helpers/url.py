@@ -9,14 +9,17 @@ from wagtail.contrib.modeladmin.helpers import (
     PageAdminURLHelper as WagtailPageAdminURLHelper
 )
 
+from ..utils.instrumentation import instrument
+
 wagtailadmin_page_actions = (
     'add', 'edit', 'delete', 'copy', 'move', 'preview', 'view_draft',
-    'unpublish', 'revisions_index', 'add_subpage'
+    'unpublish', 'add_subpage'
 )
 
 
 class AdminURLHelper(WagtailAdminURLHelper):
 
+    @instrument('url.get_action_url_for_obj')
     def get_action_url_for_obj(self, action, obj, *args):
         if obj is None:
             return self.get_action_url(action, *args)
@@ -26,6 +29,17 @@ class AdminURLHelper(WagtailAdminURLHelper):
 
 class PageAdminURLHelper(WagtailPageAdminURLHelper, AdminURLHelper):
 
+    def _get_object_specific_action_url_pattern(self, action):
+        if action == 'revisions_compare':
+            return (
+                r'^%s/%s/%s/(?P<instance_pk>[-\w]+)/'
+                r'(?P<revision_id_a>\d+)/(?P<revision_id_b>\d+)/$' % (
+                    self.opts.app_label, self.opts.model_name, action)
+            )
+        return super(
+            PageAdminURLHelper, self
+        )._get_object_specific_action_url_pattern(action)
+
     def get_action_url(self, action, *args, **kwargs):
         # Note: 'add' is used below, because that's the terminology used by
         # wagtail's page editing urls / views. For pages, if the action is
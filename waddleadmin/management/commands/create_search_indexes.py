@@ -0,0 +1,58 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from waddleadmin.helpers.search import DatabaseSearchHelper
+from waddleadmin.utils.registry import get_registered_modeladmins
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the database indexes (PostgreSQL) or full-text search tables "
+        "(SQLite) needed to search models for registered ModelAdmin classes "
+        "using search_mode = 'database'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help="The database to create indexes in. Defaults to 'default'.")
+
+        parser.add_argument(
+            '--dry-run', action='store_true', dest='dry_run', default=False,
+            help="Print the SQL statements instead of running them.")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        done = set()
+        for model_admin in get_registered_modeladmins():
+            helper_class = model_admin.get_search_helper_class()
+            if not issubclass(helper_class, DatabaseSearchHelper):
+                continue
+            model = model_admin.model
+            if model in done:
+                continue
+            done.add(model)
+
+            statements = helper_class.get_index_sql(model_admin, connection)
+            if not statements:
+                self.stderr.write(
+                    "Skipping %s: search_fields are not supported for "
+                    "full-text search on %s" % (
+                        model._meta.label, connection.vendor))
+                continue
+
+            if options['dry_run']:
+                for sql in statements:
+                    self.stdout.write('%s;' % sql)
+                continue
+
+            with transaction.atomic(using=using):
+                with connection.cursor() as cursor:
+                    for sql in statements:
+                        cursor.execute(sql)
+            if options['verbosity'] >= 1:
+                self.stdout.write("Created search indexes for %s" % (
+                    model._meta.label))
@@ -0,0 +1,118 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+import platform
+from collections import OrderedDict
+
+import django
+import wagtail
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+import waddleadmin
+from waddleadmin.utils.profiling import (
+    get_module_names, measure_import_time, measure_time,
+    profile_modeladmin_class)
+from waddleadmin.utils.registry import get_registered_modeladmins
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the time and memory taken to create each registered "
+        "ModelAdmin and register its URLs, and the time taken to import each "
+        "waddleadmin module, and outputs the results as JSON, so that they "
+        "can be compared between releases."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help="The number of times to create each ModelAdmin. The fastest "
+                 "times are reported. Defaults to 5.")
+
+        parser.add_argument(
+            '--skip-imports', action='store_true', dest='skip_imports',
+            default=False,
+            help="Don't measure import times (each module is imported in a "
+                 "new Python process, which takes a while).")
+
+        parser.add_argument(
+            '--indent', type=int, default=2,
+            help="The indentation level for the JSON output. Defaults to 2.")
+
+        parser.add_argument(
+            '--output', '-o', dest='output',
+            help="A file to write the results to, instead of stdout.")
+
+    def get_environment(self):
+        return OrderedDict([
+            ('python', platform.python_version()),
+            ('django', django.get_version()),
+            ('wagtail', wagtail.__version__),
+            ('waddleadmin', waddleadmin.__version__),
+        ])
+
+    def profile_modeladmins(self, model_admins, repeat):
+        results = []
+        for model_admin in model_admins:
+            profiles = [
+                profile_modeladmin_class(
+                    type(model_admin), model_admin.parent)
+                for i in range(max(repeat, 1))
+            ]
+            # The fastest time, and the memory from the last run (memory
+            # doesn't vary between runs)
+            result = profiles[-1]
+            result['init_ms'] = min(p['init_ms'] for p in profiles)
+            result['urls_ms'] = min(p['urls_ms'] for p in profiles)
+            results.append(result)
+        return results
+
+    def get_totals(self, results):
+        totals = OrderedDict()
+        for key in (
+            'init_ms', 'init_bytes', 'urls_ms', 'urls_bytes', 'url_count'
+        ):
+            values = [result[key] for result in results]
+            if any(value is None for value in values):
+                totals[key] = None
+            else:
+                totals[key] = round(sum(values), 3)
+        return totals
+
+    def profile_imports(self):
+        results = []
+        for name in get_module_names():
+            elapsed, module_count = measure_import_time(
+                name, settings.SETTINGS_MODULE)
+            results.append(OrderedDict([
+                ('module', name),
+                ('ms', round(elapsed, 3)),
+                ('modules_imported', module_count),
+            ]))
+        return results
+
+    def handle(self, *args, **options):
+        # Loading Wagtail hooks imports every `wagtail_hooks` module, and
+        # creates and registers each `ModelAdmin`
+        model_admins, hooks_ms = measure_time(get_registered_modeladmins)
+        results = self.profile_modeladmins(model_admins, options['repeat'])
+
+        report = OrderedDict([
+            ('environment', self.get_environment()),
+            ('hooks_ms', round(hooks_ms, 3)),
+            ('modeladmin_count', len(results)),
+            ('totals', self.get_totals(results)),
+            ('modeladmins', results),
+        ])
+        if not options['skip_imports']:
+            report['imports'] = self.profile_imports()
+
+        output = json.dumps(report, indent=options['indent'] or None)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            if options['verbosity'] >= 1:
+                self.stderr.write("Results written to %s" % options['output'])
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,96 @@
+from __future__ import absolute_import, unicode_literals
+
+import logging
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from .utils.instrumentation import CallRecorder, get_server_timing_header
+from .utils.queries import (
+    QueryBudgetExceeded, QueryRecorder, check_query_budget)
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    """
+    Records the database queries made while handling each request for a
+    `ModelAdmin` action, and, if the action has a query budget (see
+    `ModelAdmin.get_query_budget()`), checks that it wasn't exceeded.
+    Queries made by middleware listed before this one aren't counted, and
+    for streaming responses, queries are counted until all content has been
+    streamed.
+
+    If the budget is exceeded, the queries made (and where they were made
+    from) are logged as a warning, or `QueryBudgetExceeded` is raised if the
+    `WADDLEADMIN_QUERY_BUDGET_RAISE` setting is `True`. Capturing stacks
+    for every query is slow, so this is intended for development and
+    testing environments.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'is_model_action_view', False):
+            request._waddleadmin_query_recorder = QueryRecorder().__enter__()
+
+    def process_response(self, request, response):
+        recorder = getattr(request, '_waddleadmin_query_recorder', None)
+        if recorder is None:
+            return response
+        del request._waddleadmin_query_recorder
+
+        if getattr(response, 'streaming', False):
+            response.streaming_content = self.stream_and_check(
+                request, recorder, response.streaming_content)
+            return response
+
+        recorder.__exit__(None, None, None)
+        self.check(request, recorder)
+        return response
+
+    def stream_and_check(self, request, recorder, streaming_content):
+        try:
+            for chunk in streaming_content:
+                yield chunk
+        finally:
+            recorder.__exit__(None, None, None)
+        self.check(request, recorder)
+
+    def check(self, request, recorder):
+        action = getattr(request, 'waddleadmin_action', None)
+        if action is None:
+            return
+        try:
+            check_query_budget(action.model_admin, action.codename, recorder)
+        except QueryBudgetExceeded as e:
+            if getattr(settings, 'WADDLEADMIN_QUERY_BUDGET_RAISE', False):
+                raise
+            logger.warning('%s', e)
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """
+    Counts the calls made to instrumented `ModelAdmin` helper methods (e.g.
+    permission checks, button creation and URL reversal) while handling
+    each request, and the total time spent in each, and adds them to the
+    response as a 'Server-Timing' header, which most browsers display with
+    other timings for the request in their developer tools. Calls made
+    while streaming content happen after the header is sent, so aren't
+    included.
+    """
+
+    def process_request(self, request):
+        request._waddleadmin_call_recorder = CallRecorder().__enter__()
+
+    def process_response(self, request, response):
+        recorder = getattr(request, '_waddleadmin_call_recorder', None)
+        if recorder is None:
+            return response
+        del request._waddleadmin_call_recorder
+        recorder.__exit__(None, None, None)
+
+        if recorder.stats:
+            value = get_server_timing_header(recorder)
+            if response.has_header('Server-Timing'):
+                value = '%s, %s' % (response['Server-Timing'], value)
+            response['Server-Timing'] = value
+        return response
@@ -0,0 +1,182 @@
+from __future__ import absolute_import, unicode_literals
+
+import threading
+import time
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
+
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.forms.utils import flatatt
+from django.utils.safestring import mark_safe
+from wagtail.contrib.modeladmin.mixins import (
+    ThumbnailMixin as WagtailThumbnailMixin)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Filter specs to generate renditions for when images are saved, added to
+# by `ThumbnailMixin` classes with `thumb_pregenerate_on_save = True`
+pregenerate_filter_specs = set()
+
+
+def get_rendition_pool(processes=4):
+    """
+    Return a process-wide pool of threads for generating renditions. Only
+    the value of `processes` from the first call is used.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(processes)
+    return _pool
+
+
+def generate_rendition(image, filter_spec):
+    """
+    Return a rendition of `image` using `filter_spec`, generating it if
+    necessary. Intended to be run in a pool thread, so closes the thread's
+    database connection once done.
+    """
+    from wagtail.wagtailimages.shortcuts import get_rendition_or_not_found
+    try:
+        return get_rendition_or_not_found(image, filter_spec)
+    finally:
+        connection.close()
+
+
+def _pregenerate_renditions(sender, instance, **kwargs):
+    if kwargs.get('raw') or not pregenerate_filter_specs:
+        return
+    specs = list(pregenerate_filter_specs)
+
+    def submit():
+        pool = get_rendition_pool()
+        for spec in specs:
+            pool.apply_async(generate_rendition, (instance, spec))
+    transaction.on_commit(submit)
+
+
+class ThumbnailMixin(WagtailThumbnailMixin):
+    """
+    A version of modeladmin's `ThumbnailMixin` that avoids fetching (and
+    possibly generating) a rendition for each row individually in
+    `IndexView`. Renditions for the whole page of results are fetched in a
+    single query, and any that don't exist yet are generated concurrently,
+    using a pool of `thumb_generation_threads` threads (waiting up to
+    `thumb_generation_timeout` seconds for all of them). If
+    `thumb_generate_in_background` is `True`, the page is rendered without
+    waiting for them (using `thumb_default` in their place), and if
+    `thumb_pregenerate_on_save` is `True`, renditions are generated in the
+    background whenever an image is saved.
+    """
+    thumb_generation_threads = 4
+    thumb_generation_timeout = 30
+    thumb_generate_in_background = False
+    thumb_pregenerate_on_save = False
+
+    def __init__(self, *args, **kwargs):
+        super(ThumbnailMixin, self).__init__(*args, **kwargs)
+        if self.thumb_pregenerate_on_save:
+            from wagtail.wagtailimages import get_image_model
+            pregenerate_filter_specs.add(self.thumb_image_filter_spec)
+            post_save.connect(
+                _pregenerate_renditions, sender=get_image_model(),
+                weak=False, dispatch_uid='waddleadmin_pregenerate_renditions')
+
+    def get_thumb_images(self, objects):
+        images = []
+        for obj in objects:
+            image = getattr(obj, self.thumb_image_field_name, None)
+            if image is not None and image not in images:
+                images.append(image)
+        return images
+
+    def prefetch_thumb_renditions(self, images):
+        """
+        Fetch existing renditions for `images` in a single query, and return
+        a dictionary of them, keyed by image pk. Images without a
+        rendition are not included.
+        """
+        from wagtail.wagtailimages.models import Filter
+        if not images:
+            return {}
+        spec = self.thumb_image_filter_spec
+        image_filter = Filter(spec=spec)
+        Rendition = images[0].get_rendition_model()
+        renditions = Rendition.objects.filter(
+            image__in=images, filter_spec=spec)
+        keys = dict(
+            (image.pk, image_filter.get_cache_key(image)) for image in images)
+        result = {}
+        for rendition in renditions:
+            if rendition.focal_point_key == keys.get(rendition.image_id):
+                result[rendition.image_id] = rendition
+        return result
+
+    def generate_thumb_renditions(self, images):
+        """
+        Generate renditions for `images` using the rendition pool, and
+        return a dictionary of them, keyed by image pk. If
+        `thumb_generate_in_background` is `True`, an empty dictionary is
+        returned immediately.
+        """
+        spec = self.thumb_image_filter_spec
+        if not images:
+            return {}
+        if len(images) == 1 and not self.thumb_generate_in_background:
+            # Not worth handing over to another thread
+            from wagtail.wagtailimages.shortcuts import (
+                get_rendition_or_not_found)
+            return {
+                images[0].pk: get_rendition_or_not_found(images[0], spec)}
+        pool = get_rendition_pool(self.thumb_generation_threads)
+        results = [
+            pool.apply_async(generate_rendition, (image, spec))
+            for image in images
+        ]
+        if self.thumb_generate_in_background:
+            return {}
+        # The timeout applies to the whole page, not each image
+        deadline = time.time() + self.thumb_generation_timeout
+        renditions = {}
+        for image, result in zip(images, results):
+            try:
+                renditions[image.pk] = result.get(
+                    max(deadline - time.time(), 0))
+            except TimeoutError:
+                # Generation continues, and `thumb_default` is used for now
+                pass
+        return renditions
+
+    def prepare_list_results(self, request, objects):
+        super(ThumbnailMixin, self).prepare_list_results(request, objects)
+        images = self.get_thumb_images(objects)
+        renditions = self.prefetch_thumb_renditions(images)
+        renditions.update(self.generate_thumb_renditions(
+            [image for image in images if image.pk not in renditions]))
+        # Rows can have separate instances of the same image
+        for obj in objects:
+            image = getattr(obj, self.thumb_image_field_name, None)
+            if image is not None:
+                image._waddleadmin_thumb_rendition = (
+                    self.thumb_image_filter_spec, renditions.get(image.pk))
+
+    def admin_thumb(self, obj):
+        image = getattr(obj, self.thumb_image_field_name, None)
+        prefetched = getattr(image, '_waddleadmin_thumb_rendition', None)
+        if prefetched is None or prefetched[0] != self.thumb_image_filter_spec:
+            # Not prepared by `prepare_list_results()`
+            return super(ThumbnailMixin, self).admin_thumb(obj)
+
+        rendition = prefetched[1]
+        src = rendition.url if rendition is not None else self.thumb_default
+        if not src:
+            return ''
+        img_attrs = {
+            'src': src,
+            'width': self.thumb_image_width,
+            'class': self.thumb_classname,
+        }
+        return mark_safe('<img{}>'.format(flatatt(img_attrs)))
+    admin_thumb.short_description = WagtailThumbnailMixin.thumb_col_header_text
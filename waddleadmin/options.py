@@ -1,18 +1,33 @@
 from __future__ import unicode_literals
 
 import re
+from collections import OrderedDict
 
 from django.core.exceptions import ImproperlyConfigured
+from django.db.models import BinaryField, Model, Prefetch, TextField
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.fields import FieldDoesNotExist
+from django.utils import six
 from django.utils.encoding import force_text
+from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
+from wagtail.contrib.modeladmin.mixins import ThumbnailMixin
 from wagtail.contrib.modeladmin.options import ModelAdmin as WagtailModelAdmin
+from wagtail.wagtailcore.models import Page
 
-from .actions import ( # noqa
+from .columns import AnnotatedColumn
+from .actions import (  # noqa
     ModelAction, DEFAULT_MODEL_ACTIONS, DEFAULT_PAGE_MODEL_ACTIONS
 )
-from .helpers.permission import PermissionHelper, PagePermissionHelper
-from .helpers.url import AdminURLHelper, PageAdminURLHelper
-from .helpers.button import GenericButtonHelper
+# Helper classes are looked up on the package when needed, so that each
+# helper module is only imported if used (see `waddleadmin.helpers`)
+from . import helpers
+from .utils.pages import (
+    get_specific_pages, prefetch_parent_pages, prefetch_relative_urls)
+from .utils.lru import LRUCache
+from .views import (
+    ChooseParentView, IndexView, InspectView, JSONIndexView,
+    RevisionsCompareView, RevisionsIndexView)
 
 
 class ModelAdmin(WagtailModelAdmin):
@@ -23,20 +38,106 @@ class ModelAdmin(WagtailModelAdmin):
     default_button_css_classes = ['button']
     create_button_css_classes = ['bicolor', 'icon', 'icon-plus']
     delete_button_css_classes = ['no']
+    index_view_class = IndexView
+    inspect_view_class = InspectView
+    inspect_view_related_limit = 20
+    json_index_view_class = JSONIndexView
+    choose_parent_view_class = ChooseParentView
+    choose_parent_per_page = 50
+    choose_parent_search_limit = 1000
+    revisions_index_view_class = RevisionsIndexView
+    revisions_compare_view_class = RevisionsCompareView
+    revisions_per_page = 50
+    revisions_diff_cache_size = 100
+    json_index_fields = None
+    json_index_action_names = ('inspect', 'edit', 'delete')
+    json_index_max_per_page = 500
+    list_prefetch_related = ()
+    list_only_fields = None
+    list_specific_results = True
+    keyset_pagination_enabled = False
+    count_helper_class = None
+    approximate_count_threshold = 10000
+    facet_helper_class = None
+    list_filter_facets = False
+    list_filter_facets_limit = 100
+    list_filter_facets_cache_timeout = 30
+    search_helper_class = None
+    search_mode = 'orm'
+    search_results_limit = 1000
+    cache_helper_class = None
+    index_view_cache_timeout = None
+    index_view_cache_alias = 'default'
+    index_view_streaming_enabled = False
+    index_view_streaming_chunk_size = 100
+    index_view_concurrent_queries = False
+    index_view_concurrent_queries_limit = 4
+    query_budgets = {}
+    row_hook_names = (
+        'get_extra_attrs_for_row',
+        'get_extra_class_names_for_field_col',
+        'get_extra_attrs_for_field_col',
+    )
 
     def __init__(self, parent=None):
-        super(ModelAdmin, self).__init__(parent)
+        # Replaces `WagtailModelAdmin.__init__()`, so that helpers and
+        # actions are only created when first used (see the properties
+        # below), which keeps start-up quick when there are many instances
+        if not self.model or not issubclass(self.model, Model):
+            raise ImproperlyConfigured(
+                u"The model attribute on your '%s' class must be set, and "
+                "must be a valid Django model." % self.__class__.__name__)
+        self.opts = self.model._meta
+        self.is_pagemodel = issubclass(self.model, Page)
+        self.parent = parent
 
-        # Just these extra attributes for reference
-        self.model_name_singular = force_text(self.opts.verbose_name)
-        self.model_name_plural = force_text(self.opts.verbose_name_plural)
+        # Populated as needed by `get_related_lookups_for_list_display()`,
+        # `get_list_only_fields()` and `get_revisions_diff_cache()`
+        self._related_lookups = {}
+        self._only_fields = {}
+        self._revisions_diff_cache = None
 
-        # Create ModelAction instances from definitions and store in private
-        # dict for easy access
-        self._actions = {}
-        for codename, action_kwargs in self.get_action_definitions():
-            action = ModelAction(codename, self, **action_kwargs)
-            self._actions[codename] = action
+        # Cached index content must be invalidated when any of the models
+        # it was rendered from change
+        if self.index_view_cache_timeout:
+            cache_helper_class = self.get_cache_helper_class()
+            for model in cache_helper_class.get_dependencies(self):
+                helpers.connect_signal_handlers(model)
+
+    @cached_property
+    def permission_helper(self):
+        return self.get_permission_helper_class()(
+            self.model, self.inspect_view_enabled)
+
+    @cached_property
+    def url_helper(self):
+        return self.get_url_helper_class()(self.model)
+
+    @cached_property
+    def model_name_singular(self):
+        return force_text(self.opts.verbose_name)
+
+    @cached_property
+    def model_name_plural(self):
+        return force_text(self.opts.verbose_name_plural)
+
+    @cached_property
+    def _actions(self):
+        # `ModelAction` instances for each definition, created when URLs are
+        # registered, or an action is first needed
+        actions = {}
+        for codename, action_kwargs in self.get_action_definitions().items():
+            actions[codename] = ModelAction(codename, self, **action_kwargs)
+        return actions
+
+    def get_templates(self, action='index'):
+        """
+        Adds a 'waddleadmin' template to the list of templates to try, ahead
+        of the default one from modeladmin
+        """
+        templates = super(ModelAdmin, self).get_templates(action)
+        templates.insert(-1, 'waddleadmin/%s.html' % action)
+        return templates
 
     def get_permission_helper_class(self):
         # No changes here, really! This is just to load our new versions of
@@ -44,8 +145,8 @@ class ModelAdmin(WagtailModelAdmin):
         if self.permission_helper_class:
             return self.permission_helper_class
         if self.is_pagemodel:
-            return PagePermissionHelper
-        return PermissionHelper
+            return helpers.PagePermissionHelper
+        return helpers.PermissionHelper
 
     def get_url_helper_class(self):
         # No changes here, really! This is just to load our new versions of
@@ -53,15 +154,76 @@ class ModelAdmin(WagtailModelAdmin):
         if self.url_helper_class:
             return self.url_helper_class
         if self.is_pagemodel:
-            return PageAdminURLHelper
-        return AdminURLHelper
+            return helpers.PageAdminURLHelper
+        return helpers.AdminURLHelper
 
     def get_button_helper_class(self):
         # Replaces the current two ButtonHelper classes with the new
         # GenericButtonHelper one
         if self.button_helper_class:
             return self.button_helper_class
-        return GenericButtonHelper
+        return helpers.GenericButtonHelper
+
+    def get_count_helper_class(self):
+        """
+        Return the class used by `IndexView` to count results. Use
+        `WindowCountHelper`, `CachedCountHelper` or `EstimatedCountHelper`
+        (from `waddleadmin.helpers`) to avoid a full `COUNT(*)` for each
+        request on very large tables
+        """
+        if self.count_helper_class:
+            return self.count_helper_class
+        return helpers.ExactCountHelper
+
+    def get_facet_helper_class(self):
+        """
+        Return the class used by `IndexView` to add counts to `list_filter`
+        choices, when `list_filter_facets` is `True`
+        """
+        if self.facet_helper_class:
+            return self.facet_helper_class
+        return helpers.FacetHelper
+
+    def get_search_helper_class(self):
+        """
+        Return the class used by `IndexView` to apply search terms. Unless
+        `search_helper_class` is set, this depends on `search_mode`, which
+        can be 'orm' (the default), 'wagtail' (for models that are
+        `index.Indexed`) or 'database'
+        """
+        if self.search_helper_class:
+            return self.search_helper_class
+        search_modes = {
+            'orm': helpers.ORMSearchHelper,
+            'wagtail': helpers.WagtailSearchHelper,
+            'database': helpers.DatabaseSearchHelper,
+        }
+        try:
+            return search_modes[self.search_mode]
+        except KeyError:
+            raise ImproperlyConfigured(
+                "'%s' is not a valid search_mode for %s. Valid values "
+                "are: %s" % (
+                    self.search_mode, self.__class__.__name__,
+                    ', '.join(sorted(search_modes))
+                )
+            )
+
+    def get_cache_helper_class(self):
+        """
+        Return the class used by `IndexView` to cache its content, when
+        `index_view_cache_timeout` is set
+        """
+        if self.cache_helper_class:
+            return self.cache_helper_class
+        return helpers.IndexCacheHelper
+
+    def get_index_view_cache_stats(self):
+        """
+        Return a dictionary of 'hits', 'misses' and 'hit_rate' values for
+        cached `IndexView` content
+        """
+        return self.get_cache_helper_class().get_stats(self)
 
     def get_action_definitions(self):
         # If self.model_actions is explicity set, return that only
@@ -91,18 +253,408 @@ class ModelAdmin(WagtailModelAdmin):
                     )
                 )
 
-        # Combine default and custom actions
+        # Combine default and custom actions (without modifying the defaults)
+        model_actions = dict(model_actions)
         model_actions.update(self.custom_model_actions)
         return model_actions
 
     def get_action(self, codename):
-        self._actions.get(codename)
+        return self._actions.get(codename)
+
+    def get_query_budget(self, codename):
+        """
+        Return the maximum number of database queries that the view for
+        action `codename` should make, or `None` if there is no limit. Uses
+        the 'query_budget' value from the action's definition if set, or the
+        value for `codename` in `query_budgets`. Budgets are checked by
+        `QueryBudgetMiddleware` and `QueryBudgetTestMixin`
+        """
+        action = self.get_action(codename)
+        if action is not None and action.query_budget is not None:
+            return action.query_budget
+        return self.query_budgets.get(codename)
+
+    def get_list_display_attr(self, field_name):
+        """
+        Return the callable used to render the `list_display` item
+        `field_name`, or `None` if `field_name` refers to a model field
+        """
+        if callable(field_name):
+            return field_name
+        if hasattr(self, field_name):
+            return getattr(self, field_name)
+        return getattr(self.model, field_name, None)
+
+    def get_select_related_for_field(self, field_name):
+        """
+        Return a sequence of relationships that should be followed using
+        `select_related()` in order to render the `list_display` item
+        `field_name` without additional queries
+        """
+        try:
+            field = self.opts.get_field(field_name)
+        except FieldDoesNotExist:
+            pass
+        else:
+            if field.is_relation and field.related_model and (
+                field.many_to_one or field.one_to_one
+            ):
+                return (field.name,)
+            return ()
+        if field_name == 'admin_thumb' and isinstance(self, ThumbnailMixin):
+            return (self.thumb_image_field_name,)
+        attr = self.get_list_display_attr(field_name)
+        return getattr(attr, 'select_related', ())
+
+    def get_prefetch_related_for_field(self, field_name):
+        """
+        Return a sequence of lookups (or `Prefetch` objects) that should be
+        passed to `prefetch_related()` in order to render the `list_display`
+        item `field_name` without additional queries
+        """
+        try:
+            field = self.opts.get_field(field_name)
+        except FieldDoesNotExist:
+            pass
+        else:
+            if field.is_relation and (
+                field.many_to_many or field.one_to_many
+            ):
+                return (field.name,)
+            return ()
+        attr = self.get_list_display_attr(field_name)
+        return getattr(attr, 'prefetch_related', ())
+
+    def get_related_lookups_for_list_display(self, list_display):
+        """
+        Return a tuple in the format (select_related, prefetch_related),
+        combining lookups required by all of the items in `list_display`, and
+        any lookups declared on row hooks (see `row_hook_names`) using the
+        decorators in `waddleadmin.decorators`. Results are cached, so the
+        analysis only happens once for each unique `list_display` value.
+        """
+        key = tuple(list_display)
+        if key in self._related_lookups:
+            return self._related_lookups[key]
+
+        select_related = []
+        prefetch_related = []
+        prefetch_to = set()
+
+        def add_prefetch(lookup):
+            if isinstance(lookup, Prefetch):
+                path = lookup.prefetch_to
+            else:
+                path = lookup
+            if path not in prefetch_to:
+                prefetch_to.add(path)
+                prefetch_related.append(lookup)
+
+        for field_name in list_display:
+            for lookup in self.get_select_related_for_field(field_name):
+                if lookup not in select_related:
+                    select_related.append(lookup)
+            for lookup in self.get_prefetch_related_for_field(field_name):
+                add_prefetch(lookup)
+
+        for hook_name in self.row_hook_names:
+            hook = getattr(self, hook_name, None)
+            for lookup in getattr(hook, 'select_related', ()):
+                if lookup not in select_related:
+                    select_related.append(lookup)
+            for lookup in getattr(hook, 'prefetch_related', ()):
+                add_prefetch(lookup)
+
+        result = (tuple(select_related), tuple(prefetch_related))
+        self._related_lookups[key] = result
+        return result
+
+    def get_list_select_related(self, request):
+        """
+        Return a value to use for `select_related()` when building the
+        queryset for `IndexView`. If `list_select_related` is set to `True` or
+        a sequence of field names, that value is used. Otherwise,
+        relationships are inferred from the items in `get_list_display()`.
+        """
+        if self.list_select_related is not False:
+            return self.list_select_related
+        return self.get_related_lookups_for_list_display(
+            self.get_list_display(request))[0]
+
+    def get_list_prefetch_related(self, request):
+        """
+        Return a sequence of lookups to pass to `prefetch_related()` when
+        building the queryset for `IndexView`. Combines any values from
+        `list_prefetch_related` with those inferred from the items in
+        `get_list_display()`.
+        """
+        prefetch_related = list(self.list_prefetch_related)
+        inferred = self.get_related_lookups_for_list_display(
+            self.get_list_display(request))[1]
+        for lookup in inferred:
+            if lookup not in prefetch_related:
+                prefetch_related.append(lookup)
+        return prefetch_related
+
+    def get_required_fields_for_attr(self, attr):
+        """
+        Return a sequence of field names that `attr` (a method, function or
+        property) has declared it needs using the decorators in
+        `waddleadmin.decorators`, or `None` if it hasn't declared anything
+        """
+        func = getattr(attr, 'fget', attr)
+        declared = False
+        fields = []
+        if hasattr(func, 'requires_fields'):
+            declared = True
+            fields.extend(func.requires_fields)
+        if hasattr(func, 'select_related'):
+            declared = True
+            # Foreign keys must be loaded for relationships to be followed
+            fields.extend(
+                lookup.split(LOOKUP_SEP)[0] for lookup in func.select_related)
+        if hasattr(func, 'prefetch_related'):
+            declared = True
+        if declared:
+            return tuple(fields)
+        return None
+
+    def get_required_fields_for_field(self, field_name):
+        """
+        Return a sequence of field names that must be loaded in order to
+        render the `list_display` item `field_name`, or `None` if they can't
+        be determined
+        """
+        if isinstance(field_name, six.string_types):
+            if field_name == 'pk':
+                return ()
+            try:
+                field = self.opts.get_field(field_name)
+            except FieldDoesNotExist:
+                pass
+            else:
+                if field.concrete and not field.many_to_many:
+                    return (field.name,)
+                return ()
+            if field_name == 'admin_thumb' and isinstance(
+                self, ThumbnailMixin
+            ):
+                return (self.thumb_image_field_name,)
+            if isinstance(getattr(self, field_name, None), AnnotatedColumn):
+                return ()
+        attr = self.get_list_display_attr(field_name)
+        if attr is None:
+            return None
+        return self.get_required_fields_for_attr(attr)
+
+    def is_overridden_row_hook(self, hook_name):
+        hook = getattr(type(self), hook_name, None)
+        default = getattr(WagtailModelAdmin, hook_name, None)
+        return getattr(hook, '__func__', hook) is not getattr(
+            default, '__func__', default)
+
+    def is_large_field(self, field):
+        """
+        Return a boolean indicating whether values for `field` are likely to
+        be large enough to be worth leaving out of `IndexView` queries
+        """
+        return isinstance(field, (TextField, BinaryField)) or (
+            field.get_internal_type() in ('TextField', 'BinaryField'))
+
+    def get_list_only_fields(self, request):
+        """
+        Return a list of field names to pass to `only()` when building the
+        queryset for `IndexView`, or `None` if all fields should be loaded.
+        If `list_only_fields` is set to `False`, all fields are loaded. If
+        it is a sequence of field names, those fields are loaded in addition
+        to any that are inferred from `get_list_display()`, row hooks, the
+        model's `__str__` method (used for button titles) and buttons (page
+        models always load all fields from `Page`).
+        """
+        if self.list_only_fields is False:
+            return None
+        list_display = tuple(self.get_list_display(request))
+        key = (list_display, tuple(self.list_only_fields or ()))
+        if key in self._only_fields:
+            return self._only_fields[key]
+
+        fields = list(key[1])
+        undeclared = False
+
+        def add_fields(names):
+            for name in names:
+                if name not in fields:
+                    fields.append(name)
+
+        for field_name in list_display:
+            names = self.get_required_fields_for_field(field_name)
+            if names is None:
+                undeclared = True
+            else:
+                add_fields(names)
+
+        for hook_name in self.row_hook_names:
+            if not self.is_overridden_row_hook(hook_name):
+                continue
+            names = self.get_required_fields_for_attr(
+                getattr(self, hook_name))
+            if names is None:
+                undeclared = True
+            else:
+                add_fields(names)
+
+        if self.is_pagemodel:
+            # Buttons and permission checks use a variety of `Page` fields
+            # (e.g. `live`, `has_unpublished_changes`, `path`, `locked`),
+            # and the `__str__` method uses `title`
+            add_fields(field.name for field in Page._meta.concrete_fields)
+        else:
+            str_method = getattr(self.model, '__unicode__', None) or getattr(
+                self.model, '__str__')
+            names = self.get_required_fields_for_attr(str_method)
+            if names is None:
+                undeclared = True
+            else:
+                add_fields(names)
+
+        if undeclared:
+            add_fields(
+                field.name for field in self.opts.concrete_fields
+                if not self.is_large_field(field)
+            )
+        if all(field.name in fields or field.primary_key
+               for field in self.opts.concrete_fields):
+            # Nothing would be left out
+            fields = None
+        self._only_fields[key] = fields
+        return fields
+
+    def get_annotated_columns(self, list_display):
+        """
+        Return an `OrderedDict` of `AnnotatedColumn` instances referenced by
+        items in `list_display`, keyed by the name used to reference them
+        """
+        columns = OrderedDict()
+        for field_name in list_display:
+            if not isinstance(field_name, six.string_types):
+                continue
+            attr = getattr(self, field_name, None)
+            if not isinstance(attr, AnnotatedColumn):
+                continue
+            if attr.name is None:
+                attr.name = field_name
+            elif attr.name != field_name:
+                raise ImproperlyConfigured(
+                    "The same AnnotatedColumn instance cannot be used for "
+                    "both '%s' and '%s' on your '%s' class." % (
+                        attr.name, field_name, self.__class__.__name__
+                    )
+                )
+            columns[field_name] = attr
+        return columns
+
+    def get_json_index_fields(self, request):
+        """
+        Return a list of names that can be requested using the `fields`
+        parameter for `JSONIndexView`. Unless `json_index_fields` is set,
+        this is 'pk' plus any items in `get_list_display()` that are
+        concrete fields or `AnnotatedColumn` instances. Values for foreign
+        keys are primary keys.
+        """
+        if self.json_index_fields is not None:
+            return list(self.json_index_fields)
+        list_display = self.get_list_display(request)
+        annotated = self.get_annotated_columns(list_display)
+        fields = ['pk']
+        for name in list_display:
+            if not isinstance(name, six.string_types) or name in fields:
+                continue
+            if name in annotated:
+                fields.append(name)
+                continue
+            try:
+                field = self.opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                fields.append(name)
+        return fields
+
+    def get_list_annotations(self, request):
+        """
+        Return a dictionary of annotations to apply to the `IndexView`
+        queryset, so that values for any `AnnotatedColumn` items in
+        `get_list_display()` are calculated by the database
+        """
+        columns = self.get_annotated_columns(self.get_list_display(request))
+        return OrderedDict(
+            (name, column.expression) for name, column in columns.items()
+        )
+
+    def prepare_list_results(self, request, objects):
+        """
+        Called by `IndexView` with a list of results to be displayed, before
+        any rows are rendered. Override to do work for all rows in one go
+        (e.g. fetching related data in bulk), instead of for each row
+        individually. Items in `objects` can be replaced.
+
+        For page models, results are replaced with their most specific
+        versions (when `list_specific_results` is `True`), parent pages
+        (needed to check 'copy' permissions) are fetched, with a single
+        query for each page type, and URLs for 'view live' buttons are found
+        using site root paths that are cached for each process.
+        """
+        if not self.is_pagemodel or not objects:
+            return
+        if self.list_specific_results:
+            objects[:] = get_specific_pages(
+                objects, list(self.get_list_annotations(request)))
+        prefetch_parent_pages(objects)
+        prefetch_relative_urls(objects, request)
+
+    def revisions_index_view(self, request, instance_pk):
+        """
+        Instantiates a class-based view to list revisions of a page. The view
+        class used can be overridden by changing the
+        'revisions_index_view_class' attribute.
+        """
+        kwargs = {'model_admin': self, 'instance_pk': instance_pk}
+        view_class = self.revisions_index_view_class
+        return view_class.as_view(**kwargs)(request)
+
+    def revisions_compare_view(self, request, instance_pk, revision_id_a,
+                               revision_id_b):
+        """
+        Instantiates a class-based view to compare two revisions of a page.
+        The view class used can be overridden by changing the
+        'revisions_compare_view_class' attribute.
+        """
+        kwargs = {
+            'model_admin': self,
+            'instance_pk': instance_pk,
+            'revision_id_a': revision_id_a,
+            'revision_id_b': revision_id_b,
+        }
+        view_class = self.revisions_compare_view_class
+        return view_class.as_view(**kwargs)(request)
+
+    def get_revisions_diff_cache(self):
+        """
+        Return the cache used by `RevisionsCompareView` to store rendered
+        comparisons, which holds up to `revisions_diff_cache_size` of them
+        for each `ModelAdmin` instance
+        """
+        if self._revisions_diff_cache is None:
+            self._revisions_diff_cache = LRUCache(
+                self.revisions_diff_cache_size)
+        return self._revisions_diff_cache
 
     def get_admin_urls_for_registration(self):
-        return [
-            action.url for codename, action in self.actions.items()
+        # `ModelAdminGroup` adds these to a tuple
+        return tuple(
+            action.url for codename, action in self._actions.items()
             if action.view_url_registration_required
-        ]
+        )
 
     def get_index_view_button_names(self, request):
         """
@@ -0,0 +1,292 @@
+from __future__ import absolute_import, unicode_literals
+
+import base64
+import copy
+import datetime
+import json
+from functools import reduce
+import operator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.fields import FieldDoesNotExist
+from django.utils import six
+from django.utils.encoding import force_bytes, force_text
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    Unlike `DjangoJSONEncoder`, keeps datetimes and times at full
+    (microsecond) precision, so that seeking past a value never skips or
+    repeats results that differ by less than a millisecond
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super(CursorJSONEncoder, self).default(o)
+
+
+def encode_cursor(direction, values):
+    """
+    Return a querystring-safe string representing a position within a set of
+    ordered results. `values` should be a sequence of JSON-serializable
+    values for the fields used to order the results
+    """
+    data = json.dumps(values, cls=CursorJSONEncoder, separators=(',', ':'))
+    encoded = base64.urlsafe_b64encode(force_bytes(data))
+    return direction + force_text(encoded).rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Return a (direction, values) tuple from a string generated by
+    `encode_cursor()`. Raises `ValueError` if `cursor` is invalid.
+    """
+    if not cursor or cursor[0] not in (NEXT, PREVIOUS):
+        raise ValueError("Invalid cursor: %r" % cursor)
+    data = cursor[1:]
+    data += '=' * (-len(data) % 4)
+    try:
+        values = json.loads(force_text(
+            base64.urlsafe_b64decode(force_bytes(data))))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor: %r" % cursor)
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor: %r" % cursor)
+    return cursor[0], values
+
+
+class KeysetPage(object):
+    """
+    A page of results from `KeysetPaginator`. Implements the parts of
+    Django's `Page` API that make sense without knowing the page number.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<KeysetPage of %s objects>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.get_cursor_for_obj(
+                self.object_list[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.get_cursor_for_obj(
+                self.object_list[0], PREVIOUS)
+
+
+class KeysetPaginator(object):
+    """
+    Paginates an ordered queryset by 'seeking' past the values of the last
+    object on the previous page, instead of using `OFFSET`. The cost of
+    fetching a page is the same wherever it is in the result set, so long as
+    there is a suitable index for the ordering.
+
+    The primary key is added to the ordering as a tiebreaker if it isn't
+    already present. Ordering by expressions (rather than field names) is not
+    supported (check `is_supported` before using), and neither are nullable
+    fields, as `NULL` values cannot be 'seeked' past consistently across
+    database backends.
+    """
+    keyset = True
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.model = queryset.model
+        self.opts = self.model._meta
+        self.per_page = int(per_page)
+        if ordering is None:
+            ordering = queryset.query.order_by or self.opts.ordering
+        self.ordering = self.normalize_ordering(ordering)
+
+    def normalize_ordering(self, ordering):
+        result = []
+        pk_present = False
+        for item in ordering:
+            if not isinstance(item, six.string_types):
+                # An expression; keyset pagination isn't possible
+                return None
+            if item == '?':
+                return None
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            if name in ('pk', self.opts.pk.name, self.opts.pk.attname):
+                name = 'pk'
+                pk_present = True
+            elif not self.is_valid_ordering_name(name):
+                return None
+            result.append((name, descending))
+            if pk_present:
+                # Anything after the pk has no effect on the ordering
+                break
+        if not pk_present:
+            result.append(('pk', False))
+        return result
+
+    def is_valid_ordering_name(self, name):
+        """
+        Return a boolean indicating whether `name` can be used to seek
+        through results. Names must refer to concrete, non-nullable,
+        non-relational fields (non-nullable foreign keys can be followed to
+        get to one) or `Count` annotations.
+        """
+        annotations = self.queryset.query.annotations
+        if name in annotations:
+            # Other annotations (e.g. `Max`) can evaluate to `NULL`
+            return isinstance(annotations[name], Count)
+        model = self.model
+        parts = name.split(LOOKUP_SEP)
+        for i, part in enumerate(parts):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return False
+            if not field.concrete or field.null:
+                return False
+            if i == len(parts) - 1:
+                # Ordering by a relationship uses the related model's
+                # ordering, which we can't easily seek through
+                return not field.is_relation
+            if not field.is_relation or field.many_to_many:
+                return False
+            model = field.related_model
+        return False
+
+    @property
+    def is_supported(self):
+        return self.ordering is not None
+
+    def values(self, *fields):
+        """
+        Return a copy of this paginator that returns dictionaries (from
+        `values()`) containing `fields`, plus any fields needed to generate
+        cursors, instead of model instances
+        """
+        names = list(fields)
+        for name, descending in self.ordering:
+            if name not in names:
+                names.append(name)
+        clone = copy.copy(self)
+        clone.queryset = self.queryset.values(*names)
+        return clone
+
+    def get_value_for_obj(self, obj, name):
+        if isinstance(obj, dict):
+            return obj[name]
+        if name == 'pk':
+            return obj.pk
+        value = obj
+        for part in name.split(LOOKUP_SEP):
+            if value is None:
+                return None
+            value = getattr(value, part)
+        return value
+
+    def get_cursor_for_obj(self, obj, direction=NEXT):
+        values = [
+            self.get_value_for_obj(obj, name) for name, desc in self.ordering
+        ]
+        return encode_cursor(direction, values)
+
+    def get_seek_filter(self, values, reverse=False):
+        """
+        Return a `Q` object that will match only objects that come after
+        (or before, if `reverse` is `True`) an object with `values`
+        """
+        clauses = []
+        for i, (name, descending) in enumerate(self.ordering):
+            if descending != reverse:
+                lookup = '%s__lt' % name
+            else:
+                lookup = '%s__gt' % name
+            clause = Q(**{lookup: values[i]})
+            for j, (prev_name, prev_desc) in enumerate(self.ordering[:i]):
+                clause &= Q(**{prev_name: values[j]})
+            clauses.append(clause)
+        return reduce(operator.or_, clauses)
+
+    def get_order_by(self, reverse=False):
+        order_by = []
+        for name, descending in self.ordering:
+            if descending != reverse:
+                order_by.append('-' + name)
+            else:
+                order_by.append(name)
+        return order_by
+
+    def get_page_queryset(self, cursor=None):
+        """
+        Return a tuple containing a sliced queryset for the page of results
+        following (or preceding) the position represented by `cursor`, a
+        boolean indicating whether results are in reverse order, and a
+        boolean indicating whether a valid cursor was used. The queryset
+        includes one more result than the page size, to indicate whether
+        there are more results in the same direction.
+        """
+        direction, values = NEXT, None
+        if cursor:
+            try:
+                direction, values = decode_cursor(cursor)
+            except ValueError:
+                pass
+            if values is not None and (
+                len(values) != len(self.ordering) or None in values
+            ):
+                direction, values = NEXT, None
+
+        reverse = direction == PREVIOUS
+        qs = self.queryset
+        if values is not None:
+            qs = qs.filter(self.get_seek_filter(values, reverse))
+        qs = qs.order_by(*self.get_order_by(reverse))
+        return qs[:self.per_page + 1], reverse, values is not None
+
+    def page(self, cursor=None):
+        """
+        Return a `KeysetPage` of results following (or preceding) the
+        position represented by `cursor`. If `cursor` is `None` or invalid,
+        the first page of results is returned.
+        """
+        qs, reverse, seeking = self.get_page_queryset(cursor)
+
+        # An extra object is fetched to find out if there are more to come
+        object_list = list(qs)
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+
+        if reverse:
+            object_list.reverse()
+            return KeysetPage(object_list, self, True, has_more)
+        return KeysetPage(object_list, self, has_more, seeking)
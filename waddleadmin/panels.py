@@ -0,0 +1,42 @@
+"""
+A panel for django-debug-toolbar, which can be enabled by adding
+'waddleadmin.panels.InstrumentationPanel' to `DEBUG_TOOLBAR_PANELS`
+"""
+from __future__ import absolute_import, unicode_literals
+
+from debug_toolbar.panels import Panel
+from django.utils.translation import ugettext_lazy as _
+
+from .utils.instrumentation import CallRecorder
+
+
+class InstrumentationPanel(Panel):
+    """
+    Displays the number of calls made to instrumented `ModelAdmin` helper
+    methods (e.g. permission checks, button creation and URL reversal)
+    while handling the request, and the total time spent in each
+    """
+    title = _('ModelAdmin helpers')
+    template = 'waddleadmin/debug_toolbar/instrumentation.html'
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        if not stats:
+            return ''
+        return _('%(calls)s calls in %(ms).2fms') % {
+            'calls': stats['total_calls'], 'ms': stats['total_ms']}
+
+    def enable_instrumentation(self):
+        self.recorder = CallRecorder().__enter__()
+
+    def disable_instrumentation(self):
+        self.recorder.__exit__(None, None, None)
+
+    def process_response(self, request, response):
+        results = self.recorder.get_results()
+        self.record_stats({
+            'results': results,
+            'total_calls': sum(calls for name, calls, ms in results),
+            'total_ms': sum(ms for name, calls, ms in results),
+        })
@@ -0,0 +1,83 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.contrib.admin.templatetags.admin_list import result_headers
+from django.template import Library, Node
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from django.utils.translation import ugettext as _
+
+register = Library()
+
+
+@register.simple_tag
+def keyset_pagination_link_previous(current_page, view):
+    if current_page.has_previous():
+        return format_html(
+            '<li class="prev"><a href="{}" class="icon icon-arrow-left">{}'
+            '</a></li>',
+            view.get_query_string(
+                {view.CURSOR_VAR: current_page.previous_cursor}),
+            _('Previous')
+        )
+    return ''
+
+
+@register.simple_tag
+def keyset_pagination_link_next(current_page, view):
+    if current_page.has_next():
+        return format_html(
+            '<li class="next"><a href="{}" class="icon icon-arrow-right-after"'
+            '>{}</a></li>',
+            view.get_query_string({view.CURSOR_VAR: current_page.next_cursor}),
+            _('Next')
+        )
+    return ''
+
+
+@register.inclusion_tag(
+    'waddleadmin/includes/streamed_result_list.html', takes_context=True)
+def streamed_result_list(context):
+    """
+    Displays the headers for the result list, with a placeholder for rows,
+    which are streamed separately by `IndexView`
+    """
+    view = context['view']
+    headers = list(result_headers(view))
+    num_sorted_fields = 0
+    for h in headers:
+        if h['sortable'] and h['sorted']:
+            num_sorted_fields += 1
+    context.update({
+        'result_headers': headers,
+        'num_sorted_fields': num_sorted_fields,
+        'rows_placeholder': mark_safe(view.ROWS_PLACEHOLDER),
+    })
+    return context
+
+
+class IndexViewCacheNode(Node):
+
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        cached = context.get('cached_content_main')
+        if cached is not None:
+            return cached
+        output = self.nodelist.render(context)
+        view = context.get('view')
+        cache_helper = getattr(view, 'cache_helper', None)
+        if cache_helper is not None:
+            cache_helper.set_content(output)
+        return output
+
+
+@register.tag
+def index_view_cache(parser, token):
+    """
+    Renders cached content for the current `IndexView` if available, or
+    renders the enclosed content and caches it (if caching is enabled)
+    """
+    nodelist = parser.parse(('endindex_view_cache', ))
+    parser.delete_first_token()
+    return IndexViewCacheNode(nodelist)
@@ -0,0 +1,392 @@
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+import json
+import random
+from timeit import default_timer
+
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.six.moves import range
+from wagtail.tests.testapp.models import EventPage
+from wagtail.wagtailcore.models import (
+    GroupPagePermission, Page, PageRevision, Site)
+
+from waddleadmin.tests.models import Author, Book, Publisher, VenuePage
+
+WORDS = (
+    'lord', 'rings', 'hobbit', 'chocolate', 'factory', 'chronicles',
+    'narnia', 'giant', 'peach', 'witch', 'wardrobe', 'silmarillion',
+    'fantastic', 'mister', 'fox', 'matilda', 'return', 'king', 'tower',
+)
+
+CITIES = (
+    'London', 'Paris', 'Berlin', 'Madrid', 'Rome', 'Lisbon', 'Dublin',
+    'Vienna', 'Prague', 'Warsaw', None,
+)
+
+PAGE_PERMISSION_TYPES = ('add', 'edit', 'publish', 'lock')
+
+# Every nth generated page is a `VenuePage`, and the rest are `EventPage`s
+VENUE_PAGE_FREQUENCY = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates large volumes of authors, books, publishers, event and "
+        "venue pages (with revisions), and groups with page permissions, for "
+        "load testing admin views. Rows are created in batches using "
+        "bulk_create(), and pages are added to the tree without using "
+        "treebeard's add_child(), so millions of rows can be created in "
+        "minutes. The same --seed always produces the same values."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--authors', type=int, default=0,
+            help="The number of authors to create.")
+
+        parser.add_argument(
+            '--books', type=int, default=0,
+            help="The number of books to create, shared between new authors "
+                 "(or existing ones, if --authors is 0).")
+
+        parser.add_argument(
+            '--publishers', type=int, default=0,
+            help="The number of publishers to create.")
+
+        parser.add_argument(
+            '--pages', type=int, default=0,
+            help="The number of event and venue pages to create, below a new "
+                 "page added to the root page of the default site.")
+
+        parser.add_argument(
+            '--page-width', type=int, default=10, dest='page_width',
+            help="The maximum number of children for each page. Pages are "
+                 "added one level at a time, so lower values produce deeper "
+                 "trees. Defaults to 10.")
+
+        parser.add_argument(
+            '--revisions', type=int, default=1,
+            help="The number of revisions to create for each page. Defaults "
+                 "to 1.")
+
+        parser.add_argument(
+            '--groups', type=int, default=0,
+            help="The number of groups to create. Each can access the admin.")
+
+        parser.add_argument(
+            '--group-page-permissions', type=int, default=10,
+            dest='group_page_permissions',
+            help="The number of page permissions for each new group, for "
+                 "randomly chosen new pages (limited to the number of unique "
+                 "combinations of page and permission type). Defaults to "
+                 "10.")
+
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help="The seed for generating values. Defaults to 0.")
+
+        parser.add_argument(
+            '--batch-size', type=int, default=500, dest='batch_size',
+            help="The number of rows to insert with each query. Defaults to "
+                 "500.")
+
+    def log(self, message, start):
+        if self.verbosity >= 1:
+            self.stdout.write(
+                '%s in %.1fs' % (message, default_timer() - start))
+
+    @staticmethod
+    def batches(iterable, size):
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def get_title(self, number):
+        return ' '.join(self.random.sample(WORDS, 3)).title() + (
+            ' %s' % number)
+
+    def get_date(self, start_year, years):
+        return datetime.date(start_year, 1, 1) + datetime.timedelta(
+            days=self.random.randrange(years * 365))
+
+    def create_in_batches(self, model, objects):
+        for batch in self.batches(objects, self.batch_size):
+            model.objects.bulk_create(batch)
+
+    def get_new_pks(self, model, max_pk_before):
+        queryset = model.objects.order_by('pk')
+        if max_pk_before is not None:
+            queryset = queryset.filter(pk__gt=max_pk_before)
+        return list(queryset.values_list('pk', flat=True))
+
+    def get_max_pk(self, model):
+        return model.objects.order_by('-pk').values_list(
+            'pk', flat=True).first()
+
+    def create_authors(self, count):
+        max_pk = self.get_max_pk(Author)
+        self.create_in_batches(Author, (
+            Author(
+                name='Author %s' % i,
+                date_of_birth=self.get_date(1900, 100),
+            ) for i in range(count)
+        ))
+        return self.get_new_pks(Author, max_pk)
+
+    def create_books(self, count, author_pks):
+        if not author_pks:
+            author_pks = self.get_new_pks(Author, None)
+        if not author_pks:
+            raise CommandError("Books can't be created without authors")
+        self.create_in_batches(Book, (
+            Book(
+                author_id=self.random.choice(author_pks),
+                title=self.get_title(i),
+            ) for i in range(count)
+        ))
+
+    def create_publishers(self, count):
+        self.create_in_batches(Publisher, (
+            Publisher(
+                name='Publisher %s' % i,
+                headquartered_in=self.random.choice(CITIES),
+            ) for i in range(count)
+        ))
+
+    @staticmethod
+    def get_level_sizes(count, width):
+        # The number of pages on each level below the parent page
+        sizes = []
+        previous = 1
+        while count > 0:
+            size = min(previous * width, count)
+            sizes.append(size)
+            count -= size
+            previous = size
+        return sizes
+
+    def generate_pages(self, parent, count, width):
+        """
+        Yield an unsaved `EventPage` or `VenuePage` for each of `count`
+        pages to add below `parent`, with tree values (path, depth, numchild
+        and url_path) set so that no further changes are needed, one level
+        at a time
+        """
+        sizes = self.get_level_sizes(count, width)
+        event_page_ct = ContentType.objects.get_for_model(EventPage)
+        venue_page_ct = ContentType.objects.get_for_model(VenuePage)
+        parents = [(parent.path, parent.url_path)]
+        number = 0
+        for level, size in enumerate(sizes):
+            depth = parent.depth + level + 1
+            next_size = sizes[level + 1] if level + 1 < len(sizes) else 0
+            pages = []
+            for i in range(size):
+                parent_path, parent_url_path = parents[i // width]
+                number += 1
+                slug = 'page-%s' % number
+                if number % VENUE_PAGE_FREQUENCY == 0:
+                    page = VenuePage(
+                        content_type=venue_page_ct,
+                        title='Venue %s' % number,
+                        address='%s Street' % self.get_title(number),
+                        capacity=self.random.randrange(10, 10000),
+                    )
+                else:
+                    page = EventPage(
+                        content_type=event_page_ct,
+                        title=self.get_title(number),
+                        date_from=self.get_date(2010, 10),
+                        audience=self.random.choice(('public', 'private')),
+                        location=self.random.choice(CITIES) or 'Online',
+                        cost=self.random.choice(('Free', '10', '25')),
+                    )
+                page.slug = slug
+                page.depth = depth
+                page.path = Page._get_path(parent_path, depth, i % width + 1)
+                page.url_path = parent_url_path + slug + '/'
+                page.numchild = max(0, min(width, next_size - i * width))
+                page.live = self.random.random() < 0.8
+                page.has_unpublished_changes = not page.live
+                pages.append((page.path, page.url_path))
+                yield page
+            parents = pages
+
+    def insert_specific_rows(self, model, pages):
+        # Specific pages can't be created using `bulk_create()` (because of
+        # multi-table inheritance), so rows for their own table are inserted
+        # once `Page` rows exist
+        fields = model._meta.local_concrete_fields
+        quote_name = connection.ops.quote_name
+        sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+            quote_name(model._meta.db_table),
+            ', '.join(quote_name(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        rows = [
+            [
+                field.get_db_prep_save(
+                    getattr(page, field.attname), connection)
+                for field in fields
+            ]
+            for page in pages
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def get_content_json(self, page):
+        # `page.to_json()` makes several queries for each page (to find
+        # related objects), so values for the first page of each type are
+        # reused for its relations, which are empty for all generated pages
+        model = type(page)
+        if model not in self.content_templates:
+            self.content_templates[model] = page.serializable_data()
+        data = dict(self.content_templates[model], pk=page.pk)
+        for field in model._meta.concrete_fields:
+            data[field.name] = field.value_from_object(page)
+        return json.dumps(data, cls=DjangoJSONEncoder)
+
+    def create_revisions(self, pages, count):
+        now = timezone.now()
+        revisions = []
+        for page in pages:
+            content_json = self.get_content_json(page)
+            for i in range(count):
+                revisions.append(PageRevision(
+                    page_id=page.pk,
+                    content_json=content_json,
+                    created_at=now - datetime.timedelta(
+                        minutes=self.random.randrange(60 * 24 * 365)),
+                ))
+        PageRevision.objects.bulk_create(
+            revisions, batch_size=self.batch_size)
+
+    def create_pages(self, count, width, revisions):
+        site = Site.objects.get(is_default_site=True)
+        parent = site.root_page.add_child(instance=Page(
+            title='Load test pages (seed %s)' % self.seed,
+            slug='load-test-%s-%s' % (self.seed, Page.objects.count()),
+        ))
+        page_fields = [
+            field.attname for field in Page._meta.concrete_fields
+            if not field.primary_key
+        ]
+        page_pks = []
+        for batch in self.batches(
+            self.generate_pages(parent, count, width), self.batch_size
+        ):
+            Page.objects.bulk_create([
+                Page(**dict(
+                    (attname, getattr(page, attname))
+                    for attname in page_fields
+                )) for page in batch
+            ])
+            pks = dict(Page.objects.filter(
+                path__in=[page.path for page in batch]
+            ).values_list('path', 'pk'))
+            for page in batch:
+                page.pk = page.id = page.page_ptr_id = pks[page.path]
+                page_pks.append(page.pk)
+            for model in (EventPage, VenuePage):
+                specific_pages = [
+                    page for page in batch if type(page) is model]
+                if specific_pages:
+                    self.insert_specific_rows(model, specific_pages)
+            if revisions:
+                self.create_revisions(batch, revisions)
+
+        parent.numchild = self.get_level_sizes(count, width)[0]
+        parent.save(update_fields=['numchild'])
+        return page_pks
+
+    def create_groups(self, count, permission_count, page_pks):
+        if permission_count and not page_pks:
+            page_pks = list(Page.objects.filter(depth__gt=1).values_list(
+                'pk', flat=True))
+        max_pk = self.get_max_pk(Group)
+        self.create_in_batches(Group, (
+            Group(name='Load test group %s-%s' % (self.seed, i))
+            for i in range(count)
+        ))
+        group_pks = self.get_new_pks(Group, max_pk)
+
+        access_admin = Permission.objects.get(
+            content_type__app_label='wagtailadmin', codename='access_admin')
+        through = Group.permissions.through
+        self.create_in_batches(through, (
+            through(group_id=pk, permission_id=access_admin.pk)
+            for pk in group_pks
+        ))
+        if not page_pks:
+            return 0
+        # Each combination can only be used once per group
+        combinations = len(page_pks) * len(PAGE_PERMISSION_TYPES)
+        permission_count = min(permission_count, combinations)
+        self.create_in_batches(GroupPagePermission, (
+            GroupPagePermission(
+                group_id=group_pk,
+                page_id=page_pks[index // len(PAGE_PERMISSION_TYPES)],
+                permission_type=PAGE_PERMISSION_TYPES[
+                    index % len(PAGE_PERMISSION_TYPES)],
+            )
+            for group_pk in group_pks
+            for index in self.random.sample(
+                range(combinations), permission_count)
+        ))
+        return len(group_pks) * permission_count
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.seed = options['seed']
+        self.random = random.Random(self.seed)
+        self.batch_size = max(options['batch_size'], 1)
+        self.content_templates = {}
+        if options['page_width'] < 1:
+            raise CommandError('--page-width must be at least 1')
+
+        with transaction.atomic():
+            author_pks = []
+            if options['authors']:
+                start = default_timer()
+                author_pks = self.create_authors(options['authors'])
+                self.log('Created %s authors' % options['authors'], start)
+
+            if options['books']:
+                start = default_timer()
+                self.create_books(options['books'], author_pks)
+                self.log('Created %s books' % options['books'], start)
+
+            if options['publishers']:
+                start = default_timer()
+                self.create_publishers(options['publishers'])
+                self.log(
+                    'Created %s publishers' % options['publishers'], start)
+
+            page_pks = []
+            if options['pages']:
+                start = default_timer()
+                page_pks = self.create_pages(
+                    options['pages'], options['page_width'],
+                    options['revisions'])
+                self.log('Created %s pages (and %s revisions)' % (
+                    options['pages'],
+                    options['pages'] * options['revisions']), start)
+
+            if options['groups']:
+                start = default_timer()
+                permission_count = self.create_groups(
+                    options['groups'], options['group_page_permissions'],
+                    page_pks)
+                self.log('Created %s groups (and %s page permissions)' % (
+                    options['groups'], permission_count), start)
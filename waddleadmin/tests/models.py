@@ -5,6 +5,7 @@ from django.utils.encoding import python_2_unicode_compatible
 
 from wagtail.wagtailcore.models import Page
 from wagtail.wagtailsearch import index
+from waddleadmin.decorators import prefetch_related, requires_fields
 
 
 @python_2_unicode_compatible
@@ -12,14 +13,16 @@ class Author(models.Model):
     name = models.CharField(max_length=255)
     date_of_birth = models.DateField()
 
+    @requires_fields('name')
     def __str__(self):
         return self.name
 
+    @prefetch_related('book_set')
     def first_book(self):
         # For testing use of object methods in list_display
-        book = self.book_set.first()
-        if book:
-            return book.title
+        books = sorted(self.book_set.all(), key=lambda book: book.pk)
+        if books:
+            return books[0].title
         return ''
 
 
@@ -29,6 +32,11 @@ class Book(models.Model, index.Indexed):
     title = models.CharField(max_length=255)
     cover_image = models.ForeignKey('wagtailimages.Image', on_delete=models.SET_NULL, null=True, blank=True)
 
+    search_fields = [
+        index.SearchField('title'),
+    ]
+
+    @requires_fields('title')
     def __str__(self):
         return self.title
 
@@ -0,0 +1,74 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.urlresolvers import resolve, reverse
+from django.test import TestCase
+
+from wagtail.tests.testapp.models import EventPage
+from wagtail.tests.utils import WagtailTestUtils
+
+from ..utils.registry import get_registered_modeladmins
+from .models import Book
+from .wagtail_hooks import BookModelAdmin, EventPageAdmin, EventsAdminGroup
+
+
+class TestActionURLs(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.user = self.login()
+
+    def get_model_admin(self, model_admin_class):
+        for model_admin in get_registered_modeladmins():
+            if type(model_admin) is model_admin_class:
+                return model_admin
+        self.fail('%s is not registered' % model_admin_class.__name__)
+
+    def get_url_kwargs(self, action, obj, revisions=()):
+        if not action.instance_specific:
+            return {}
+        kwargs = {'instance_pk': obj.pk}
+        if action.codename == 'revisions_compare':
+            kwargs['revision_id_a'] = revisions[0].pk
+            kwargs['revision_id_b'] = revisions[1].pk
+        return kwargs
+
+    def assertActionURLsWork(self, model_admin, obj, revisions=()):
+        registered = model_admin.get_admin_urls_for_registration()
+        self.assertIsInstance(registered, tuple)
+        self.assertTrue(registered)
+
+        for action in model_admin._actions.values():
+            if not action.view_url_registration_required:
+                continue
+            path = reverse(
+                action.get_url_name(),
+                kwargs=self.get_url_kwargs(action, obj, revisions))
+            match = resolve(path)
+            self.assertEqual(match.url_name, action.get_url_name())
+            self.assertNotIn('name', match.kwargs)
+
+            response = self.client.get(path)
+            self.assertIn(
+                response.status_code, (200, 302),
+                "GET %s returned %s" % (path, response.status_code))
+
+    def test_model_action_urls(self):
+        self.assertActionURLsWork(
+            self.get_model_admin(BookModelAdmin), Book.objects.get(pk=1))
+
+    def test_page_model_action_urls(self):
+        page = EventPage.objects.first()
+        revisions = [
+            page.save_revision(user=self.user),
+            page.save_revision(user=self.user),
+        ]
+        self.assertActionURLsWork(
+            self.get_model_admin(EventPageAdmin), page, revisions)
+
+    def test_group_urls(self):
+        group = EventsAdminGroup()
+        urls = group.get_admin_urls_for_registration()
+        self.assertIsInstance(urls, tuple)
+        self.assertEqual(len(urls), sum(
+            len(model_admin.get_admin_urls_for_registration())
+            for model_admin in group.modeladmin_instances))
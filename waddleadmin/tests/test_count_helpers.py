@@ -0,0 +1,128 @@
+from __future__ import absolute_import, unicode_literals
+
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from wagtail.tests.utils import WagtailTestUtils
+
+from waddleadmin.helpers import (
+    CachedCountHelper, EstimatedCountHelper, ExactCountHelper,
+    WindowCountHelper)
+
+from .models import Author
+from .wagtail_hooks import AuthorModelAdmin
+
+
+class FakeView(object):
+
+    def __init__(self, model_admin):
+        self.model_admin = model_admin
+
+
+class RecordingCachedCountHelper(CachedCountHelper):
+
+    def refresh_in_background(self, queryset, key):
+        self.refreshed_in_background = True
+
+
+class TestCountHelpers(TestCase):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        cache.clear()
+        self.model_admin = AuthorModelAdmin()
+        self.model_admin.approximate_count_threshold = 1
+        self.queryset = Author.objects.all()
+
+    def get_helper(self, helper_class):
+        return helper_class(FakeView(self.model_admin), None)
+
+    def test_exact(self):
+        count = self.get_helper(ExactCountHelper).get_count(self.queryset)
+        self.assertEqual(count, 4)
+        self.assertFalse(count.approximate)
+
+    def test_estimated_falls_back_to_exact(self):
+        helper = self.get_helper(EstimatedCountHelper)
+        if connection.vendor == 'postgresql':
+            self.assertIsNotNone(helper.get_estimate(self.queryset))
+        else:
+            self.assertIsNone(helper.get_estimate(self.queryset))
+            count = helper.get_count(self.queryset)
+            self.assertEqual(count, 4)
+            self.assertFalse(count.approximate)
+
+    def test_cached(self):
+        helper = self.get_helper(RecordingCachedCountHelper)
+        count = helper.get_count(self.queryset)
+        self.assertFalse(count.approximate)
+
+        Author.objects.filter(pk=4).delete()
+        with self.assertNumQueries(0):
+            count = helper.get_count(self.queryset)
+        self.assertEqual(count, 4)
+        self.assertTrue(count.approximate)
+        self.assertFalse(hasattr(helper, 'refreshed_in_background'))
+
+    def test_cached_threshold(self):
+        self.model_admin.approximate_count_threshold = 10
+        helper = self.get_helper(CachedCountHelper)
+        helper.get_count(self.queryset)
+        self.assertFalse(helper.get_count(self.queryset).approximate)
+
+    def test_stale_value_used_while_refreshing(self):
+        helper = self.get_helper(RecordingCachedCountHelper)
+        key = helper.get_cache_key(self.queryset)
+        cache.set(key, (10, time.time() - helper.cache_timeout - 1))
+        with self.assertNumQueries(0):
+            count = helper.get_count(self.queryset)
+        self.assertEqual(count, 10)
+        self.assertTrue(helper.refreshed_in_background)
+
+
+class TestIndexViewCounts(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        cache.clear()
+        self.login()
+
+    def tearDown(self):
+        AuthorModelAdmin.count_helper_class = None
+        AuthorModelAdmin.approximate_count_threshold = 10000
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                '/admin/waddleadmin_test/author/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_window_count_saves_a_query(self):
+        response, exact_queries = self.get()
+        self.assertEqual(response.context['result_count'], 4)
+
+        AuthorModelAdmin.count_helper_class = WindowCountHelper
+        response, window_queries = self.get()
+        self.assertEqual(response.context['result_count'], 4)
+        self.assertEqual(len(response.context['object_list']), 4)
+        self.assertEqual(window_queries, exact_queries - 1)
+
+    def test_window_count_with_filters(self):
+        AuthorModelAdmin.count_helper_class = WindowCountHelper
+        response, num_queries = self.get(q='Tolkien')
+        self.assertEqual(response.context['result_count'], 1)
+        self.assertEqual(response.context['all_count'], 4)
+
+    def test_approximate_counts_labelled(self):
+        AuthorModelAdmin.count_helper_class = CachedCountHelper
+        AuthorModelAdmin.approximate_count_threshold = 1
+        response, num_queries = self.get()
+        self.assertNotContains(response, 'of about')
+        response, num_queries = self.get()
+        self.assertTrue(response.context['result_count'].approximate)
+        self.assertContains(response, 'Page 1 of about 1.')
@@ -0,0 +1,80 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+
+from wagtail.tests.testapp.models import EventPage
+from wagtail.wagtailcore.models import GroupPagePermission, Page, PageRevision
+
+from .models import Author, Book, Publisher, VenuePage
+
+
+class TestGenerateLoadTestDataCommand(TestCase):
+
+    def generate(self, **options):
+        options.setdefault('verbosity', 0)
+        call_command('generate_load_test_data', **options)
+
+    def test_models(self):
+        self.generate(authors=5, books=20, publishers=3, batch_size=7)
+
+        self.assertEqual(Author.objects.count(), 5)
+        self.assertEqual(Book.objects.count(), 20)
+        self.assertEqual(Publisher.objects.count(), 3)
+
+    def test_pages(self):
+        page_count = Page.objects.count()
+        self.generate(pages=40, page_width=3, revisions=2, batch_size=7)
+
+        # Including the new parent page
+        self.assertEqual(Page.objects.count(), page_count + 41)
+        self.assertEqual(
+            EventPage.objects.count() + VenuePage.objects.count(), 40)
+        self.assertEqual(PageRevision.objects.count(), 80)
+        # No problems with paths, depths or numchild values
+        for problems in Page.find_problems():
+            self.assertEqual(list(problems), [])
+
+        parent = Page.objects.get(slug__startswith='load-test-')
+        self.assertEqual(parent.get_children().count(), 3)
+        deepest = Page.objects.order_by('-depth', 'path').first()
+        self.assertEqual(deepest.depth, parent.depth + 4)
+        page = deepest.specific
+        self.assertEqual(
+            page.url_path, page.get_parent().url_path + page.slug + '/')
+        revision = page.revisions.first()
+        self.assertEqual(revision.as_page_object().title, page.title)
+
+    def test_groups(self):
+        self.generate(pages=10, groups=3, group_page_permissions=4)
+
+        groups = Group.objects.filter(name__startswith='Load test group')
+        self.assertEqual(groups.count(), 3)
+        self.assertEqual(GroupPagePermission.objects.filter(
+            group__in=groups).count(), 12)
+        for group in groups:
+            self.assertTrue(group.permissions.filter(
+                codename='access_admin').exists())
+
+    def test_group_page_permissions_unique(self):
+        # Only 4 combinations of the new page and permission type exist
+        # (the new parent page isn't used)
+        self.generate(pages=1, groups=2, group_page_permissions=10)
+
+        permissions = GroupPagePermission.objects.filter(
+            group__name__startswith='Load test group')
+        self.assertEqual(permissions.count(), 8)
+        self.assertEqual(
+            len(set(permissions.values_list(
+                'group', 'page', 'permission_type'))), 8)
+
+    def test_seed(self):
+        self.generate(books=5, authors=2, seed=1)
+        titles = list(Book.objects.order_by('pk').values_list(
+            'title', flat=True))
+        Book.objects.all().delete()
+
+        self.generate(books=5, authors=2, seed=1)
+        self.assertEqual(list(Book.objects.order_by('pk').values_list(
+            'title', flat=True)), titles)
@@ -1,11 +1,17 @@
 from __future__ import absolute_import, unicode_literals
 
+import os
+import subprocess
+import sys
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 
+from waddleadmin import helpers
 from waddleadmin.helpers import PermissionHelper, PagePermissionHelper
+from waddleadmin.utils.instrumentation import CallRecorder
 from wagtail.wagtailimages.models import Image
 from wagtail.tests.testapp.models import EventPage
 from wagtail.tests.utils import WagtailTestUtils
@@ -96,6 +102,21 @@ class TestPermissionHelper(UsersMixin, TestCase, WagtailTestUtils):
             self.helper.user_can(self.get_non_editor(), 'exterminate')
         )
 
+    def test_calls_recorded(self):
+        user = self.get_editor()
+        self.helper.user_can(user, 'create')
+        with CallRecorder() as recorder:
+            self.helper.user_can(user, 'create')
+            self.helper.user_can(user, 'edit', Image.objects.get(id=1))
+        self.helper.user_can(user, 'create')
+
+        results = recorder.get_results()
+        self.assertEqual(len(results), 1)
+        name, calls, ms = results[0]
+        self.assertEqual(name, 'permission.user_can')
+        self.assertEqual(calls, 2)
+        self.assertGreater(ms, 0)
+
     def test_user_cannot_transmogrify_images(self):
         # No 'transmogrify' permission exists, so checking this should return
         # False (and raise a warning)
@@ -157,3 +178,53 @@ class TestPagePermissionHelper(UsersMixin, TestCase, WagtailTestUtils):
         # PagePermissionTester.can_move_to(), but failing, because
         # can_move_to() requires an additional 'parent' argument
         self.assertFalse(self.helper.user_can(user, 'move_to', christmas))
+
+    def test_page_permissions_cached_for_request(self):
+        editor = self.get_editor()
+        christmas = EventPage.objects.get(id=4)
+        request = RequestFactory().get('/')
+        helper = self.helper.for_request(request)
+        self.assertIsNot(helper, self.helper)
+        self.assertIs(
+            helper.get_user_permissions_proxy(editor),
+            self.helper.for_request(request).get_user_permissions_proxy(
+                editor))
+        self.assertFalse(helper.user_can(editor, 'delete', christmas))
+
+        # Changes are seen by later requests, and by the shared helper
+        editor.groups.add(Group.objects.get(pk=4))
+        editor = get_user_model().objects.get(pk=editor.pk)
+        self.assertFalse(helper.user_can(editor, 'delete', christmas))
+        self.assertTrue(self.helper.for_request(
+            RequestFactory().get('/')).user_can(editor, 'delete', christmas))
+        self.assertTrue(self.helper.user_can(editor, 'delete', christmas))
+
+
+class TestHelperImports(TestCase):
+
+    def test_names(self):
+        from ..helpers import permission, search
+        self.assertIs(helpers.PermissionHelper, permission.PermissionHelper)
+        self.assertIs(
+            helpers.WagtailSearchHelper, search.WagtailSearchHelper)
+        self.assertIn('IndexCacheHelper', helpers.__all__)
+        with self.assertRaises(AttributeError):
+            helpers.NotAHelper
+
+    def test_dir(self):
+        self.assertIn('WagtailSearchHelper', dir(helpers))
+
+    def test_submodules_imported_when_needed(self):
+        script = (
+            'import sys, django; django.setup(); '
+            'from waddleadmin.helpers import PermissionHelper; '
+            'print(sorted(name for name in sys.modules '
+            'if name.startswith("waddleadmin.helpers.")))'
+        )
+        output = subprocess.check_output(
+            [sys.executable, '-c', script], env=dict(
+                os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+
+        self.assertEqual(
+            output.decode('utf-8').strip(),
+            "['waddleadmin.helpers.permission']")
@@ -0,0 +1,700 @@
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+import threading
+import time
+from unittest import skipUnless
+
+import mock
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from wagtail.tests.testapp.models import SingleEventPage
+from wagtail.tests.utils import WagtailTestUtils
+from wagtail.wagtailcore.models import GroupPagePermission, Page
+from wagtail.wagtailimages.models import Image
+from wagtail.wagtailimages.tests.utils import get_test_image_file
+
+from waddleadmin.decorators import prefetch_related
+from waddleadmin.helpers import (
+    DatabaseSearchHelper, IndexCacheHelper, ORMSearchHelper,
+    WagtailSearchHelper)
+from waddleadmin.utils.concurrency import (
+    can_run_concurrently, run_concurrently)
+from waddleadmin.views import IndexView
+
+from .models import Author, Book
+from .wagtail_hooks import AuthorModelAdmin, BookModelAdmin, EventPageAdmin
+
+
+class TestRelatedLookupInference(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+        self.request = RequestFactory().get('/')
+
+    def get_query_count(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def add_authors_with_books(self, count):
+        for i in range(count):
+            author = Author.objects.create(
+                name='Author %s' % i,
+                date_of_birth=datetime.date(1950, 1, 1),
+            )
+            Book.objects.create(author=author, title='Book %s' % i)
+
+    def test_foreign_keys_selected(self):
+        # 'author' is a ForeignKey in list_display, and 'admin_thumb' is
+        # provided by ThumbnailMixin for the 'cover_image' field
+        model_admin = BookModelAdmin()
+        self.assertEqual(
+            model_admin.get_list_select_related(self.request),
+            ('author', 'cover_image')
+        )
+
+    def test_declared_prefetches_combined(self):
+        # 'first_book' (model method), 'last_book' and 'book_titles'
+        # (ModelAdmin methods) all declare a need for 'book_set', which should
+        # only appear once
+        class AuthorWithBookTitlesAdmin(AuthorModelAdmin):
+            list_display = AuthorModelAdmin.list_display + ('book_titles', )
+
+            @prefetch_related('book_set')
+            def book_titles(self, obj):
+                return ', '.join(book.title for book in obj.book_set.all())
+
+        for model_admin in (AuthorModelAdmin(), AuthorWithBookTitlesAdmin()):
+            self.assertEqual(
+                model_admin.get_list_prefetch_related(self.request),
+                ['book_set']
+            )
+
+    def test_explicit_list_select_related_respected(self):
+        model_admin = BookModelAdmin()
+        model_admin.list_select_related = ('author', )
+        self.assertEqual(
+            model_admin.get_list_select_related(self.request), ('author', ))
+
+    def test_author_index_query_count_constant(self):
+        url = '/admin/waddleadmin_test/author/'
+        initial_count = self.get_query_count(url)
+        self.add_authors_with_books(10)
+        self.assertEqual(self.get_query_count(url), initial_count)
+
+    def test_book_index_query_count_constant(self):
+        url = '/admin/waddleadmin_test/book/'
+        initial_count = self.get_query_count(url)
+        self.add_authors_with_books(10)
+        self.assertEqual(self.get_query_count(url), initial_count)
+
+
+class TestAnnotatedColumns(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+
+    def get(self, **params):
+        return self.client.get('/admin/waddleadmin_test/author/', params)
+
+    def test_values_rendered(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, '<td class="field-book_count">2</td>', html=True)
+        self.assertContains(
+            response,
+            '<td class="field-last_book" data-for_author="1">The Hobbit</td>',
+            html=True
+        )
+
+    def test_column_header(self):
+        response = self.get()
+        self.assertContains(response, 'Books')
+
+    def test_ordering(self):
+        # 'book_count' is the fourth item in list_display
+        response = self.get(o='3')
+        self.assertEqual(response.status_code, 200)
+        authors = list(response.context['object_list'])
+        self.assertEqual(authors[0].pk, 4)
+        self.assertEqual(authors[-1].pk, 1)
+
+        response = self.get(o='-3')
+        authors = list(response.context['object_list'])
+        self.assertEqual(authors[0].pk, 1)
+        self.assertEqual(authors[-1].pk, 4)
+
+
+class TestFacetedFilters(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        cache.clear()
+        self.login()
+        BookModelAdmin.list_filter_facets = True
+
+    def tearDown(self):
+        BookModelAdmin.list_filter_facets = False
+        BookModelAdmin.list_filter_facets_limit = 100
+
+    def get(self, **params):
+        return self.client.get('/admin/waddleadmin_test/book/', params)
+
+    def test_counts_shown(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'J. R. R. Tolkien (2)')
+        self.assertContains(response, 'J. R. Hartley (0)')
+
+    def test_counts_reflect_search(self):
+        response = self.get(q='Hobbit')
+        self.assertContains(response, 'J. R. R. Tolkien (1)')
+        self.assertContains(response, 'J. R. Hartley (0)')
+
+    def test_counts_ignore_own_filter(self):
+        response = self.get(author__id__exact='2')
+        self.assertEqual(len(response.context['object_list']), 1)
+        self.assertContains(response, 'J. R. R. Tolkien (2)')
+
+    def get_facet_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get()
+        return [
+            query['sql'] for query in context.captured_queries
+            if 'GROUP BY' in query['sql'] and 'COUNT(DISTINCT' in query['sql']
+        ]
+
+    def test_counts_cached(self):
+        self.assertTrue(self.get_facet_queries())
+        self.assertEqual(self.get_facet_queries(), [])
+
+    def test_limit(self):
+        BookModelAdmin.list_filter_facets_limit = 2
+        response = self.get()
+        self.assertContains(response, 'J. R. R. Tolkien')
+        self.assertNotContains(response, 'J. R. R. Tolkien (')
+
+
+class TestSearchRouting(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+
+    def tearDown(self):
+        BookModelAdmin.search_results_limit = 1000
+
+    def get(self, **params):
+        return self.client.get('/admin/waddleadmin_test/book/', params)
+
+    def test_helper_class_chosen(self):
+        self.assertIs(
+            BookModelAdmin().get_search_helper_class(), WagtailSearchHelper)
+        self.assertIs(
+            AuthorModelAdmin().get_search_helper_class(), ORMSearchHelper)
+        # Wagtail's search backend is only used when asked for
+        self.assertIs(
+            EventPageAdmin().get_search_helper_class(), ORMSearchHelper)
+        model_admin = BookModelAdmin()
+        model_admin.search_mode = 'orm'
+        self.assertIs(model_admin.get_search_helper_class(), ORMSearchHelper)
+        model_admin.search_mode = 'magic'
+        with self.assertRaises(ImproperlyConfigured):
+            model_admin.get_search_helper_class()
+
+    def test_search(self):
+        response = self.get(q='Hobbit')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [book.pk for book in response.context['object_list']], [2])
+
+    def test_filters_and_ordering_preserved(self):
+        response = self.get(q='The', author__id__exact='1')
+        self.assertEqual(
+            [book.pk for book in response.context['object_list']], [2, 1])
+
+    def test_results_limit(self):
+        BookModelAdmin.search_results_limit = 1
+        response = self.get(q='The')
+        self.assertEqual(len(response.context['object_list']), 1)
+        self.assertTrue(response.context['search_results_truncated'])
+        self.assertContains(response, 'Only the 1 most relevant matches')
+
+        BookModelAdmin.search_results_limit = 2
+        response = self.get(q='The')
+        self.assertEqual(len(response.context['object_list']), 2)
+        self.assertFalse(response.context['search_results_truncated'])
+        self.assertNotContains(response, 'most relevant matches')
+
+    def test_many_results(self):
+        # More than SQLite's limit of 999 query parameters
+        BookModelAdmin.search_results_limit = None
+        Book.objects.bulk_create(
+            Book(author_id=4, title='Fly Fishing %s' % i)
+            for i in range(1000)
+        )
+        response = self.get(q='Fishing')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['paginator'].count, 1000)
+        self.assertFalse(response.context['search_results_truncated'])
+
+
+@skipUnless(connection.vendor in ('postgresql', 'sqlite'),
+            "Full-text search isn't supported on this database")
+class TestDatabaseSearch(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+        AuthorModelAdmin.search_mode = 'database'
+
+    def tearDown(self):
+        AuthorModelAdmin.search_mode = 'orm'
+
+    def search(self, term):
+        response = self.client.get(
+            '/admin/waddleadmin_test/author/', {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return sorted(author.pk for author in response.context['object_list'])
+
+    def test_helper_class_chosen(self):
+        self.assertIs(
+            AuthorModelAdmin().get_search_helper_class(), DatabaseSearchHelper)
+
+    def test_unsupported_fields(self):
+        self.assertIsNone(DatabaseSearchHelper.get_indexed_fields(
+            Book, ('author__name', )))
+        self.assertIsNone(DatabaseSearchHelper.get_indexed_fields(
+            Author, ('date_of_birth', )))
+
+    def test_search(self):
+        call_command('create_search_indexes', verbosity=0)
+        self.assertEqual(self.search('Roald'), [2, 3])
+        self.assertEqual(self.search('tolk'), [1])
+        self.assertEqual(self.search('Shakespeare'), [])
+
+    def test_index_kept_up_to_date(self):
+        call_command('create_search_indexes', verbosity=0)
+        author = Author.objects.create(
+            name='Terry Pratchett', date_of_birth=datetime.date(1948, 4, 28))
+        self.assertEqual(self.search('Pratchett'), [author.pk])
+        author.name = 'Terence Pratchett'
+        author.save()
+        self.assertEqual(self.search('Terence'), [author.pk])
+        author.delete()
+        self.assertEqual(self.search('Pratchett'), [])
+
+    def test_many_matches(self):
+        # More than SQLite's limit of 999 query parameters
+        call_command('create_search_indexes', verbosity=0)
+        date_of_birth = datetime.date(1950, 1, 1)
+        Author.objects.bulk_create(
+            Author(name='Roald %s' % i, date_of_birth=date_of_birth)
+            for i in range(1000)
+        )
+        response = self.client.get(
+            '/admin/waddleadmin_test/author/', {'q': 'Roald'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['paginator'].count, 1002)
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite only")
+    def test_orm_used_without_fts_table(self):
+        self.assertEqual(self.search('oald'), [2, 3])
+
+    def test_postgres_matches(self):
+        # Only the SQL is checked, so that this runs on any database
+        helper = DatabaseSearchHelper(
+            mock.Mock(model_admin=AuthorModelAdmin()),
+            RequestFactory().get('/'))
+        fields = helper.get_indexed_fields(Author, ('name', ))
+        matching = helper.get_postgres_matches(fields, ['roa', "o'dahl"])
+        sql, params = matching.query.sql_with_params()
+
+        self.assertIn('to_tsvector(', sql)
+        self.assertIn('to_tsquery(', sql)
+        self.assertNotIn('plainto_tsquery(', sql)
+        self.assertIn('SIMILARITY(', sql.upper())
+        self.assertIn("'roa':* & 'o''dahl':*", params)
+        self.assertIn('roa o\'dahl', params)
+
+
+class TestIndexViewCache(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        cache.clear()
+        self.user = self.login()
+        BookModelAdmin.index_view_cache_timeout = 60
+
+    def tearDown(self):
+        BookModelAdmin.index_view_cache_timeout = None
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/admin/waddleadmin_test/book/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def get_stats(self):
+        return IndexCacheHelper.get_stats(BookModelAdmin())
+
+    def test_content_cached(self):
+        response, initial_count = self.get()
+        response, cached_count = self.get()
+        self.assertLess(cached_count, initial_count)
+        self.assertContains(response, 'The Lord of the Rings')
+        self.assertNotIn('object_list', response.context)
+        self.assertEqual(self.get_stats()['hits'], 1)
+        self.assertEqual(self.get_stats()['misses'], 1)
+        self.assertEqual(self.get_stats()['hit_rate'], 0.5)
+
+    def test_querystring_normalised(self):
+        self.get(q='the', o='0')
+        response, count = self.get(o='0', q='the')
+        self.assertNotIn('object_list', response.context)
+        response, count = self.get(q='hobbit')
+        self.assertIn('object_list', response.context)
+        self.assertNotContains(response, 'The Lord of the Rings')
+
+    def test_invalidated_by_save(self):
+        self.get()
+        book = Book.objects.get(pk=1)
+        book.title = 'The Fellowship of the Ring'
+        book.save()
+        response, count = self.get()
+        self.assertIn('object_list', response.context)
+        self.assertContains(response, 'The Fellowship of the Ring')
+
+    def test_invalidated_by_related_save(self):
+        self.get()
+        author = Author.objects.get(pk=1)
+        author.name = 'John Ronald Reuel Tolkien'
+        author.save()
+        response, count = self.get()
+        self.assertIn('object_list', response.context)
+        self.assertContains(response, 'John Ronald Reuel Tolkien')
+
+    def test_invalidated_by_delete(self):
+        self.get()
+        Book.objects.get(pk=2).delete()
+        response, count = self.get()
+        self.assertNotContains(response, 'The Hobbit')
+
+    def get_cache_key_for_user(self, user, model_admin=None, **extra):
+        model_admin = model_admin or BookModelAdmin()
+        request = RequestFactory().get(
+            '/admin/waddleadmin_test/book/', **extra)
+        request.user = user
+        view = model_admin.index_view_class(model_admin=model_admin)
+        return IndexCacheHelper(view, request).get_cache_key()
+
+    def test_keyed_on_permissions(self):
+        editor = get_user_model().objects.create_user(
+            'editor', 'editor@example.com', 'password')
+        self.assertNotEqual(
+            self.get_cache_key_for_user(self.user),
+            self.get_cache_key_for_user(editor)
+        )
+        # Users with the same permissions share content
+        other_editor = get_user_model().objects.create_user(
+            'other_editor', 'other_editor@example.com', 'password')
+        self.assertEqual(
+            self.get_cache_key_for_user(editor),
+            self.get_cache_key_for_user(other_editor)
+        )
+
+    def test_keyed_on_group_page_permissions(self):
+        group = Group.objects.create(name='Event editors')
+        editor = get_user_model().objects.create_user(
+            'editor', 'editor@example.com', 'password')
+        editor.groups.add(group)
+        model_admin = EventPageAdmin()
+        key = self.get_cache_key_for_user(editor, model_admin)
+        GroupPagePermission.objects.create(
+            group=group, page=Page.objects.get(depth=1),
+            permission_type='edit')
+        self.assertNotEqual(
+            self.get_cache_key_for_user(editor, model_admin), key)
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_keyed_on_host(self):
+        self.assertNotEqual(
+            self.get_cache_key_for_user(self.user, HTTP_HOST='example.com'),
+            self.get_cache_key_for_user(self.user, HTTP_HOST='example.org')
+        )
+
+    def test_dependencies_include_annotations(self):
+        class AuthorBookCountAdmin(AuthorModelAdmin):
+            list_display = ('name', 'book_count')
+
+        self.assertEqual(
+            IndexCacheHelper.get_dependencies(AuthorBookCountAdmin()),
+            [Author, Book]
+        )
+
+    def test_invalidated_by_subclass_save(self):
+        # `EventPageAdmin` lists `SingleEventPage` objects too
+        model_admin = EventPageAdmin()
+        key = self.get_cache_key_for_user(self.user, model_admin)
+        Page.objects.get(depth=1).add_child(instance=SingleEventPage(
+            title='Single event', date_from=datetime.date(2017, 1, 1),
+            audience='public', location='The Shire', cost='Free'
+        ))
+        self.assertNotEqual(
+            self.get_cache_key_for_user(self.user, model_admin), key)
+
+    def test_disabled_by_default(self):
+        BookModelAdmin.index_view_cache_timeout = None
+        self.get()
+        response, count = self.get()
+        self.assertIn('object_list', response.context)
+        self.assertEqual(self.get_stats()['misses'], 0)
+
+
+class TestColumnProjection(TestCase, WagtailTestUtils):
+    # wagtail/tests/testapp/fixtures/test_specific.json
+    fixtures = ['test_specific.json']
+
+    def setUp(self):
+        self.login()
+        self.request = RequestFactory().get('/')
+        self.model_admin = EventPageAdmin()
+
+    def tearDown(self):
+        EventPageAdmin.list_display = ('title', 'date_from', 'audience')
+        EventPageAdmin.list_only_fields = None
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/admin/tests/eventpage/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_declared_fields(self):
+        fields = self.model_admin.get_list_only_fields(self.request)
+        for name in ('title', 'live', 'has_unpublished_changes', 'date_from',
+                     'audience'):
+            self.assertIn(name, fields)
+        for name in ('body', 'location', 'date_to'):
+            self.assertNotIn(name, fields)
+
+    def test_undeclared_method(self):
+        EventPageAdmin.list_display = ('title', 'get_audience_display')
+        fields = EventPageAdmin().get_list_only_fields(self.request)
+        self.assertIn('location', fields)
+        self.assertIn('date_to', fields)
+        self.assertNotIn('body', fields)
+
+    def test_extra_fields(self):
+        EventPageAdmin.list_only_fields = ('location', )
+        fields = EventPageAdmin().get_list_only_fields(self.request)
+        self.assertIn('location', fields)
+        self.assertNotIn('body', fields)
+
+    def test_disabled(self):
+        EventPageAdmin.list_only_fields = False
+        self.assertIsNone(
+            EventPageAdmin().get_list_only_fields(self.request))
+
+    def test_all_fields_declared(self):
+        # Nothing can be left out for authors
+        self.assertIsNone(
+            AuthorModelAdmin().get_list_only_fields(self.request))
+
+    def test_index_view(self):
+        # Caches (e.g. of site root paths) are populated by the first
+        # request, so that queries for them aren't included in either count
+        self.get()
+        response, query_count = self.get()
+        obj = response.context['object_list'][0]
+        self.assertIn('body', obj.get_deferred_fields())
+        self.assertNotIn('date_from', obj.get_deferred_fields())
+
+        # Deferred fields aren't loaded for each row
+        EventPageAdmin.list_only_fields = False
+        response, unprojected_query_count = self.get()
+        self.assertEqual(query_count, unprojected_query_count)
+        obj = response.context['object_list'][0]
+        self.assertEqual(obj.get_deferred_fields(), set())
+
+
+class TestThumbnails(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+        self.books = list(Book.objects.order_by('pk')[:3])
+        for i, book in enumerate(self.books):
+            book.cover_image = Image.objects.create(
+                title='Cover %s' % i, file=get_test_image_file())
+            book.save()
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/admin/waddleadmin_test/book/', params)
+        self.assertEqual(response.status_code, 200)
+        rendition_queries = [
+            query for query in context.captured_queries
+            if 'wagtailimages_rendition' in query['sql']
+        ]
+        return response, len(rendition_queries)
+
+    def test_renditions_fetched_in_one_query(self):
+        renditions = [
+            book.cover_image.get_rendition('fill-100x100')
+            for book in self.books
+        ]
+        response, rendition_query_count = self.get()
+        self.assertEqual(rendition_query_count, 1)
+        for rendition in renditions:
+            self.assertContains(response, rendition.url)
+
+    def test_missing_rendition_generated(self):
+        # Only one rendition is missing, so it is generated in this thread
+        # (pool threads have their own database connections)
+        for book in self.books[1:]:
+            book.cover_image.get_rendition('fill-100x100')
+        image = self.books[0].cover_image
+        self.assertFalse(image.renditions.exists())
+        response, rendition_query_count = self.get()
+        rendition = image.renditions.get(filter_spec='fill-100x100')
+        self.assertContains(response, rendition.url)
+
+    def test_generation_timeout_for_whole_page(self):
+        model_admin = BookModelAdmin()
+        model_admin.thumb_generation_timeout = 0.2
+        images = [book.cover_image for book in self.books]
+        with mock.patch(
+            'waddleadmin.mixins.generate_rendition',
+            side_effect=lambda image, spec: time.sleep(1)
+        ):
+            start = time.time()
+            renditions = model_admin.generate_thumb_renditions(images)
+            elapsed = time.time() - start
+        self.assertEqual(renditions, {})
+        # Rather than 0.2 seconds for each image
+        self.assertLess(elapsed, 0.5)
+
+    def test_admin_thumb_without_preparation(self):
+        # e.g. when used outside of `IndexView`
+        model_admin = BookModelAdmin()
+        book = Book.objects.get(pk=self.books[0].pk)
+        self.assertIn('<img', model_admin.admin_thumb(book))
+
+
+class TestStreaming(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+        BookModelAdmin.index_view_streaming_enabled = True
+        BookModelAdmin.index_view_streaming_chunk_size = 3
+
+    def tearDown(self):
+        BookModelAdmin.index_view_streaming_enabled = False
+        BookModelAdmin.index_view_streaming_chunk_size = 100
+
+    def get(self, **params):
+        return self.client.get('/admin/waddleadmin_test/book/', params)
+
+    def test_rows_streamed(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertNotIn(IndexView.ROWS_PLACEHOLDER, content)
+        titles = [
+            'Charlie and the Chocolate Factory', 'The Chronicles of Narnia',
+            'The Hobbit', 'The Lord of the Rings'
+        ]
+        positions = [content.index(title) for title in titles]
+        self.assertEqual(positions, sorted(positions))
+        self.assertEqual(content.count('<tr'), 5)
+        self.assertIn('class="book odd"', content)
+        self.assertIn('class="book even"', content)
+        self.assertIn('data-author-yob="1892"', content)
+        self.assertTrue(content.rstrip().endswith('</html>'))
+
+    def test_no_results(self):
+        response = self.get(q='Shakespeare')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        self.assertContains(response, 'Sorry, there are no books')
+
+
+@mock.patch.object(BookModelAdmin, 'index_view_concurrent_queries', True)
+@mock.patch.object(BookModelAdmin, 'list_filter_facets', True)
+class TestConcurrentQueries(TransactionTestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+
+    def get(self, **params):
+        return self.client.get('/admin/waddleadmin_test/book/', params)
+
+    def test_run_concurrently(self):
+        self.assertTrue(can_run_concurrently())
+        results = run_concurrently([
+            lambda: Book.objects.count(),
+            lambda: Author.objects.count(),
+        ])
+        self.assertEqual(results, [4, 4])
+
+    def test_max_threads(self):
+        lock = threading.Lock()
+        running = [0]
+        most_running = [0]
+
+        def query():
+            with lock:
+                running[0] += 1
+                most_running[0] = max(most_running[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return Book.objects.count()
+
+        results = run_concurrently([query] * 6, max_threads=2)
+
+        self.assertEqual(results, [4] * 6)
+        self.assertEqual(most_running[0], 2)
+
+    def test_connections_not_closed_after_each_call(self):
+        with mock.patch.object(connections, 'close_all') as close_all:
+            run_concurrently([
+                lambda: Book.objects.count(),
+                lambda: Author.objects.count(),
+            ])
+        self.assertFalse(close_all.called)
+
+    def test_falls_back_in_transaction(self):
+        with transaction.atomic():
+            self.assertFalse(can_run_concurrently())
+            Book.objects.filter(pk=4).delete()
+            results = run_concurrently([
+                lambda: Book.objects.count(),
+                lambda: Author.objects.count(),
+            ])
+        self.assertEqual(results, [3, 4])
+
+    def test_index_view(self):
+        response = self.get(q='Hobbit')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result_count'], 1)
+        self.assertEqual(response.context['all_count'], 4)
+        self.assertTrue(response.context['user_can_create'])
+        self.assertContains(response, 'The Hobbit')
+        self.assertContains(response, 'J. R. R. Tolkien (1)')
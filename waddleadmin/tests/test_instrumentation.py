@@ -0,0 +1,36 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from wagtail.tests.utils import WagtailTestUtils
+
+
+@override_settings(MIDDLEWARE_CLASSES=settings.MIDDLEWARE_CLASSES + (
+    'waddleadmin.middleware.InstrumentationMiddleware',
+))
+class TestInstrumentationMiddleware(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+
+    def test_server_timing_header(self):
+        response = self.client.get('/admin/waddleadmin_test/book/')
+
+        self.assertEqual(response.status_code, 200)
+        metrics = dict(
+            item.strip().split(';', 1)
+            for item in response['Server-Timing'].split(',')
+        )
+        self.assertIn('action.render_view', metrics)
+        self.assertIn('permission.user_can', metrics)
+        self.assertIn('url.get_action_url_for_obj', metrics)
+        self.assertTrue(
+            metrics['action.render_view'].startswith('desc="1 calls";dur='))
+
+    def test_no_header_for_other_views(self):
+        response = self.client.get('/admin/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -0,0 +1,88 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+
+from django.test import TestCase
+
+from wagtail.tests.utils import WagtailTestUtils
+
+
+class TestJSONIndexView(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+
+    def get(self, url='/admin/waddleadmin_test/book/json_index/', **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(
+            b''.join(response.streaming_content).decode('utf-8'))
+
+    def test_default_fields(self):
+        data = self.get()
+        self.assertEqual([row['pk'] for row in data['results']], [3, 4, 2, 1])
+        self.assertEqual(data['results'][0], {
+            'pk': 3,
+            'title': 'Charlie and the Chocolate Factory',
+            'author': 2,
+            'urls': {
+                'inspect': '/admin/waddleadmin_test/book/inspect/3/',
+                'edit': '/admin/waddleadmin_test/book/edit/3/',
+                'delete': '/admin/waddleadmin_test/book/delete/3/',
+            },
+        })
+        self.assertIsNone(data['next'])
+        self.assertIsNone(data['previous'])
+
+    def test_field_selection(self):
+        data = self.get(fields='title')
+        self.assertEqual(
+            sorted(data['results'][0].keys()), ['title', 'urls'])
+
+    def test_annotated_fields(self):
+        data = self.get(
+            '/admin/waddleadmin_test/author/json_index/',
+            fields='pk,book_count', o='3'
+        )
+        self.assertEqual(data['results'][-1], {
+            'pk': 1,
+            'book_count': 2,
+            'urls': {
+                'inspect': '/admin/waddleadmin_test/author/inspect/1/',
+                'edit': '/admin/waddleadmin_test/author/edit/1/',
+                'delete': '/admin/waddleadmin_test/author/delete/1/',
+            },
+        })
+
+    def test_invalid_field(self):
+        response = self.client.get(
+            '/admin/waddleadmin_test/book/json_index/',
+            {'fields': 'cover_image'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_filters_and_search(self):
+        data = self.get(author__id__exact='1')
+        self.assertEqual([row['pk'] for row in data['results']], [2, 1])
+        data = self.get(q='Hobbit')
+        self.assertEqual([row['pk'] for row in data['results']], [2])
+
+    def test_cursor_pagination(self):
+        data = self.get(limit='2', fields='pk')
+        self.assertEqual([row['pk'] for row in data['results']], [3, 4])
+        self.assertIsNone(data['previous'])
+
+        data = self.get(data['next'])
+        self.assertEqual([row['pk'] for row in data['results']], [2, 1])
+        self.assertIsNone(data['next'])
+        self.assertIn('fields=pk', data['previous'])
+
+        data = self.get(data['previous'])
+        self.assertEqual([row['pk'] for row in data['results']], [3, 4])
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get('/admin/waddleadmin_test/book/json_index/')
+        self.assertEqual(response.status_code, 302)
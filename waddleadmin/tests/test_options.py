@@ -0,0 +1,37 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.test import TestCase
+
+from ..utils.registry import get_registered_modeladmins
+from .wagtail_hooks import BookModelAdmin
+
+
+class TestLazyConstruction(TestCase):
+
+    def test_helpers_and_actions_created_when_needed(self):
+        model_admin = BookModelAdmin()
+        for name in (
+            'permission_helper', 'url_helper', 'model_name_singular',
+            '_actions',
+        ):
+            self.assertNotIn(name, model_admin.__dict__)
+
+        self.assertEqual(
+            model_admin.url_helper.index_url, '/admin/waddleadmin_test/book/')
+        self.assertNotIn('_actions', model_admin.__dict__)
+
+    def test_url_registration(self):
+        registered = [
+            obj for obj in get_registered_modeladmins()
+            if type(obj) is BookModelAdmin
+        ][0]
+        model_admin = BookModelAdmin()
+
+        urls = model_admin.get_admin_urls_for_registration()
+
+        self.assertEqual(
+            sorted(url.name for url in urls),
+            sorted(url.name for url in
+                   registered.get_admin_urls_for_registration()))
+        self.assertIn('waddleadmin_test_book_modeladmin_index',
+                      [url.name for url in urls])
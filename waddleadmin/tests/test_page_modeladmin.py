@@ -1,12 +1,22 @@
 from __future__ import absolute_import, unicode_literals
 
+import datetime
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from wagtail.tests.testapp.models import BusinessIndex, EventCategory, EventPage
+from wagtail.tests.testapp.models import (
+    BusinessIndex, EventCategory, EventPage, SimplePage, SingleEventPage)
 from wagtail.tests.utils import WagtailTestUtils
-from wagtail.wagtailcore.models import GroupPagePermission, Page
+from wagtail.wagtailcore.models import (
+    GroupPagePermission, Page, Site)
+
+from ..utils.pages import get_site_root_paths, invalidate_site_root_paths
+from .utils import QueryBudgetTestMixin
+from .wagtail_hooks import BusinessChildAdmin, EventPageAdmin
 
 
 class TestIndexView(TestCase, WagtailTestUtils):
@@ -16,6 +26,11 @@ class TestIndexView(TestCase, WagtailTestUtils):
     def setUp(self):
         self.login()
 
+    def tearDown(self):
+        # Sites created by tests are removed by rolling back the transaction,
+        # which doesn't send signals
+        invalidate_site_root_paths()
+
     def get(self, **params):
         return self.client.get('/admin/tests/eventpage/', params)
 
@@ -58,6 +73,77 @@ class TestIndexView(TestCase, WagtailTestUtils):
         # There should still be four results
         self.assertEqual(response.context['result_count'], 4)
 
+    def add_single_event_page(self, title):
+        parent = Page.objects.get(id=3)
+        return parent.add_child(instance=SingleEventPage(
+            title=title, date_from=datetime.date(2015, 1, 1),
+            audience='public', location='The moon', cost='Free'))
+
+    def test_specific_results(self):
+        page = self.add_single_event_page("Single event")
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        results = dict(
+            (obj.pk, obj) for obj in response.context['object_list'])
+        self.assertIsInstance(results[page.pk], SingleEventPage)
+        self.assertIs(type(results[4]), EventPage)
+
+    def test_specific_results_query_count(self):
+        self.add_single_event_page("Single event")
+        self.get()
+        with CaptureQueriesContext(connection) as ctx:
+            self.get()
+        num_queries = len(ctx.captured_queries)
+
+        # Specific pages and their parents are fetched for all rows at once
+        self.add_single_event_page("Another single event")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get()
+        self.assertEqual(response.context['result_count'], 6)
+        self.assertEqual(len(ctx.captured_queries), num_queries)
+
+    def test_view_live_urls(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'href="/events/christmas/"')
+
+    def test_view_live_urls_for_other_sites(self):
+        Site.objects.create(
+            hostname='events.example.com', port=80, root_page_id=3)
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, 'href="http://events.example.com/christmas/"')
+
+    def test_site_root_paths_invalidated(self):
+        self.assertEqual(len(get_site_root_paths()), 1)
+        site = Site.objects.create(
+            hostname='events.example.com', port=80, root_page_id=3)
+        self.assertEqual(get_site_root_paths()[0], (
+            site.id, '/home/events/', 'http://events.example.com'))
+
+        # Changing the slug of a site's root page changes its root path
+        root_page = Page.objects.get(id=3)
+        root_page.slug = 'whats-on'
+        root_page.save()
+        self.assertEqual(get_site_root_paths()[0][1], '/home/whats-on/')
+
+        site.delete()
+        self.assertEqual(len(get_site_root_paths()), 1)
+
+    def test_page_save_doesnt_query_sites(self):
+        get_site_root_paths()
+        page = Page.objects.get(id=4)
+        with CaptureQueriesContext(connection) as context:
+            page.save()
+        self.assertFalse(any(
+            'wagtailcore_site' in query['sql']
+            for query in context.captured_queries
+        ))
+
 
 class TestExcludeFromExplorer(TestCase, WagtailTestUtils):
     fixtures = ['test_specific.json']
@@ -142,6 +228,43 @@ class TestInspectView(TestCase, WagtailTestUtils):
         response = self.get(4)
         self.assertContains(response, '<dd>Free, Child-friendly</dd>', html=True)
 
+    def test_manytomany_limit(self):
+        eventpage = EventPage.objects.get(pk=4)
+        eventpage.categories = [
+            EventCategory.objects.create(name=name)
+            for name in ('Free', 'Child-friendly', 'Outdoor')
+        ]
+        eventpage.save()
+        EventPageAdmin.inspect_view_related_limit = 2
+        try:
+            response = self.get(4)
+        finally:
+            EventPageAdmin.inspect_view_related_limit = 20
+        self.assertContains(
+            response, '<dd>Free, Child-friendly and 1 more</dd>', html=True)
+
+    def test_related_query_count(self):
+        """
+        The number of queries shouldn't depend on the number of related
+        objects
+        """
+        eventpage = EventPage.objects.get(pk=4)
+        eventpage.categories = [EventCategory.objects.create(name='Free')]
+        eventpage.save()
+        with CaptureQueriesContext(connection) as context:
+            self.get(4)
+        initial_count = len(context.captured_queries)
+
+        eventpage.categories = [
+            EventCategory.objects.create(name='Category %s' % i)
+            for i in range(10)
+        ]
+        eventpage.save()
+        with CaptureQueriesContext(connection) as context:
+            response = self.get(4)
+        self.assertEqual(len(context.captured_queries), initial_count)
+        self.assertContains(response, 'Category 9')
+
     def test_false_values_displayed(self):
         """
         Boolean fields with False values should display False, rather than the
@@ -204,6 +327,140 @@ class TestDeleteView(TestCase, WagtailTestUtils):
         self.assertRedirects(response, '%s?next=%s' % (expected_path, expected_next_path))
 
 
+class TestRevisionsIndexView(TestCase, WagtailTestUtils):
+    # wagtail/tests/testapp/fixtures/test_specific.json
+    fixtures = ['test_specific.json']
+
+    def setUp(self):
+        self.user = self.login()
+        self.page = EventPage.objects.get(id=4)
+        self.revisions = []
+        for i in range(5):
+            self.page.title = "Christmas %d" % i
+            self.revisions.append(self.page.save_revision(user=self.user))
+        # Newest first
+        self.revisions.reverse()
+
+    def get(self, **params):
+        return self.client.get(
+            '/admin/tests/eventpage/revisions_index/4/', params)
+
+    def test_simple(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        items = response.context['items']
+        self.assertEqual(
+            [item['revision'].pk for item in items],
+            [revision.pk for revision in self.revisions])
+        self.assertTrue(items[0]['is_latest'])
+        self.assertFalse(items[1]['is_latest'])
+
+        # Each revision is compared with the one before it
+        self.assertEqual(
+            items[0]['compare_url'],
+            '/admin/tests/eventpage/revisions_compare/4/%d/%d/' % (
+                self.revisions[1].pk, self.revisions[0].pk))
+        self.assertIsNone(items[-1]['compare_url'])
+
+    def test_content_not_loaded(self):
+        response = self.get()
+
+        for item in response.context['items']:
+            self.assertIn(
+                'content_json', item['revision'].get_deferred_fields())
+
+    def test_keyset_pagination(self):
+        EventPageAdmin.revisions_per_page = 2
+        try:
+            response = self.get()
+            page_obj = response.context['page_obj']
+            first_items = response.context['items']
+            response = self.get(c=page_obj.next_cursor)
+        finally:
+            del EventPageAdmin.revisions_per_page
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(page_obj.has_next())
+        # The revision before the last on the page is looked up
+        self.assertEqual(
+            first_items[-1]['compare_url'],
+            '/admin/tests/eventpage/revisions_compare/4/%d/%d/' % (
+                self.revisions[2].pk, self.revisions[1].pk))
+        self.assertEqual(
+            [item['revision'].pk for item in response.context['items']],
+            [self.revisions[2].pk, self.revisions[3].pk])
+        self.assertFalse(response.context['items'][0]['is_latest'])
+
+    def test_query_count_independent_of_page_size(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.get()
+        num_queries = len(ctx.captured_queries)
+
+        for i in range(5):
+            self.page.save_revision(user=self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get()
+        self.assertEqual(len(response.context['items']), 10)
+        self.assertEqual(len(ctx.captured_queries), num_queries)
+
+    def test_button_url(self):
+        model_admin = self.get().context['view'].model_admin
+
+        self.assertEqual(
+            model_admin.url_helper.get_action_url('revisions_index', 4),
+            '/admin/tests/eventpage/revisions_index/4/')
+
+
+class TestRevisionsCompareView(TestCase, WagtailTestUtils):
+    # wagtail/tests/testapp/fixtures/test_specific.json
+    fixtures = ['test_specific.json']
+
+    def setUp(self):
+        user = self.login()
+        page = EventPage.objects.get(id=4)
+        page.title = "Christmas (before)"
+        self.revision_a = page.save_revision(user=user)
+        page.title = "Christmas (after)"
+        self.revision_b = page.save_revision(user=user)
+
+    def get(self, revision_id_a, revision_id_b, page_id=4):
+        return self.client.get(
+            '/admin/tests/eventpage/revisions_compare/%d/%d/%d/' % (
+                page_id, revision_id_a, revision_id_b))
+
+    def test_simple(self):
+        response = self.get(self.revision_a.pk, self.revision_b.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'before')
+        self.assertContains(response, 'after')
+
+    def test_comparison_cached(self):
+        response = self.get(self.revision_a.pk, self.revision_b.pk)
+        model_admin = response.context['view'].model_admin
+        cache = model_admin.get_revisions_diff_cache()
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.get(self.revision_a.pk, self.revision_b.pk)
+        first_count = len(ctx.captured_queries)
+        self.assertEqual(len(cache), 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get(self.revision_a.pk, self.revision_b.pk)
+        self.assertLess(len(ctx.captured_queries), first_count)
+        self.assertContains(response, 'after')
+
+    def test_revision_of_other_page(self):
+        other_page = EventPage.objects.exclude(id=4).first()
+        other_revision = other_page.save_revision()
+
+        response = self.get(self.revision_a.pk, other_revision.pk)
+
+        self.assertEqual(response.status_code, 404)
+
+
 class TestChooseParentView(TestCase, WagtailTestUtils):
     # wagtail/tests/testapp/fixtures/test_specific.json
     fixtures = ['test_specific.json']
@@ -230,6 +487,104 @@ class TestChooseParentView(TestCase, WagtailTestUtils):
         expected_next_path = '/admin/tests/eventpage/'
         self.assertRedirects(response, '%s?next=%s' % (expected_path, expected_next_path))
 
+    def test_post_invalid_parent(self):
+        response = self.client.post('/admin/tests/eventpage/choose_parent/', {
+            'parent_page': 9999,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+
+    def test_browse_from_top(self):
+        # Superusers can add event pages anywhere, including below the root
+        response = self.client.get('/admin/tests/eventpage/choose_parent/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['browse_page'])
+        items = response.context['items']
+        self.assertEqual([item['page'].pk for item in items], [1])
+        self.assertTrue(items[0]['can_choose'])
+        self.assertTrue(items[0]['can_browse'])
+
+    def test_browse_children(self):
+        response = self.client.get(
+            '/admin/tests/eventpage/choose_parent/', {'parent': 2})
+
+        self.assertEqual(response.status_code, 200)
+        pks = [item['page'].pk for item in response.context['items']]
+        self.assertIn(3, pks)
+        self.assertNotIn(4, pks)
+        self.assertContains(response, 'name="parent_page" value="3"')
+
+    def test_browse_pagination(self):
+        EventPageAdmin.choose_parent_per_page = 1
+        try:
+            response = self.client.get(
+                '/admin/tests/eventpage/choose_parent/',
+                {'parent': 2, 'p': 2})
+        finally:
+            del EventPageAdmin.choose_parent_per_page
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(len(response.context['items']), 1)
+
+    def test_search(self):
+        response = self.client.get(
+            '/admin/tests/eventpage/choose_parent/', {'q': 'Christmas'})
+
+        self.assertEqual(response.status_code, 200)
+        items = response.context['items']
+        self.assertEqual([item['page'].pk for item in items], [4])
+        self.assertEqual(
+            items[0]['ancestor_titles'],
+            ["Welcome to the Wagtail test site!", "Events"])
+
+    def test_search_limited_to_valid_parents(self):
+        # Matching pages that can't be chosen shouldn't use up the limit
+        homepage = Page.objects.get(url_path='/home/')
+        for i in range(5):
+            homepage.add_child(instance=SimplePage(
+                title='Business news %s' % i, content='News'))
+        indexes = [
+            homepage.add_child(instance=BusinessIndex(
+                title='Business index %s' % i))
+            for i in range(2)
+        ]
+        BusinessChildAdmin.choose_parent_search_limit = 2
+        try:
+            response = self.client.get(
+                '/admin/tests/businesschild/choose_parent/', {'q': 'Business'})
+        finally:
+            del BusinessChildAdmin.choose_parent_search_limit
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(item['page'].pk for item in response.context['items']),
+            sorted(index.pk for index in indexes)
+        )
+
+    def test_ajax(self):
+        response = self.client.get(
+            '/admin/tests/eventpage/choose_parent/', {'parent': 2},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(
+            response, 'waddleadmin/includes/choose_parent_results.html')
+        self.assertTemplateNotUsed(response, 'wagtailadmin/base.html')
+
+    def test_one_parent_exists(self):
+        homepage = Page.objects.get(url_path='/home/')
+        business_index = BusinessIndex(title='Business Index')
+        homepage.add_child(instance=business_index)
+
+        response = self.client.get('/admin/tests/businesschild/choose_parent/')
+
+        expected_path = '/admin/pages/add/tests/businesschild/%d/' % business_index.pk
+        expected_next_path = '/admin/tests/businesschild/'
+        self.assertRedirects(response, '%s?next=%s' % (expected_path, expected_next_path))
+
 
 class TestChooseParentViewForNonSuperuser(TestCase, WagtailTestUtils):
     # wagtail/tests/testapp/fixtures/test_specific.json
@@ -271,6 +626,9 @@ class TestChooseParentViewForNonSuperuser(TestCase, WagtailTestUtils):
         self.assertContains(response, 'Public Business Index')
         self.assertNotContains(response, 'Private Business Index')
 
+        # Browsing starts where the user's valid parents are
+        self.assertEqual(response.context['browse_page'].url_path, '/home/')
+
 
 class TestEditorAccess(TestCase):
     # wagtail/tests/testapp/fixtures/test_specific.json
@@ -312,3 +670,43 @@ class TestModeratorAccess(TestCase):
     def test_delete_permitted(self):
         response = self.client.get('/admin/tests/eventpage/delete/4/')
         self.assertEqual(response.status_code, self.expected_status_code)
+
+
+class TestQueryBudgets(QueryBudgetTestMixin, TestCase, WagtailTestUtils):
+    # wagtail/tests/testapp/fixtures/test_specific.json
+    fixtures = ['test_specific.json']
+    rows = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        parent = Page.objects.get(id=3)
+        for i in range(cls.rows):
+            parent.add_child(instance=EventPage(
+                title='Event %s' % i, date_from=datetime.date(2017, 1, 1),
+                audience='public', location='The moon', cost='Free',
+                live=bool(i % 2)))
+
+    def setUp(self):
+        self.login()
+        self.model_admin = EventPageAdmin()
+
+    def tearDown(self):
+        invalidate_site_root_paths()
+
+    def test_index(self):
+        with self.assertWithinQueryBudget(self.model_admin, 'index'):
+            response = self.client.get('/admin/tests/eventpage/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['result_count'], EventPage.objects.count())
+
+    def test_inspect(self):
+        with self.assertWithinQueryBudget(self.model_admin, 'inspect'):
+            response = self.client.get('/admin/tests/eventpage/inspect/4/')
+
+        self.assertEqual(response.status_code, 200)
+
+
+class TestQueryBudgetsWithManyRows(TestQueryBudgets):
+    rows = 1000
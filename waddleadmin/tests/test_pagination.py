@@ -0,0 +1,154 @@
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+
+from django.db.models import Max
+from django.test import TestCase
+from django.utils import timezone
+
+from wagtail.tests.utils import WagtailTestUtils
+from wagtail.wagtailcore.models import Page, PageRevision
+
+from waddleadmin.pagination import (
+    KeysetPaginator, NEXT, PREVIOUS, decode_cursor, encode_cursor)
+
+from .models import Author, Book
+from .wagtail_hooks import AuthorModelAdmin
+
+
+class TestCursorEncoding(TestCase):
+
+    def test_round_trip(self):
+        values = ['Tolkien', datetime.date(1892, 1, 3), 1]
+        cursor = encode_cursor(NEXT, values)
+        self.assertEqual(
+            decode_cursor(cursor), (NEXT, ['Tolkien', '1892-01-03', 1]))
+
+    def test_datetimes_keep_microseconds(self):
+        value = datetime.datetime(2017, 6, 1, 12, 30, 15, 123456)
+        direction, values = decode_cursor(encode_cursor(NEXT, [value]))
+        self.assertEqual(values, ['2017-06-01T12:30:15.123456'])
+
+    def test_invalid_cursors(self):
+        for cursor in ('', 'x123', 'n!!!', encode_cursor(PREVIOUS, 1)):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+
+class TestKeysetPaginator(TestCase):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        for i in range(10):
+            Book.objects.create(author_id=4, title='Book %s' % (i % 3))
+        self.queryset = Book.objects.order_by('title')
+        self.expected = list(self.queryset.order_by('title', 'pk'))
+
+    def test_pk_added_to_ordering(self):
+        paginator = KeysetPaginator(self.queryset, 5)
+        self.assertEqual(
+            paginator.ordering, [('title', False), ('pk', False)])
+
+    def test_unsupported_ordering(self):
+        paginator = KeysetPaginator(Book.objects.order_by('?'), 5)
+        self.assertFalse(paginator.is_supported)
+        paginator = KeysetPaginator(Book.objects.order_by('author'), 5)
+        self.assertFalse(paginator.is_supported)
+        # NULL values can't be seeked past
+        paginator = KeysetPaginator(
+            Book.objects.order_by('cover_image__id'), 5)
+        self.assertFalse(paginator.is_supported)
+        paginator = KeysetPaginator(
+            Author.objects.annotate(last=Max('book__pk')).order_by('last'), 5)
+        self.assertFalse(paginator.is_supported)
+
+    def test_forwards_and_backwards(self):
+        paginator = KeysetPaginator(self.queryset, 5)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual(len(pages), 3)
+        self.assertFalse(pages[0].has_previous())
+        self.assertEqual(
+            [obj for page in pages for obj in page], self.expected)
+
+        page = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(list(page), list(pages[-2]))
+        self.assertTrue(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_invalid_cursor_gives_first_page(self):
+        paginator = KeysetPaginator(self.queryset, 5)
+        self.assertEqual(list(paginator.page('rubbish')), self.expected[:5])
+
+
+class TestKeysetPaginationIndexView(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def setUp(self):
+        self.login()
+        AuthorModelAdmin.keyset_pagination_enabled = True
+        AuthorModelAdmin.list_per_page = 10
+        for i in range(30):
+            Author.objects.create(
+                name='Author %s' % i,
+                date_of_birth=datetime.date(1950, 1, 1)
+            )
+
+    def tearDown(self):
+        AuthorModelAdmin.keyset_pagination_enabled = False
+        del AuthorModelAdmin.list_per_page
+
+    def get(self, **params):
+        return self.client.get('/admin/waddleadmin_test/author/', params)
+
+    def test_navigation(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['paginator'].keyset)
+        page_obj = response.context['page_obj']
+        self.assertContains(response, page_obj.next_cursor)
+        first_page = list(response.context['object_list'])
+
+        response = self.get(c=page_obj.next_cursor)
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context['page_obj']
+        self.assertTrue(page_obj.has_previous())
+        self.assertTrue(set(page_obj).isdisjoint(first_page))
+
+        response = self.get(c=page_obj.previous_cursor)
+        self.assertEqual(list(response.context['object_list']), first_page)
+
+    def test_search_and_ordering_preserved(self):
+        response = self.get(q='Author', o='0')
+        page_obj = response.context['page_obj']
+        self.assertContains(response, 'q=Author')
+        response = self.get(q='Author', o='0', c=page_obj.next_cursor)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(
+            author.name.startswith('Author')
+            for author in response.context['object_list']
+        ))
+        # The current cursor shouldn't be carried through to other links
+        self.assertNotContains(response, page_obj.next_cursor)
+
+
+class TestKeysetPaginatorDatetimes(TestCase):
+
+    def test_sub_millisecond_differences(self):
+        page = Page.objects.get(depth=1)
+        created_at = timezone.now().replace(microsecond=0)
+        for i in range(6):
+            PageRevision.objects.create(
+                page=page, content_json='{}', created_at=created_at +
+                datetime.timedelta(microseconds=i * 100)
+            )
+        queryset = PageRevision.objects.filter(page=page)
+        paginator = KeysetPaginator(queryset, 2, ['-created_at'])
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual(
+            [obj for page_obj in pages for obj in page_obj],
+            list(queryset.order_by('-created_at', 'pk'))
+        )
@@ -0,0 +1,42 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from ..utils.profiling import get_module_names, measure_import_time
+from .wagtail_hooks import BookModelAdmin
+
+
+class TestProfileModelAdminsCommand(TestCase):
+
+    def call_command(self, **options):
+        out = StringIO()
+        call_command('profile_modeladmins', stdout=out, **options)
+        return json.loads(out.getvalue())
+
+    def test_modeladmins(self):
+        report = self.call_command(skip_imports=True, repeat=1)
+
+        self.assertNotIn('imports', report)
+        results = dict(
+            (result['name'], result) for result in report['modeladmins'])
+        self.assertEqual(report['modeladmin_count'], len(results))
+        result = results['waddleadmin.tests.wagtail_hooks.BookModelAdmin']
+        self.assertEqual(result['model'], 'waddleadmin_test.Book')
+        self.assertEqual(
+            result['url_count'],
+            len(BookModelAdmin().get_admin_urls_for_registration()))
+        self.assertEqual(
+            report['totals']['url_count'],
+            sum(result['url_count'] for result in results.values()))
+
+    def test_import_time(self):
+        elapsed, module_count = measure_import_time('waddleadmin.pagination')
+
+        self.assertGreater(elapsed, 0)
+        self.assertGreaterEqual(module_count, 1)
+        self.assertIn('waddleadmin.options', get_module_names())
+        self.assertNotIn('waddleadmin.tests.models', get_module_names())
@@ -0,0 +1,134 @@
+from __future__ import absolute_import, unicode_literals
+
+import mock
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from wagtail.tests.utils import WagtailTestUtils
+
+from ..utils.concurrency import run_concurrently
+from ..utils.queries import QueryBudgetExceeded, QueryRecorder
+from .models import Author, Book
+from .utils import QueryBudgetTestMixin
+from .wagtail_hooks import AuthorModelAdmin, BookModelAdmin
+
+
+class TestQueryBudgets(QueryBudgetTestMixin, TestCase, WagtailTestUtils):
+    rows = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        author_model = AuthorModelAdmin.model
+        author_model.objects.bulk_create([
+            author_model(name='Author %s' % i, date_of_birth='1970-01-01')
+            for i in range(cls.rows)
+        ])
+        author_ids = list(author_model.objects.values_list('pk', flat=True))
+        BookModelAdmin.model.objects.bulk_create([
+            BookModelAdmin.model(
+                author_id=author_ids[i % len(author_ids)],
+                title='Book %s' % i)
+            for i in range(cls.rows)
+        ])
+
+    def setUp(self):
+        self.login()
+
+    def assertViewWithinBudget(self, model_admin, codename, url):
+        with self.assertWithinQueryBudget(model_admin, codename):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_author_index(self):
+        model_admin = AuthorModelAdmin()
+        self.assertViewWithinBudget(
+            model_admin, 'index', model_admin.url_helper.index_url)
+
+    def test_author_inspect(self):
+        model_admin = AuthorModelAdmin()
+        obj = model_admin.model.objects.first()
+        self.assertViewWithinBudget(
+            model_admin, 'inspect',
+            model_admin.url_helper.get_action_url('inspect', obj.pk))
+
+    def test_book_index(self):
+        model_admin = BookModelAdmin()
+        self.assertViewWithinBudget(
+            model_admin, 'index', model_admin.url_helper.index_url)
+
+    def test_book_inspect(self):
+        model_admin = BookModelAdmin()
+        obj = model_admin.model.objects.first()
+        self.assertViewWithinBudget(
+            model_admin, 'inspect',
+            model_admin.url_helper.get_action_url('inspect', obj.pk))
+
+    def test_budget_exceeded(self):
+        model_admin = BookModelAdmin()
+        with mock.patch.object(model_admin, 'query_budgets', {'index': 1}):
+            with self.assertRaises(QueryBudgetExceeded) as context:
+                self.assertViewWithinBudget(
+                    model_admin, 'index', model_admin.url_helper.index_url)
+        self.assertIn("The 'index' view for BookModelAdmin made",
+                      str(context.exception))
+
+    def test_action_budget_preferred(self):
+        model_admin = BookModelAdmin()
+        self.assertEqual(model_admin.get_query_budget('index'), 25)
+        model_admin.get_action('index').query_budget = 5
+        self.assertEqual(model_admin.get_query_budget('index'), 5)
+        self.assertIsNone(model_admin.get_query_budget('delete'))
+
+
+class TestQueryBudgetsWithManyRows(TestQueryBudgets):
+    rows = 1000
+
+
+class TestQueryRecorderThreads(TransactionTestCase):
+    fixtures = ['waddleadmin_test_simple.json']
+
+    def test_queries_in_pool_threads_recorded(self):
+        with QueryRecorder(capture_stacks=False) as recorder:
+            results = run_concurrently([
+                lambda: Book.objects.count(),
+                lambda: Author.objects.count(),
+            ])
+
+        self.assertEqual(results, [4, 4])
+        self.assertEqual(len(recorder), 2)
+
+
+@override_settings(MIDDLEWARE_CLASSES=settings.MIDDLEWARE_CLASSES + (
+    'waddleadmin.middleware.QueryBudgetMiddleware',
+))
+class TestQueryBudgetMiddleware(TestCase, WagtailTestUtils):
+    fixtures = ['waddleadmin_test_simple.json']
+    url = '/admin/waddleadmin_test/book/'
+
+    def setUp(self):
+        self.login()
+
+    def test_within_budget(self):
+        with mock.patch('waddleadmin.middleware.logger') as logger:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(logger.warning.called)
+
+    def test_budget_exceeded(self):
+        with mock.patch.object(BookModelAdmin, 'query_budgets', {'index': 1}):
+            with mock.patch('waddleadmin.middleware.logger') as logger:
+                response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(logger.warning.call_count, 1)
+        message = str(logger.warning.call_args[0][1])
+        self.assertIn("The 'index' view for BookModelAdmin made", message)
+        # The stack for each query is included
+        self.assertIn('File ', message)
+
+    @override_settings(WADDLEADMIN_QUERY_BUDGET_RAISE=True)
+    def test_budget_exceeded_raises(self):
+        with mock.patch.object(BookModelAdmin, 'query_budgets', {'index': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(self.url)
@@ -0,0 +1,30 @@
+from __future__ import absolute_import, unicode_literals
+
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+
+from waddleadmin.utils.queries import QueryRecorder, check_query_budget
+
+
+class QueryBudgetTestMixin(object):
+    """
+    For `TestCase` subclasses, to check that views stay within the query
+    budgets set on `ModelAdmin` classes (or their action definitions)
+    """
+
+    @contextmanager
+    def assertWithinQueryBudget(self, model_admin, codename):
+        """
+        Fail with `QueryBudgetExceeded` (listing each query, and where it
+        was made from) if more queries are made within the block than the
+        budget for action `codename` of `model_admin` allows. Unlike
+        `QueryBudgetMiddleware`, queries made by middleware are included.
+        """
+        if model_admin.get_query_budget(codename) is None:
+            raise ImproperlyConfigured(
+                "%s has no query budget for the '%s' action" % (
+                    model_admin.__class__.__name__, codename))
+        with QueryRecorder() as recorder:
+            yield recorder
+        check_query_budget(model_admin, codename, recorder)
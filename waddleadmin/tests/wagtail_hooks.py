@@ -1,7 +1,12 @@
 from __future__ import absolute_import, unicode_literals
 
+from django.db.models import Count
 from wagtail.contrib.modeladmin.options import (
-    ModelAdminGroup, ThumbnailMixin, modeladmin_register)
+    ModelAdminGroup, modeladmin_register)
+from waddleadmin.columns import AnnotatedColumn
+from waddleadmin.decorators import (
+    prefetch_related, requires_fields, select_related)
+from waddleadmin.mixins import ThumbnailMixin
 from waddleadmin.options import ModelAdmin
 from wagtail.contrib.modeladmin.views import CreateView
 from wagtail.tests.testapp.models import BusinessChild, EventPage, SingleEventPage
@@ -13,25 +18,34 @@ from .models import Author, Book, Publisher, Token, VenuePage
 class AuthorModelAdmin(ModelAdmin):
     model = Author
     menu_order = 200
-    list_display = ('name', 'first_book', 'last_book', 'date_of_birth')
+    list_display = (
+        'name', 'first_book', 'last_book', 'book_count', 'date_of_birth'
+    )
     list_filter = ('date_of_birth', )
     search_fields = ('name', )
     inspect_view_enabled = True
     inspect_view_fields = ('name', )
+    query_budgets = {'index': 25, 'inspect': 20}
 
+    # For testing use of annotated columns in list_display
+    book_count = AnnotatedColumn(Count('book', distinct=True), 'books')
+
+    @prefetch_related('book_set')
     def last_book(self, obj):
         # For testing use of modeladmin methods in list_display
-        book = obj.book_set.last()
-        if book:
-            return book.title
+        books = sorted(obj.book_set.all(), key=lambda book: book.pk)
+        if books:
+            return books[-1].title
         return ''
 
+    @requires_fields()
     def get_extra_class_names_for_field_col(self, obj, field_name):
         class_names = super(AuthorModelAdmin, self).get_extra_class_names_for_field_col(field_name, obj)
         if field_name == 'first_book':
             class_names.append('for-author-%s' % obj.pk)
         return class_names
 
+    @requires_fields()
     def get_extra_attrs_for_field_col(self, obj, field_name):
         attrs = super(AuthorModelAdmin, self).get_extra_attrs_for_field_col(field_name, obj)
         if field_name == 'last_book':
@@ -49,7 +63,10 @@ class BookModelAdmin(ThumbnailMixin, ModelAdmin):
     inspect_view_enabled = True
     inspect_view_fields_exclude = ('title', )
     thumb_image_field_name = 'cover_image'
+    search_mode = 'wagtail'
+    query_budgets = {'index': 25, 'inspect': 20}
 
+    @select_related('author')
     def get_extra_attrs_for_row(self, obj, context):
         return {
             'data-author-yob': obj.author.date_of_birth.year,
@@ -79,6 +96,7 @@ class EventPageAdmin(ModelAdmin):
     search_fields = ('title', )
     inspect_view_enabled = True
     inspect_view_fields_exclude = ('feed_image', )
+    query_budgets = {'index': 30, 'inspect': 25}
 
 
 class SingleEventPageAdmin(EventPageAdmin):
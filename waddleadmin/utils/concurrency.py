@@ -0,0 +1,66 @@
+from __future__ import absolute_import, unicode_literals
+
+import threading
+from multiprocessing.pool import ThreadPool
+
+from django.db import close_old_connections, connections
+
+from .queries import record_in_other_threads
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_query_pool(processes=8):
+    """
+    Return a process-wide pool of threads for running database queries.
+    Only the value of `processes` from the first call is used.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(processes)
+    return _pool
+
+
+def can_run_concurrently(using='default'):
+    """
+    Return a boolean indicating whether queries for the database `using`
+    can be run in other threads. Threads get their own connections, so
+    wouldn't see uncommitted changes from inside a transaction.
+    """
+    return not connections[using].in_atomic_block
+
+
+def _call_in_thread(func, semaphore):
+    # Each pool thread keeps its own connections between calls, closing them
+    # in the same way Django does between requests (when unusable, or older
+    # than `CONN_MAX_AGE`), rather than after every call
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+        semaphore.release()
+
+
+def run_concurrently(funcs, using='default', max_threads=4):
+    """
+    Call each of `funcs` (callables taking no arguments) in a separate
+    thread from the query pool, and return a list of their results, in the
+    same order. Exceptions are re-raised in the calling thread. The pool is
+    shared by all requests, so no more than `max_threads` of `funcs` are
+    run at once. If queries for `using` can't be run concurrently, `funcs`
+    are called one by one in the calling thread instead.
+    """
+    if len(funcs) < 2 or max_threads < 2 or not can_run_concurrently(using):
+        return [func() for func in funcs]
+    pool = get_query_pool()
+    semaphore = threading.BoundedSemaphore(max_threads)
+    results = []
+    for func in funcs:
+        # Released by `_call_in_thread()` once `func` returns
+        semaphore.acquire()
+        results.append(pool.apply_async(
+            _call_in_thread, (record_in_other_threads(func), semaphore)))
+    return [result.get() for result in results]
@@ -0,0 +1,109 @@
+from __future__ import absolute_import, unicode_literals
+
+import threading
+from collections import OrderedDict
+from functools import wraps
+from inspect import isgeneratorfunction
+from timeit import default_timer
+
+# `CallRecorder` instances that are recording calls for the current thread
+_local = threading.local()
+
+
+def _get_active_recorders():
+    if not hasattr(_local, 'recorders'):
+        _local.recorders = []
+    return _local.recorders
+
+
+class CallRecorder(object):
+    """
+    A context manager that counts calls to functions decorated with
+    `instrument()` made by the current thread while active, and the total
+    time spent in them. Recorders can be nested.
+    """
+
+    def __init__(self):
+        # Keyed by name, in the order first called
+        self.stats = OrderedDict()
+
+    def __enter__(self):
+        _get_active_recorders().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        _get_active_recorders().remove(self)
+
+    def add(self, name, seconds, calls=1):
+        try:
+            stats = self.stats[name]
+        except KeyError:
+            stats = self.stats[name] = {'calls': 0, 'ms': 0.0}
+        stats['calls'] += calls
+        stats['ms'] += seconds * 1000
+
+    def get_results(self):
+        """
+        Return a list of (name, calls, milliseconds) tuples
+        """
+        return [
+            (name, stats['calls'], stats['ms'])
+            for name, stats in self.stats.items()
+        ]
+
+
+def _record(name, seconds, calls=1):
+    for recorder in _get_active_recorders():
+        recorder.add(name, seconds, calls)
+
+
+def instrument(name):
+    """
+    A decorator that makes calls to the decorated function (or method) count
+    towards `name` for any active `CallRecorder`. When none are active, the
+    only overhead is checking for them. For generator functions, the time
+    taken to produce each item is included.
+    """
+    def decorator(func):
+        if isgeneratorfunction(func):
+            @wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                calls = 1
+                start = default_timer()
+                generator = func(*args, **kwargs)
+                while True:
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        break
+                    finally:
+                        if _get_active_recorders():
+                            _record(name, default_timer() - start, calls)
+                        calls = 0
+                    yield item
+                    start = default_timer()
+            return generator_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not getattr(_local, 'recorders', None):
+                return func(*args, **kwargs)
+            start = default_timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, default_timer() - start)
+        return wrapper
+    return decorator
+
+
+def get_server_timing_header(recorder):
+    """
+    Return a value for a 'Server-Timing' response header, listing the number
+    of calls and total time for each name recorded by `recorder`, so that
+    they can be seen using browsers' developer tools
+    """
+    return ', '.join(
+        '%s;desc="%s calls";dur=%.3f' % (name, calls, ms)
+        for name, calls, ms in recorder.get_results()
+    )
@@ -0,0 +1,233 @@
+from __future__ import absolute_import, unicode_literals
+
+from collections import OrderedDict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.urlresolvers import reverse
+from django.db.models.signals import post_delete, post_save
+from wagtail.wagtailcore.models import Page, Site
+from wagtail.wagtailcore.utils import WAGTAIL_APPEND_SLASH
+
+# A version number for site root paths is kept in the default cache, so that
+# changes made in one process invalidate the copy held by all of them
+SITE_ROOT_PATHS_VERSION_KEY = 'waddleadmin:site_root_paths_version'
+
+# A (version, site_root_paths, root_page_ids) tuple for this process
+_site_root_paths = None
+
+
+def _copy_cached_values(source, target, attnames=()):
+    # Keep values that were added to `source` by the queryset it came from
+    # (annotations, prefetched objects and related objects from
+    # `select_related()`), so that no further queries are needed
+    for name in attnames:
+        if hasattr(source, name):
+            setattr(target, name, getattr(source, name))
+    if hasattr(source, '_prefetched_objects_cache'):
+        target._prefetched_objects_cache = source._prefetched_objects_cache
+    for field in source._meta.concrete_fields:
+        if not field.is_relation or not hasattr(field, 'get_cache_name'):
+            continue
+        cache_name = field.get_cache_name()
+        if cache_name in source.__dict__:
+            target.__dict__.setdefault(cache_name, source.__dict__[cache_name])
+
+
+def get_specific_pages(pages, attnames=()):
+    """
+    Return a list containing the most specific version of each page in
+    `pages`, in the same order. Pages are fetched with a single query for
+    each type, and pages that are already specific aren't fetched again.
+    Values for `attnames` (e.g. annotations) are copied from the original
+    pages, and the `specific` attribute of the original pages is populated.
+    """
+    pks_by_model = OrderedDict()
+    for page in pages:
+        content_type = ContentType.objects.get_for_id(page.content_type_id)
+        model = content_type.model_class()
+        if model is None or isinstance(page, model):
+            continue
+        pks_by_model.setdefault(model, []).append(page.pk)
+
+    specific_pages = {}
+    for model, pks in pks_by_model.items():
+        for page in model._default_manager.filter(pk__in=pks):
+            specific_pages[page.pk] = page
+
+    result = []
+    for page in pages:
+        specific_page = specific_pages.get(page.pk)
+        if specific_page is None:
+            result.append(page)
+            continue
+        _copy_cached_values(page, specific_page, attnames)
+        page.__dict__['specific'] = specific_page
+        result.append(specific_page)
+    return result
+
+
+def prefetch_parent_pages(pages):
+    """
+    Fetch the parent of each page in `pages` using a single query, and store
+    it, so that it can be retrieved without another query using
+    `get_parent_page()`
+    """
+    steplen = Page.steplen
+    paths = set(page.path[:-steplen] for page in pages if page.depth > 1)
+    parents = {}
+    if paths:
+        parents = dict(
+            (parent.path, parent)
+            for parent in Page.objects.filter(path__in=paths)
+        )
+    for page in pages:
+        page._waddleadmin_parent_page = parents.get(page.path[:-steplen])
+
+
+def get_parent_page(page):
+    """
+    Return the parent of `page`, using the value stored by
+    `prefetch_parent_pages()` if available
+    """
+    parent = getattr(page, '_waddleadmin_parent_page', None)
+    if parent is None:
+        parent = page.get_parent()
+    return parent
+
+
+def invalidate_site_root_paths():
+    """
+    Discard site root paths held by all processes, so that they are fetched
+    from the database again when next needed
+    """
+    global _site_root_paths
+    _site_root_paths = None
+    cache = caches['default']
+    if not cache.add(SITE_ROOT_PATHS_VERSION_KEY, 2, None):
+        try:
+            cache.incr(SITE_ROOT_PATHS_VERSION_KEY)
+        except ValueError:
+            # The key expired since `add()` was called
+            cache.set(SITE_ROOT_PATHS_VERSION_KEY, 2, None)
+
+
+def _invalidate_for_site(sender, instance, **kwargs):
+    invalidate_site_root_paths()
+
+
+def _invalidate_for_page(sender, instance, **kwargs):
+    # Saving a site's root page can change the `url_path` of the site root.
+    # Root page ids are kept with this process's copy of the root paths, so
+    # no queries are needed unless that copy is out of date.
+    if kwargs.get('raw') or not isinstance(instance, Page):
+        return
+    site_root_paths, root_page_ids = _get_site_root_data()
+    if instance.pk in root_page_ids:
+        invalidate_site_root_paths()
+
+
+post_save.connect(
+    _invalidate_for_site, sender=Site,
+    dispatch_uid='waddleadmin_site_root_paths_site_saved')
+post_delete.connect(
+    _invalidate_for_site, sender=Site,
+    dispatch_uid='waddleadmin_site_root_paths_site_deleted')
+# Specific page types are senders, so the handler can't be limited to `Page`
+post_save.connect(
+    _invalidate_for_page, dispatch_uid='waddleadmin_site_root_paths_page_saved')
+
+
+def _get_site_root_data():
+    """
+    Return a (site_root_paths, root_page_ids) tuple, using the values held
+    by this process, unless they have been invalidated
+    """
+    global _site_root_paths
+    version = caches['default'].get(SITE_ROOT_PATHS_VERSION_KEY, 1)
+    cached = _site_root_paths
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+    sites = list(Site.objects.select_related(
+        'root_page').order_by('-root_page__url_path'))
+    result = [
+        (site.id, site.root_page.url_path, site.root_url) for site in sites]
+    root_page_ids = frozenset(site.root_page_id for site in sites)
+    _site_root_paths = (version, result, root_page_ids)
+    return result, root_page_ids
+
+
+def get_site_root_paths(request=None):
+    """
+    Return a list of (site_id, root_path, root_url) tuples, most specific
+    path first, in the same format as `Site.get_site_root_paths()`. Values
+    are fetched from the database once for each process, and kept until a
+    `Site` (or a site's root page) is changed. If `request` is provided,
+    values are also stored on it in the same way as Wagtail, so that
+    `Page.get_url_parts()` can use them.
+    """
+    if request is not None and hasattr(
+        request, '_wagtail_cached_site_root_paths'
+    ):
+        return request._wagtail_cached_site_root_paths
+
+    result = _get_site_root_data()[0]
+    if request is not None:
+        request._wagtail_cached_site_root_paths = result
+    return result
+
+
+def has_custom_url_parts(page):
+    """
+    Return a boolean indicating whether `page` overrides
+    `Page.get_url_parts()` (e.g. to use custom routing), in which case its
+    URL can only be found by calling it
+    """
+    method = type(page).get_url_parts
+    default = Page.get_url_parts
+    return getattr(method, '__func__', method) is not getattr(
+        default, '__func__', default)
+
+
+def get_relative_url(page, request, site_root_paths=None):
+    """
+    Return the same value as `page.relative_url(request.site)`, but using
+    `site_root_paths` (or the values from `get_site_root_paths()`), so that
+    no database or cache lookups are needed. Returns `None` if the page is
+    not routable.
+    """
+    prefetched = getattr(page, '_waddleadmin_relative_url', False)
+    if prefetched is not False:
+        return prefetched
+
+    if site_root_paths is None:
+        site_root_paths = get_site_root_paths(request)
+    current_site = getattr(request, 'site', None)
+    if has_custom_url_parts(page):
+        return page.relative_url(current_site, request=request)
+
+    for site_id, root_path, root_url in site_root_paths:
+        if page.url_path.startswith(root_path):
+            page_path = reverse(
+                'wagtail_serve', args=(page.url_path[len(root_path):], ))
+            if not WAGTAIL_APPEND_SLASH and page_path != '/':
+                page_path = page_path.rstrip('/')
+            if (current_site is not None and site_id == current_site.id) or (
+                len(site_root_paths) == 1
+            ):
+                return page_path
+            return root_url + page_path
+    return None
+
+
+def prefetch_relative_urls(pages, request):
+    """
+    Find URLs for all live pages in `pages`, using site root paths from
+    `get_site_root_paths()`, and store them, so that they can be retrieved
+    using `get_relative_url()`
+    """
+    site_root_paths = get_site_root_paths(request)
+    for page in pages:
+        if getattr(page, 'live', False):
+            page._waddleadmin_relative_url = get_relative_url(
+                page, request, site_root_paths)
@@ -0,0 +1,147 @@
+from __future__ import absolute_import, unicode_literals
+
+import gc
+import json
+import os
+import pkgutil
+import subprocess
+import sys
+from collections import OrderedDict
+from importlib import import_module
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+
+def measure_time(func):
+    """
+    Call `func` and return a (result, milliseconds taken) tuple
+    """
+    start = default_timer()
+    result = func()
+    return result, (default_timer() - start) * 1000
+
+
+def measure_memory(func):
+    """
+    Call `func` and return a (result, bytes) tuple, where bytes is the
+    amount of memory allocated by the call that is still in use afterwards
+    (e.g. by the result). Bytes is `None` if `tracemalloc` isn't available.
+    """
+    if tracemalloc is None:
+        return func(), None
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    try:
+        result = func()
+        gc.collect()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def measure_peak_memory(func):
+    """
+    Call `func` and return a (result, bytes) tuple, where bytes is the
+    highest amount of memory in use at any point during the call, above
+    what was in use beforehand. Bytes is `None` if `tracemalloc` isn't
+    available.
+    """
+    if tracemalloc is None:
+        return func(), None
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    elif hasattr(tracemalloc, 'reset_peak'):
+        # Python 3.9+
+        tracemalloc.reset_peak()
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[1] - before
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def profile_modeladmin_class(model_admin_class, parent=None):
+    """
+    Return an `OrderedDict` of measurements for creating an instance of
+    `model_admin_class`, and registering its URLs. Time and memory are
+    measured separately (using new instances), as tracing memory
+    allocations slows everything down.
+    """
+    instance, init_ms = measure_time(lambda: model_admin_class(parent))
+    urls, urls_ms = measure_time(instance.get_admin_urls_for_registration)
+    instance, init_bytes = measure_memory(lambda: model_admin_class(parent))
+    urls, urls_bytes = measure_memory(instance.get_admin_urls_for_registration)
+    return OrderedDict([
+        ('name', '%s.%s' % (
+            model_admin_class.__module__, model_admin_class.__name__)),
+        ('model', instance.opts.label),
+        ('init_ms', round(init_ms, 3)),
+        ('init_bytes', init_bytes),
+        ('urls_ms', round(urls_ms, 3)),
+        ('urls_bytes', urls_bytes),
+        ('url_count', len(urls)),
+    ])
+
+
+# Run in a fresh interpreter by `measure_import_time()`
+IMPORT_TIME_SCRIPT = """
+import json, sys
+from importlib import import_module
+from timeit import default_timer
+import django
+django.setup()
+before = set(sys.modules)
+start = default_timer()
+import_module(sys.argv[1])
+elapsed = (default_timer() - start) * 1000
+print(json.dumps([elapsed, len(set(sys.modules) - before)]))
+"""
+
+
+def get_module_names(package_name='waddleadmin',
+                     exclude=('tests', 'development', 'management')):
+    """
+    Return a sorted list of the names of all modules in the package
+    `package_name`, except those in (or named) any of `exclude`
+    """
+    package = import_module(package_name)
+    names = [package_name]
+    for importer, name, is_pkg in pkgutil.walk_packages(
+        package.__path__, package_name + '.'
+    ):
+        parts = name.split('.')[1:]
+        if not any(part in exclude for part in parts):
+            names.append(name)
+    return sorted(names)
+
+
+def measure_import_time(module_name, settings_module=None):
+    """
+    Import `module_name` in a new Python process (after setting up Django),
+    and return a tuple of the milliseconds taken, and the number of modules
+    imported as a result (including `module_name` itself). Times include
+    importing any dependencies that weren't already imported by
+    `django.setup()`.
+    """
+    env = dict(os.environ)
+    if settings_module:
+        env['DJANGO_SETTINGS_MODULE'] = settings_module
+    env['PYTHONPATH'] = os.pathsep.join(
+        path for path in [os.getcwd()] + sys.path if path)
+    output = subprocess.check_output(
+        [sys.executable, '-c', IMPORT_TIME_SCRIPT, module_name], env=env)
+    elapsed, module_count = json.loads(output.decode('utf-8').strip())
+    return elapsed, module_count
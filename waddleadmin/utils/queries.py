@@ -0,0 +1,178 @@
+from __future__ import absolute_import, unicode_literals
+
+import os
+import threading
+import traceback
+from functools import wraps
+
+import django
+from django.db import connections
+from django.db.backends.utils import CursorDebugWrapper
+
+_DJANGO_DB_DIR = os.path.dirname(os.path.abspath(django.db.__file__))
+_THIS_FILE = os.path.splitext(os.path.abspath(__file__))[0]
+
+# `QueryRecorder` instances that are recording queries for the current
+# thread (database connections are specific to each thread)
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when the view for a `ModelAdmin` action makes more database
+    queries than the budget for that action allows
+    """
+    pass
+
+
+def _get_active_recorders():
+    if not hasattr(_local, 'recorders'):
+        _local.recorders = []
+    return _local.recorders
+
+
+def _is_internal_frame(filename):
+    filename = os.path.abspath(filename)
+    return (
+        filename.startswith(_DJANGO_DB_DIR) or
+        os.path.splitext(filename)[0] == _THIS_FILE
+    )
+
+
+class RecordingCursorWrapper(CursorDebugWrapper):
+    """
+    Passes details of each query to any active `QueryRecorder`, after
+    Django has added it to `connection.queries`
+    """
+
+    def execute(self, sql, params=None):
+        try:
+            return super(RecordingCursorWrapper, self).execute(sql, params)
+        finally:
+            self.record()
+
+    def executemany(self, sql, param_list):
+        try:
+            return super(RecordingCursorWrapper, self).executemany(
+                sql, param_list)
+        finally:
+            self.record()
+
+    def record(self):
+        query = dict(self.db.queries_log[-1], alias=self.db.alias)
+        stack = None
+        for recorder in _get_active_recorders():
+            if recorder.capture_stacks and stack is None:
+                stack = [
+                    frame for frame in traceback.extract_stack()
+                    if not _is_internal_frame(frame[0])
+                ]
+            recorder.queries.append(
+                dict(query, stack=stack if recorder.capture_stacks else None))
+
+
+class QueryRecorder(object):
+    """
+    A context manager that records the database queries made (using any
+    database) by the current thread while active, including (if
+    `capture_stacks` is `True`) the stack from which each query was made.
+    Recorders can be nested. Queries made in other threads are only
+    recorded for functions wrapped with `record_in_other_threads()`.
+    """
+
+    def __init__(self, capture_stacks=True):
+        self.capture_stacks = capture_stacks
+        self.queries = []
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __enter__(self):
+        recorders = _get_active_recorders()
+        if not recorders:
+            self.install()
+        recorders.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        recorders = _get_active_recorders()
+        recorders.remove(self)
+        if not recorders:
+            self.uninstall()
+
+    @staticmethod
+    def install():
+        # Make Django log queries for each connection (as it does when
+        # `DEBUG` is `True`), using `RecordingCursorWrapper`
+        _local.saved = []
+        for connection in connections.all():
+            _local.saved.append((
+                connection, connection.force_debug_cursor,
+                connection.__dict__.get('make_debug_cursor')))
+            connection.force_debug_cursor = True
+            connection.make_debug_cursor = (
+                lambda cursor, connection=connection: RecordingCursorWrapper(
+                    cursor, connection))
+
+    @staticmethod
+    def uninstall():
+        for connection, force_debug_cursor, make_debug_cursor in _local.saved:
+            connection.force_debug_cursor = force_debug_cursor
+            if make_debug_cursor is None:
+                del connection.make_debug_cursor
+            else:
+                connection.make_debug_cursor = make_debug_cursor
+        _local.saved = []
+
+    def format_queries(self):
+        """
+        Return a string listing the SQL for each query, followed by the
+        stack from which it was made (if captured)
+        """
+        lines = []
+        for i, query in enumerate(self.queries, 1):
+            lines.append('%s. [%s] %s (%ss)' % (
+                i, query['alias'], query['sql'], query['time']))
+            if query['stack']:
+                lines.extend(
+                    '    ' + line.rstrip('\n').replace('\n', '\n    ')
+                    for line in traceback.format_list(query['stack']))
+        return '\n'.join(lines)
+
+
+def record_in_other_threads(func):
+    """
+    Return a version of `func` that, when called in another thread (e.g. by
+    `run_concurrently()`), records its queries for the `QueryRecorder`
+    instances active in the calling thread, so that they are included in
+    query budget checks
+    """
+    recorders = list(_get_active_recorders())
+    if not recorders:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for recorder in recorders:
+            recorder.__enter__()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            for recorder in reversed(recorders):
+                recorder.__exit__(None, None, None)
+    return wrapper
+
+
+def check_query_budget(model_admin, codename, recorder):
+    """
+    Raise `QueryBudgetExceeded` if `recorder` holds more queries than the
+    budget for the action `codename` of `model_admin`. Does nothing if the
+    action has no budget.
+    """
+    budget = model_admin.get_query_budget(codename)
+    if budget is None or len(recorder) <= budget:
+        return
+    raise QueryBudgetExceeded(
+        "The '%s' view for %s made %s queries, but its budget is %s:\n\n%s"
+        % (codename, model_admin.__class__.__name__, len(recorder), budget,
+           recorder.format_queries()))
@@ -0,0 +1,28 @@
+from __future__ import absolute_import, unicode_literals
+
+from wagtail.contrib.modeladmin.options import ModelAdmin, ModelAdminGroup
+from wagtail.wagtailcore import hooks
+
+
+def get_registered_modeladmins():
+    """
+    Return a list of all `ModelAdmin` instances registered with Wagtail
+    (including those registered as part of a `ModelAdminGroup`).
+
+    modeladmin doesn't keep a registry of its own, so this works by finding
+    the instances referenced by the 'register_admin_urls' hook functions
+    that `ModelAdmin.register_with_wagtail()` creates.
+    """
+    found = []
+    for hook_func in hooks.get_hooks('register_admin_urls'):
+        for cell in getattr(hook_func, '__closure__', None) or ():
+            try:
+                obj = cell.cell_contents
+            except ValueError:
+                # The cell is empty
+                continue
+            if isinstance(obj, ModelAdminGroup):
+                found.extend(obj.modeladmin_instances)
+            elif isinstance(obj, ModelAdmin):
+                found.append(obj)
+    return found
@@ -0,0 +1,1073 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+from collections import OrderedDict
+
+from django.contrib.admin.utils import quote, unquote
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import (
+    Count, Max, Min, QuerySet, prefetch_related_objects)
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Substr
+from django.db.models.fields import FieldDoesNotExist
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.forms.utils import flatatt
+from django.template.loader import get_template, render_to_string
+from django.utils import six, translation
+from django.utils.safestring import mark_safe
+from django.utils.translation import ugettext as _
+from wagtail.contrib.modeladmin.forms import ParentChooserForm
+from wagtail.contrib.modeladmin.templatetags.modeladmin_tags import (
+    items_for_result)
+from wagtail.contrib.modeladmin.views import IndexView as WagtailIndexView
+from wagtail.contrib.modeladmin.views import (
+    ChooseParentView as WagtailChooseParentView,
+    InspectView as WagtailInspectView,
+    InstanceSpecificView as WagtailInstanceSpecificView)
+from wagtail.wagtailcore.models import Page, PageRevision
+from wagtail.wagtailsearch.backends import get_search_backend
+
+from .pagination import NEXT, PREVIOUS, KeysetPaginator
+from .utils.concurrency import run_concurrently
+
+
+class IndexView(WagtailIndexView):
+
+    CURSOR_VAR = 'c'
+    ROWS_PLACEHOLDER = '<!-- waddleadmin:rows -->'
+    row_template_name = 'modeladmin/includes/result_row.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.permission_helper = self.permission_helper.for_request(request)
+        self.cursor = request.GET.get(self.CURSOR_VAR)
+        count_helper_class = self.model_admin.get_count_helper_class()
+        self.count_helper = count_helper_class(self, request)
+        search_helper_class = self.model_admin.get_search_helper_class()
+        self.search_helper = search_helper_class(self, request)
+        self.cache_helper = self.get_cache_helper(request)
+        self.cached_content = None
+        self.facet_helper = None
+        return super(IndexView, self).dispatch(request, *args, **kwargs)
+
+    @property
+    def streaming(self):
+        return self.model_admin.index_view_streaming_enabled
+
+    def get_cache_helper(self, request):
+        # Streamed content can't be captured for caching
+        if not self.model_admin.index_view_cache_timeout or self.streaming:
+            return None
+        cache_helper_class = self.model_admin.get_cache_helper_class()
+        return cache_helper_class(self, request)
+
+    def get_queryset(self, request=None):
+        # The cursor only makes sense for the current set of results, so
+        # shouldn't be preserved in links for ordering, filtering, etc. It
+        # must also be removed before filters are applied
+        self.params.pop(self.CURSOR_VAR, None)
+
+        # Permissions have been checked by now, so cached content can be
+        # used. Filtering and searching can then be skipped entirely
+        if self.cache_helper is not None:
+            self.cached_content = self.cache_helper.get_content()
+            if self.cached_content is not None:
+                self.filter_specs = []
+                self.has_filters = False
+                self.remaining_lookup_params = {}
+                return self.get_base_queryset(request)
+
+        qs = super(IndexView, self).get_queryset(request)
+        qs = self.apply_annotations(qs)
+        qs = self.apply_only(qs)
+        if self.model_admin.list_filter_facets:
+            facet_helper_class = self.model_admin.get_facet_helper_class()
+            self.facet_helper = facet_helper_class(
+                self, request or self.request)
+            self.unfaceted_filter_specs = self.filter_specs
+            self.filter_specs = self.facet_helper.wrap_filter_specs(
+                self.filter_specs)
+        return self.apply_prefetch_related(qs)
+
+    def get_filters(self, request):
+        result = super(IndexView, self).get_filters(request)
+        # Keep lookup params not handled by filters, for facet querysets
+        self.remaining_lookup_params = result[2]
+        return result
+
+    def get_search_results(self, request, queryset, search_term):
+        return self.search_helper.get_search_results(queryset, search_term)
+
+    def get_facet_queryset(self, exclude_spec):
+        """
+        Return a queryset with the search term and all active filters applied,
+        except for `exclude_spec`, for use in calculating facet counts
+        """
+        request = self.request
+        qs = self.get_base_queryset(request)
+        for spec in self.unfaceted_filter_specs:
+            if spec is not exclude_spec:
+                qs = spec.queryset(request, qs) or qs
+        qs = qs.filter(**self.remaining_lookup_params)
+        qs, use_distinct = self.get_search_results(request, qs, self.query)
+        return qs
+
+    def apply_annotations(self, qs):
+        # Values for `AnnotatedColumn` items in `list_display` are calculated
+        # by the database. Ordering by them works, because `order_by()`
+        # values are only resolved when the query is compiled
+        annotations = self.model_admin.get_list_annotations(self.request)
+        if annotations:
+            return qs.annotate(**annotations)
+        return qs
+
+    def apply_select_related(self, qs):
+        # `ModelAdmin.get_list_select_related()` infers relationships to
+        # follow from `list_display` and any row hooks when
+        # `list_select_related` hasn't been set explicitly
+        select_related = self.model_admin.get_list_select_related(
+            self.request)
+        if select_related is True:
+            return qs.select_related()
+        if select_related:
+            return qs.select_related(*select_related)
+        return qs
+
+    def apply_only(self, qs):
+        # Only columns needed to render each row are loaded. Foreign keys
+        # for `select_related()` lookups and fields used for ordering (which
+        # keyset pagination reads from objects) must be included too
+        only_fields = self.model_admin.get_list_only_fields(self.request)
+        if not only_fields:
+            return qs
+        names = list(only_fields)
+        select_related = qs.query.select_related
+        if select_related is True:
+            related = [
+                field.name for field in self.opts.concrete_fields
+                if field.is_relation
+            ]
+        else:
+            related = list(select_related or ())
+        ordering = [
+            item.lstrip('-').split(LOOKUP_SEP)[0]
+            for item in qs.query.order_by
+            if isinstance(item, six.string_types)
+        ]
+        for name in related + ordering:
+            if name in names:
+                continue
+            try:
+                field = self.opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                names.append(name)
+        return qs.only(*names)
+
+    def apply_prefetch_related(self, qs):
+        prefetch_related = self.model_admin.get_list_prefetch_related(
+            self.request)
+        if prefetch_related:
+            return qs.prefetch_related(*prefetch_related)
+        return qs
+
+    def get_paginator(self, queryset):
+        """
+        Return a paginator for `queryset`. If `keyset_pagination_enabled` is
+        `True` on the `ModelAdmin` and the current ordering allows it, results
+        are paginated using a cursor instead of a page number
+        """
+        if self.model_admin.keyset_pagination_enabled:
+            paginator = KeysetPaginator(queryset, self.items_per_page)
+            if paginator.is_supported:
+                return paginator
+        return Paginator(queryset, self.items_per_page)
+
+    def get_page(self, paginator):
+        """
+        Return a tuple containing the current page of results and a
+        `ResultCount` for the full result set
+        """
+        if isinstance(paginator, KeysetPaginator):
+            page_obj = paginator.page(self.cursor)
+            return page_obj, self.count_helper.get_count(self.queryset)
+        return self.count_helper.paginate(paginator, self.page_num + 1)
+
+    def get_page_with_results(self, paginator):
+        page_obj, result_count = self.get_page(paginator)
+        if not self.streaming:
+            # Results are evaluated once, and shared by everything that uses
+            # them. When streaming, they are evaluated in chunks later
+            page_obj.object_list = list(page_obj.object_list)
+        return page_obj, result_count
+
+    def get_context_queries(self, paginator):
+        """
+        Return an `OrderedDict` of callables (taking no arguments) that
+        query the database for values needed by `get_context_data()`. None
+        of them depend on each other, so they can be run concurrently.
+        """
+        user = self.request.user
+        queries = OrderedDict()
+        queries['page'] = lambda: self.get_page_with_results(paginator)
+        # When nothing has been filtered out, the result count is used
+        if self.query or self.get_filters_params():
+            queries['all_count'] = lambda: self.count_helper.get_count(
+                self.get_base_queryset())
+        queries['user_can_create'] = (
+            lambda: self.permission_helper.user_can_create(user))
+        if self.is_pagemodel:
+            queries['no_valid_parents'] = lambda: not (
+                self.permission_helper.get_valid_parent_pages(user).count())
+        if self.model_admin.index_view_concurrent_queries:
+            # Values that would otherwise be fetched while rendering
+            if self.facet_helper is not None:
+                for spec in self.unfaceted_filter_specs:
+                    if self.facet_helper.supports_filter(spec):
+                        queries[spec] = self.get_facet_query(spec)
+            queries['permissions'] = user.get_all_permissions
+        return queries
+
+    def get_facet_query(self, spec):
+        return lambda: self.facet_helper.get_counts(spec)
+
+    def run_context_queries(self, queries):
+        """
+        Return a list of results from calling each of `queries`. If
+        `index_view_concurrent_queries` is `True` on the `ModelAdmin`, they
+        are run concurrently in separate threads (unless a transaction is
+        in progress, in which case they are run one by one as usual), with
+        no more than `index_view_concurrent_queries_limit` at once
+        """
+        if not self.model_admin.index_view_concurrent_queries:
+            return [query() for query in queries]
+        return run_concurrently(
+            queries, using=self.queryset.db,
+            max_threads=self.model_admin.index_view_concurrent_queries_limit)
+
+    def get_context_data(self, **kwargs):
+        # Replaces `IndexView.get_context_data()` from Wagtail, which rebuilds
+        # the queryset, always uses page number pagination and always counts
+        # results exactly
+        user = self.request.user
+        if self.cached_content is not None:
+            # Only the header needs rendering
+            context = {
+                'view': self,
+                'user_can_create': self.permission_helper.user_can_create(
+                    user),
+                'cached_content_main': self.cached_content,
+            }
+            context.update(kwargs)
+            return super(WagtailIndexView, self).get_context_data(**context)
+
+        paginator = self.get_paginator(self.queryset)
+        queries = self.get_context_queries(paginator)
+        values = dict(zip(queries.keys(), self.run_context_queries(
+            list(queries.values()))))
+        page_obj, result_count = values.pop('page')
+        if not self.streaming:
+            self.model_admin.prepare_list_results(
+                self.request, page_obj.object_list)
+
+        context = {
+            'streaming': self.streaming,
+            'view': self,
+            'all_count': values.pop('all_count', result_count),
+            'result_count': result_count,
+            'paginator': paginator,
+            'page_obj': page_obj,
+            'object_list': page_obj.object_list,
+            'user_can_create': values.pop('user_can_create'),
+            'search_results_truncated': self.search_helper.results_truncated,
+            'search_results_limit': self.model_admin.search_results_limit,
+        }
+
+        if self.is_pagemodel:
+            models = self.model.allowed_parent_page_models()
+            allowed_parent_types = [m._meta.verbose_name for m in models]
+            context.update({
+                'no_valid_parents': values.pop('no_valid_parents'),
+                'required_parent_types': allowed_parent_types,
+            })
+
+        context.update(kwargs)
+        return super(WagtailIndexView, self).get_context_data(**context)
+
+    def render_to_response(self, context, **response_kwargs):
+        """
+        When `index_view_streaming_enabled` is `True` on the `ModelAdmin`,
+        the page is rendered without any result rows, and sent straight
+        away. Rows are then rendered and sent in chunks of
+        `index_view_streaming_chunk_size`, so that only one chunk of
+        results needs to be held in memory at a time.
+        """
+        response = super(IndexView, self).render_to_response(
+            context, **response_kwargs)
+        if not context.get('streaming'):
+            return response
+        content = response.rendered_content
+        if self.ROWS_PLACEHOLDER not in content:
+            # There are no results to display
+            response.content = content
+            return response
+        head, tail = content.split(self.ROWS_PLACEHOLDER, 1)
+        return StreamingHttpResponse(
+            self.stream(head, tail, context['page_obj']),
+            content_type=response['Content-Type'],
+        )
+
+    def stream(self, head, tail, page_obj):
+        yield head
+        index = 0
+        for objects in self.get_result_chunks(page_obj.object_list):
+            self.model_admin.prepare_list_results(self.request, objects)
+            for row in self.render_rows(objects, index):
+                yield row
+            index += len(objects)
+        yield tail
+
+    def get_result_chunks(self, object_list):
+        """
+        Yield lists of results from `object_list`. Querysets are evaluated
+        one chunk at a time, by fetching the primary keys for the page of
+        results first
+        """
+        size = self.model_admin.index_view_streaming_chunk_size
+        if not isinstance(object_list, QuerySet):
+            for i in range(0, len(object_list), size):
+                yield object_list[i:i + size]
+            return
+        pks = list(object_list.values_list('pk', flat=True))
+        for i in range(0, len(pks), size):
+            chunk = pks[i:i + size]
+            objects = dict(
+                (obj.pk, obj) for obj in
+                self.queryset.filter(pk__in=chunk).order_by()
+            )
+            yield [objects[pk] for pk in chunk if pk in objects]
+
+    def render_rows(self, objects, start_index=0):
+        """
+        Yield the rendered table row for each item in `objects`, in the
+        same way as modeladmin's `result_row_display` template tag
+        """
+        template = get_template(self.row_template_name)
+        for index, obj in enumerate(objects, start_index):
+            context = {'view': self, 'request': self.request, 'obj': obj}
+            row_attrs = self.model_admin.get_extra_attrs_for_row(obj, context)
+            row_attrs['data-object-pk'] = obj.pk
+            odd_or_even = 'odd' if (index % 2 == 0) else 'even'
+            if 'class' in row_attrs:
+                row_attrs['class'] += ' %s' % odd_or_even
+            else:
+                row_attrs['class'] = odd_or_even
+            context.update({
+                'result': list(items_for_result(self, obj)),
+                'row_attrs': mark_safe(flatatt(row_attrs)),
+                'action_buttons': self.get_buttons_for_obj(obj),
+            })
+            yield template.render(context, self.request)
+
+
+class InspectView(WagtailInspectView):
+    """
+    Fetches values for all of the `inspect_view_fields` up front. Foreign
+    keys are followed using `select_related()`, and the number of objects
+    for each many-to-many or reverse relationship is counted in the same
+    query as the instance itself. Related objects are
+    then fetched with a single query for each non-empty relationship, and no
+    more than `ModelAdmin.inspect_view_related_limit` are displayed for each.
+    """
+    count_attname_format = '_waddleadmin_%s_count'
+
+    def __init__(self, model_admin, instance_pk):
+        # Replaces `InstanceSpecificView.__init__()`, so that the instance
+        # can be fetched using `get_instance_queryset()`
+        super(WagtailInstanceSpecificView, self).__init__(model_admin)
+        self.instance_pk = unquote(instance_pk)
+        self.pk_quoted = quote(self.instance_pk)
+        self.forward_fields, self.related_fields = self.get_relation_fields()
+        self.instance = get_object_or_404(self.get_instance_queryset().filter(
+            **{self.pk_attname: self.instance_pk}))
+        self.related_values = self.get_related_values()
+
+    def get_relation_fields(self):
+        """
+        Return a tuple containing a list of names of foreign keys from
+        `inspect_view_fields` to follow using `select_related()`, and an
+        `OrderedDict` of many-to-many or reverse relationship fields, keyed
+        by name
+        """
+        forward = []
+        related = OrderedDict()
+        for name in self.model_admin.get_inspect_view_fields():
+            try:
+                field = self.opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if not field.is_relation or field.related_model is None:
+                continue
+            if field.concrete and (field.many_to_one or field.one_to_one):
+                forward.append(name)
+            elif field.many_to_many or field.one_to_many:
+                related[name] = field
+        return forward, related
+
+    def get_count_expression(self, name):
+        # Each relationship adds a join, so only distinct objects are counted
+        return Count(name, distinct=True)
+
+    def get_instance_queryset(self):
+        qs = self.model._default_manager.get_queryset()
+        if self.forward_fields:
+            qs = qs.select_related(*self.forward_fields)
+        for name in self.related_fields:
+            qs = qs.annotate(**{
+                self.count_attname_format % name:
+                self.get_count_expression(name)
+            })
+        return qs
+
+    def get_related_accessor(self, name):
+        field = self.related_fields[name]
+        if field.auto_created:
+            # Reverse relationships are accessed using a different name
+            return field.get_accessor_name()
+        return name
+
+    def get_related_manager(self, name):
+        return getattr(self.instance, self.get_related_accessor(name))
+
+    def get_related_values(self):
+        """
+        Return a dictionary of (objects, count) tuples for each field in
+        `related_fields`, where `objects` is a list of no more than
+        `inspect_view_related_limit` related objects, and `count` is the
+        total number of related objects
+        """
+        limit = self.model_admin.inspect_view_related_limit
+        values = {}
+        prefetch = []
+        for name in self.related_fields:
+            count = getattr(self.instance, self.count_attname_format % name)
+            count = count or 0
+            if not count:
+                values[name] = ([], 0)
+                continue
+            manager = self.get_related_manager(name)
+            if count <= limit and hasattr(manager, 'get_prefetch_queryset'):
+                prefetch.append((name, count))
+            else:
+                values[name] = (list(manager.all()[:limit]), count)
+        if prefetch:
+            prefetch_related_objects([self.instance], *[
+                self.get_related_accessor(name) for name, count in prefetch
+            ])
+            for name, count in prefetch:
+                objects = list(self.get_related_manager(name).all())
+                values[name] = (objects, count)
+        return values
+
+    def get_related_display_value(self, field_name):
+        objects, count = self.related_values[field_name]
+        if not objects:
+            return self.model_admin.get_empty_value_display(field_name)
+        value = ', '.join('%s' % obj for obj in objects)
+        if count > len(objects):
+            value = _('%(objects)s and %(count)s more') % {
+                'objects': value, 'count': count - len(objects)}
+        return value
+
+    def get_field_display_value(self, field_name, field=None):
+        if field_name in self.related_values:
+            return self.get_related_display_value(field_name)
+        return super(InspectView, self).get_field_display_value(
+            field_name, field)
+
+
+class JSONIndexView(IndexView):
+    """
+    Returns a JSON representation of the same results as `IndexView` (with
+    the same permission checks, filters, search and ordering), for use by
+    other applications. Supported querystring parameters (in addition to
+    those supported by `IndexView`) are:
+
+    - `fields`: A comma-separated list of field names to include for each
+      result (from `ModelAdmin.get_json_index_fields()`)
+    - `limit`: The maximum number of results to return (up to
+      `ModelAdmin.json_index_max_per_page`)
+    - `c`: A cursor, from the 'next' or 'previous' URL of a previous response
+
+    Only the requested fields are fetched (using `values()`), and results
+    are serialized one at a time as the response is streamed.
+    """
+    FIELDS_VAR = 'fields'
+    LIMIT_VAR = 'limit'
+    IGNORED_PARAMS = IndexView.IGNORED_PARAMS + (FIELDS_VAR, LIMIT_VAR)
+    encoder_class = DjangoJSONEncoder
+
+    def get_cache_helper(self, request):
+        # Only rendered HTML is cached
+        return None
+
+    def get_fields(self):
+        """
+        Return a list of field names to include for each result. Raises
+        `ValueError` if any requested fields are not allowed.
+        """
+        allowed = self.model_admin.get_json_index_fields(self.request)
+        requested = self.request.GET.get(self.FIELDS_VAR)
+        if not requested:
+            return list(allowed)
+        fields = []
+        for name in requested.split(','):
+            name = name.strip()
+            if name not in allowed:
+                raise ValueError(
+                    "'%s' is not a valid field. Choose from: %s" % (
+                        name, ', '.join(allowed)))
+            if name not in fields:
+                fields.append(name)
+        return fields
+
+    def get_limit(self):
+        max_limit = self.model_admin.json_index_max_per_page
+        try:
+            limit = int(self.request.GET.get(self.LIMIT_VAR, 0))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return min(self.items_per_page, max_limit)
+        return min(limit, max_limit)
+
+    def get_action_codenames(self):
+        """
+        Return the codenames of actions to include URLs for in each result
+        """
+        user = self.request.user
+        codenames = []
+        for codename in self.model_admin.json_index_action_names:
+            action = self.model_admin.get_action(codename)
+            if action is None or not action.instance_specific:
+                continue
+            if codename == 'inspect' and (
+                not self.model_admin.inspect_view_enabled
+            ):
+                continue
+            # Page permissions can only be checked for specific objects, so
+            # are left for the target view to enforce
+            if not self.is_pagemodel and not self.permission_helper.user_can(
+                user, action.permission_required or codename
+            ):
+                continue
+            codenames.append(codename)
+        return codenames
+
+    def get_paginator(self, queryset):
+        # Values aren't compatible with prefetching, and fields are selected
+        # explicitly (so any deferrals from `IndexView` are cleared).
+        # Results must always be paginated by cursor, so fall back to
+        # ordering by pk if the current ordering doesn't allow it
+        queryset = queryset.prefetch_related(None).defer(None)
+        limit = self.get_limit()
+        paginator = KeysetPaginator(queryset, limit)
+        if not paginator.is_supported:
+            paginator = KeysetPaginator(queryset, limit, ordering=['pk'])
+        return paginator
+
+    def get_url_for_cursor(self, cursor):
+        if cursor is None:
+            return None
+        return self.request.path + self.get_query_string(
+            {self.CURSOR_VAR: cursor})
+
+    def serialize_result(self, row, fields, codenames):
+        result = dict((name, row[name]) for name in fields)
+        if codenames:
+            pk = quote(row['pk'])
+            result['urls'] = dict(
+                (codename, self.url_helper.get_action_url(codename, pk))
+                for codename in codenames
+            )
+        return result
+
+    def stream(self, paginator, fields):
+        encoder = self.encoder_class()
+        codenames = self.get_action_codenames()
+        qs, reverse, seeking = paginator.get_page_queryset(self.cursor)
+        if reverse:
+            # Results must be put back into the correct order
+            rows = list(qs)
+            has_previous = len(rows) > paginator.per_page
+            rows = rows[:paginator.per_page]
+            rows.reverse()
+            has_next = True
+        else:
+            rows = qs.iterator()
+            has_next = False
+            has_previous = seeking
+
+        yield '{"results": ['
+        first = last = None
+        for i, row in enumerate(rows):
+            if i == paginator.per_page:
+                has_next = True
+                break
+            if first is None:
+                first = row
+            else:
+                yield ', '
+            last = row
+            yield encoder.encode(self.serialize_result(row, fields, codenames))
+
+        next_cursor = previous_cursor = None
+        if has_next and last is not None:
+            next_cursor = paginator.get_cursor_for_obj(last, NEXT)
+        if has_previous and first is not None:
+            previous_cursor = paginator.get_cursor_for_obj(first, PREVIOUS)
+        yield '], "next": %s, "previous": %s}' % (
+            json.dumps(self.get_url_for_cursor(next_cursor)),
+            json.dumps(self.get_url_for_cursor(previous_cursor)),
+        )
+
+    def get(self, request, *args, **kwargs):
+        try:
+            fields = self.get_fields()
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        value_names = list(fields)
+        if 'pk' not in value_names:
+            value_names.append('pk')
+        paginator = self.get_paginator(self.queryset).values(*value_names)
+        return StreamingHttpResponse(
+            self.stream(paginator, fields), content_type='application/json')
+
+
+class ChooseParentView(WagtailChooseParentView):
+    """
+    Lets the user choose a parent page for a new page without rendering
+    every valid parent at once. Valid parents are found using
+    `PermissionHelper.get_valid_parent_pages()` as normal, but are either:
+
+    - browsed through one level of the tree at a time, starting at the
+      lowest common ancestor of all valid parents. Only pages that are valid
+      parents, or have valid parents below them, are listed, and children
+      are only looked up when a page is opened (AJAX requests receive just
+      the list of results).
+    - or searched by title (using Wagtail's search backend).
+
+    Results are paginated, with `ModelAdmin.choose_parent_per_page` on each
+    page. If the user has only one valid parent, they are redirected to the
+    'add' view straight away.
+    """
+    SEARCH_VAR = 'q'
+    PARENT_VAR = 'parent'
+    PAGE_VAR = 'p'
+    search_backend = 'default'
+    results_template_name = 'waddleadmin/includes/choose_parent_results.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.valid_parents = self.permission_helper.get_valid_parent_pages(
+            request.user)
+        return super(ChooseParentView, self).dispatch(
+            request, *args, **kwargs)
+
+    def get_form(self, request):
+        # Choices are only ever fetched for validation (one at a time), as
+        # the template renders radio inputs for the current page of results
+        return ParentChooserForm(self.valid_parents, request.POST or None)
+
+    def get_only_valid_parent(self):
+        """
+        Return the user's only valid parent page, or `None` if there is
+        more than one (or none). No more than two pages are fetched.
+        """
+        pages = list(self.valid_parents[:2])
+        if len(pages) == 1:
+            return pages[0]
+        return None
+
+    def get_search_term(self):
+        return self.request.GET.get(self.SEARCH_VAR, '').strip()
+
+    def get_default_browse_page(self):
+        """
+        Return the page whose children should be listed first: the lowest
+        common ancestor of all valid parents (or its parent, if it is a
+        valid parent itself), so that the first level listed is the first
+        where there is a choice to make. `None` represents the top of the
+        tree (where only the root page is listed).
+        """
+        # Paths between the first and last (in order) share their prefix
+        values = self.valid_parents.aggregate(
+            first=Min('path'), last=Max('path'))
+        first, last = values['first'], values['last']
+        if first is None:
+            return None
+        steplen = Page.steplen
+        length = 0
+        while length < min(len(first), len(last)) and (
+            first[length:length + steplen] == last[length:length + steplen]
+        ):
+            length += steplen
+        if length == len(first):
+            # The common ancestor is the first valid parent
+            length -= steplen
+        if not length:
+            return None
+        return Page.objects.get(path=first[:length])
+
+    def get_browse_page(self):
+        """
+        Return the page whose children are being browsed, or `None` for the
+        top of the tree
+        """
+        parent_pk = self.request.GET.get(self.PARENT_VAR)
+        if parent_pk:
+            return get_object_or_404(Page, pk=unquote(parent_pk))
+        return self.get_default_browse_page()
+
+    def get_path_prefixes(self, depth):
+        """
+        Return a queryset of distinct `path` values for the ancestors at
+        `depth` of every valid parent (or the valid parents themselves, if
+        they are at that depth)
+        """
+        length = Page.steplen * depth
+        return self.valid_parents.filter(depth__gte=depth).annotate(
+            path_prefix=Substr('path', 1, length)
+        ).values_list('path_prefix', flat=True).distinct()
+
+    def get_browse_queryset(self, browse_page):
+        """
+        Return a queryset of the children of `browse_page` (or the root page,
+        if `browse_page` is `None`) that are valid parents, or have valid
+        parents below them
+        """
+        if browse_page is None:
+            prefixes = self.get_path_prefixes(1)
+        else:
+            prefixes = self.get_path_prefixes(browse_page.depth + 1).filter(
+                path__startswith=browse_page.path)
+        return Page.objects.filter(path__in=prefixes).order_by('path')
+
+    def get_search_queryset(self, search_term):
+        """
+        Return a queryset of valid parents with titles matching
+        `search_term`. Up to `ModelAdmin.choose_parent_search_limit` of the
+        most relevant valid parents are used.
+        """
+        # Only valid parents are searched, so that other pages can't use up
+        # the limit
+        backend = get_search_backend(self.search_backend)
+        results = backend.search(
+            search_term, self.valid_parents.only('pk'), fields=['title'])
+        pks = [
+            page.pk for page in
+            results[:self.model_admin.choose_parent_search_limit]
+        ]
+        return self.valid_parents.filter(pk__in=pks).order_by('path')
+
+    def get_ancestor_titles(self, pages):
+        """
+        Return a dictionary of lists of titles for the ancestors of each page
+        in `pages` (excluding the root), keyed by page pk. Ancestors for all
+        pages are fetched with a single query.
+        """
+        steplen = Page.steplen
+        paths = set()
+        for page in pages:
+            for depth in range(2, page.depth):
+                paths.add(page.path[:depth * steplen])
+        ancestors = {}
+        if paths:
+            ancestors = dict(
+                (ancestor.path, ancestor) for ancestor in
+                Page.objects.filter(path__in=paths)
+            )
+        result = {}
+        for page in pages:
+            titles = []
+            for depth in range(2, page.depth):
+                ancestor = ancestors.get(page.path[:depth * steplen])
+                if ancestor is not None:
+                    titles.append(ancestor.get_admin_display_title())
+            result[page.pk] = titles
+        return result
+
+    def get_result_items(self, pages, search_term):
+        """
+        Return a list of dictionaries describing each page in `pages`: whether
+        it can be chosen, whether it has valid parents below it (so can be
+        browsed into), and (when searching) the titles of its ancestors
+        """
+        paths = [page.path for page in pages]
+        choosable_pks = set(self.valid_parents.filter(
+            pk__in=[page.pk for page in pages]).values_list('pk', flat=True))
+        browsable_paths = set()
+        ancestor_titles = {}
+        if search_term:
+            ancestor_titles = self.get_ancestor_titles(pages)
+        elif pages:
+            depth = pages[0].depth
+            browsable_paths = set(self.get_path_prefixes(depth).filter(
+                depth__gt=depth, path_prefix__in=paths))
+        return [
+            {
+                'page': page,
+                'can_choose': page.pk in choosable_pks,
+                'can_browse': page.path in browsable_paths,
+                'ancestor_titles': ancestor_titles.get(page.pk, []),
+            }
+            for page in pages
+        ]
+
+    def get_context_data(self, **kwargs):
+        search_term = self.get_search_term()
+        browse_page = None
+        if search_term:
+            queryset = self.get_search_queryset(search_term)
+        else:
+            browse_page = self.get_browse_page()
+            queryset = self.get_browse_queryset(browse_page)
+        paginator = Paginator(
+            queryset, self.model_admin.choose_parent_per_page)
+        page_obj = paginator.page(1)
+        try:
+            page_obj = paginator.page(self.request.GET.get(self.PAGE_VAR, 1))
+        except (EmptyPage, PageNotAnInteger):
+            pass
+        pages = list(page_obj.object_list)
+
+        context = {
+            'search_term': search_term,
+            'search_var': self.SEARCH_VAR,
+            'parent_var': self.PARENT_VAR,
+            'browse_page': browse_page,
+            'browse_ancestors': [],
+            'page_obj': page_obj,
+            'paginator': paginator,
+            'items': self.get_result_items(pages, search_term),
+            'results_template_name': self.results_template_name,
+        }
+        if browse_page is not None:
+            context['browse_ancestors'] = list(
+                browse_page.get_ancestors(inclusive=True))
+        context.update(kwargs)
+        return super(ChooseParentView, self).get_context_data(**context)
+
+    def get(self, request, *args, **kwargs):
+        if not request.GET:
+            only_parent = self.get_only_valid_parent()
+            if only_parent is not None:
+                return redirect(self.url_helper.get_action_url(
+                    'add', self.app_label, self.model_name,
+                    quote(only_parent.pk)))
+        return super(ChooseParentView, self).get(request, *args, **kwargs)
+
+    def get_template_names(self):
+        if self.request.is_ajax():
+            return [self.results_template_name]
+        return super(ChooseParentView, self).get_template_names()
+
+
+class RevisionsIndexView(WagtailInstanceSpecificView):
+    """
+    Lists revisions of a page, newest first, using keyset pagination (so
+    pages with thousands of revisions are as quick to view as any other).
+    Only revision metadata is loaded (`content_json` is deferred), and
+    everything each row needs (the latest revision, and the revision
+    before each one, for comparison links) is worked out using no more
+    than a couple of extra queries for the whole page.
+    """
+    CURSOR_VAR = 'c'
+    ordering = ('-created_at', '-pk')
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.permission_helper.user_can_edit_obj(
+            request.user, self.instance
+        ):
+            raise PermissionDenied
+        return super(RevisionsIndexView, self).dispatch(
+            request, *args, **kwargs)
+
+    def get_page_title(self):
+        return _('Revisions of')
+
+    def get_meta_title(self):
+        return _('Revisions of %s') % self.instance
+
+    def get_queryset(self):
+        return PageRevision.objects.filter(page_id=self.instance.pk).defer(
+            'content_json').select_related('user')
+
+    def get_paginator(self, queryset):
+        return KeysetPaginator(
+            queryset, self.model_admin.revisions_per_page, self.ordering)
+
+    def get_latest_revision_id(self, page_obj):
+        if not page_obj.has_previous() and page_obj.object_list:
+            return page_obj.object_list[0].pk
+        return PageRevision.objects.filter(
+            page_id=self.instance.pk).order_by(
+            *self.ordering).values_list('pk', flat=True).first()
+
+    def get_previous_revision_ids(self, page_obj, paginator):
+        """
+        Return a dictionary of the pk of the revision before each revision
+        in `page_obj`, keyed by revision pk. Each revision's predecessor is
+        the next one on the page, so only the last needs to be looked up.
+        """
+        revisions = page_obj.object_list
+        result = {}
+        for revision, previous in zip(revisions, revisions[1:]):
+            result[revision.pk] = previous.pk
+        if revisions and page_obj.has_next():
+            last = revisions[-1]
+            values = [
+                paginator.get_value_for_obj(last, name)
+                for name, descending in paginator.ordering
+            ]
+            result[last.pk] = paginator.queryset.filter(
+                paginator.get_seek_filter(values)
+            ).order_by(*paginator.get_order_by()).values_list(
+                'pk', flat=True).first()
+        return result
+
+    def get_compare_url(self, revision_id_a, revision_id_b):
+        return self.url_helper.get_action_url(
+            'revisions_compare', self.pk_quoted, revision_id_a,
+            revision_id_b)
+
+    def get_context_data(self, **kwargs):
+        paginator = self.get_paginator(self.get_queryset())
+        page_obj = paginator.page(self.request.GET.get(self.CURSOR_VAR))
+        latest_id = self.get_latest_revision_id(page_obj)
+        previous_ids = self.get_previous_revision_ids(page_obj, paginator)
+        items = []
+        for revision in page_obj.object_list:
+            previous_id = previous_ids.get(revision.pk)
+            items.append({
+                'revision': revision,
+                'is_latest': revision.pk == latest_id,
+                'is_live': revision.pk == self.instance.live_revision_id,
+                'compare_url': self.get_compare_url(
+                    previous_id, revision.pk) if previous_id else None,
+            })
+        context = {
+            'page': self.instance,
+            'page_obj': page_obj,
+            'paginator': paginator,
+            'items': items,
+            'cursor_var': self.CURSOR_VAR,
+        }
+        context.update(kwargs)
+        return super(RevisionsIndexView, self).get_context_data(**context)
+
+    def get_template_names(self):
+        return self.model_admin.get_templates('revisions_index')
+
+
+class RevisionsCompareView(WagtailInstanceSpecificView):
+    """
+    Shows the differences between two revisions of a page, in the same way
+    as Wagtail's 'compare revisions' view. Differences are only computed
+    when requested, and the rendered result is kept in a
+    `ModelAdmin.revisions_diff_cache_size` sized cache (revisions don't
+    change once saved), so comparisons that are viewed repeatedly don't
+    need to be worked out again.
+    """
+    revision_id_a = None
+    revision_id_b = None
+    comparison_template_name = 'waddleadmin/includes/revisions_comparison.html'
+
+    def __init__(self, model_admin, instance_pk, revision_id_a,
+                 revision_id_b):
+        super(RevisionsCompareView, self).__init__(model_admin, instance_pk)
+        self.revision_id_a = int(revision_id_a)
+        self.revision_id_b = int(revision_id_b)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.permission_helper.user_can_edit_obj(
+            request.user, self.instance
+        ):
+            raise PermissionDenied
+        return super(RevisionsCompareView, self).dispatch(
+            request, *args, **kwargs)
+
+    def get_page_title(self):
+        return _('Comparing')
+
+    def get_meta_title(self):
+        return _('Comparing %s') % self.instance
+
+    def get_revisions(self):
+        # Metadata for the headings only; content is loaded when comparing
+        revisions = dict(
+            (revision.pk, revision) for revision in
+            PageRevision.objects.filter(
+                page_id=self.instance.pk,
+                pk__in=(self.revision_id_a, self.revision_id_b),
+            ).defer('content_json')
+        )
+        try:
+            return (
+                revisions[self.revision_id_a], revisions[self.revision_id_b])
+        except KeyError:
+            raise Http404
+
+    def get_cache_key(self):
+        return (
+            self.instance.pk, self.revision_id_a, self.revision_id_b,
+            translation.get_language())
+
+    def get_comparison(self):
+        """
+        Return a list of comparison objects (from Wagtail's
+        `wagtail.wagtailadmin.compare` module) for fields that differ
+        between the two revisions
+        """
+        page = self.instance.specific
+        revisions = dict(
+            (revision.pk, revision) for revision in
+            PageRevision.objects.filter(
+                page_id=self.instance.pk,
+                pk__in=(self.revision_id_a, self.revision_id_b))
+        )
+        revision_a = revisions[self.revision_id_a].as_page_object()
+        revision_b = revisions[self.revision_id_b].as_page_object()
+        comparison = [
+            comp(revision_a, revision_b)
+            for comp in page.get_edit_handler().get_comparison()
+        ]
+        return [comp for comp in comparison if comp.has_changed()]
+
+    def get_comparison_html(self):
+        cache = self.model_admin.get_revisions_diff_cache()
+        key = self.get_cache_key()
+        html = cache.get(key)
+        if html is None:
+            html = render_to_string(self.comparison_template_name, {
+                'comparison': self.get_comparison()})
+            cache.set(key, html)
+        return mark_safe(html)
+
+    def get_context_data(self, **kwargs):
+        revision_a, revision_b = self.get_revisions()
+        context = {
+            'page': self.instance,
+            'revision_a': revision_a,
+            'revision_b': revision_b,
+            'comparison_html': self.get_comparison_html(),
+            'revisions_index_url': self.url_helper.get_action_url(
+                'revisions_index', self.pk_quoted),
+        }
+        context.update(kwargs)
+        return super(RevisionsCompareView, self).get_context_data(**context)
+
+    def get_template_names(self):
+        return self.model_admin.get_templates('revisions_compare')